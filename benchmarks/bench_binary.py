@@ -0,0 +1,88 @@
+"""
+Benchmark de la telemetría binaria frente a las líneas de texto.
+
+Compara, para el mismo flujo de mensajes TX/RX, los bytes enviados por el
+puerto serial y el costo de convertirlos en eventos en el monitor
+(LineFramer + parse_line para texto, LineFramer solo para tramas).
+
+Uso:
+    python benchmarks/bench_binary.py [--messages 200000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_framing import LineFramer, encode_frame, FRAME_TX, FRAME_RX  # noqa: E402
+from monitor_parser import parse_line  # noqa: E402
+
+
+def mensajes(n):
+    for i in range(n):
+        if i % 2:
+            yield FRAME_RX, 2, i & 0xFF, 3, 0, 9999, 1000 + i * 100
+        else:
+            yield FRAME_TX, 1, i & 0xFF, 1, 1, 45, 1000 + i * 100
+
+
+def como_texto(frame_type, sender, seq, state, request, dist, ts):
+    if frame_type == FRAME_TX:
+        return f"TX: estado={state}, request={request}, dist={dist}\r\n".encode()
+    return f"RX de ESP {sender}: estado={state}, request={request}, dist={dist}\r\n".encode()
+
+
+def procesar_texto(chunks):
+    framer = LineFramer()
+    events = 0
+    for chunk in chunks:
+        for line in framer.feed(chunk):
+            if parse_line(line) is not None:
+                events += 1
+    return events
+
+
+def procesar_binario(chunks):
+    framer = LineFramer()
+    events = 0
+    for chunk in chunks:
+        events += len(framer.feed(chunk))
+    return events
+
+
+def trocear(data, size=4096):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def medir(nombre, funcion, data, n):
+    chunks = trocear(data)
+    inicio = time.perf_counter()
+    events = funcion(chunks)
+    duracion = time.perf_counter() - inicio
+    assert events == n, (nombre, events)
+    print(f"{nombre:<10} {len(data) / n:>6.1f} bytes/msg  {n / duracion:>12,.0f} msg/s  "
+          f"{duracion * 1e9 / n:>7,.0f} ns/msg")
+    return duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    lista = list(mensajes(args.messages))
+    texto = b"".join(como_texto(*m) for m in lista)
+    binario = b"".join(encode_frame(*m) for m in lista)
+
+    t_texto = medir("texto", procesar_texto, texto, args.messages)
+    t_bin = medir("binario", procesar_binario, binario, args.messages)
+    print(f"Ancho de banda: {len(texto) / len(binario):.1f}x menos | decodificación: {t_texto / t_bin:.1f}x más rápida")
+    # A 115200 baud (~11520 bytes/s) el máximo teórico de mensajes por segundo:
+    print(f"Máx. mensajes/s a 115200 baud: texto {11520 * args.messages / len(texto):.0f}, "
+          f"binario {11520 * args.messages / len(binario):.0f}")
+
+
+if __name__ == '__main__':
+    main()
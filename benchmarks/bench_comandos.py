@@ -0,0 +1,129 @@
+"""
+Benchmark de la cola de comandos de Calamardo: ventana en vuelo vs. envío de a uno.
+
+Un maestro simulado (pty, Linux/macOS) responde como calamardo_master_s3.ino:
+cada línea le llega después de --enlace-ms (USB y buffers), la procesa en orden
+en --servicio-ms (esp_now_send y el print) y su respuesta tarda otros
+--enlace-ms en volver. Con --perdida se descarta esa fracción de respuestas:
+sin otra respuesta detrás se reenvía una vez; con ventana > 1 la respuesta de
+un comando posterior la delata y el comando queda "sin confirmación" (fallido)
+en lugar de reenviarse. Para cada ventana se envían --pedidos pedidos
+completos (los seis PRODUCTOS) y se informa comandos/s e ida y vuelta.
+
+Uso:
+    python benchmarks/bench_comandos.py [--ventanas 1 2 4 6] [--pedidos 5] [--perdida 0.05]
+"""
+
+import argparse
+import os
+import pty
+import queue
+import random
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'espnow_class_challenge'))
+
+from cola_comandos import ColaComandos, CONFIRMADO  # noqa: E402
+
+PRODUCTOS = [("HBRGR", 50), ("SWBRD", 50), ("SHRMP", 15), ("PICKL", 20), ("TMATO", 20), ("LETCE", 20)]
+
+
+class MaestroSimulado:
+    """pty que responde "Enviado: CODIGO N" con latencia de enlace y tiempo de servicio"""
+    def __init__(self, enlace_s, servicio_s, perdida=0.0, seed=1):
+        self.master, slave = pty.openpty()
+        tty.setraw(self.master)
+        tty.setraw(slave)
+        self.path = os.ttyname(slave)
+        self._slave = slave
+        self.enlace_s = enlace_s
+        self.servicio_s = servicio_s
+        self.perdida = perdida
+        self.recibidos = 0
+        self._random = random.Random(seed)
+        self._entrada = queue.Queue()
+        self._salida = queue.Queue()
+        for target in (self._leer, self._procesar, self._responder):
+            threading.Thread(target=target, daemon=True).start()
+
+    def _leer(self):
+        buffer = b''
+        while True:
+            try:
+                buffer += os.read(self.master, 4096)
+            except OSError:
+                return
+            *lineas, buffer = buffer.split(b'\n')
+            llegada = time.monotonic() + self.enlace_s
+            for linea in lineas:
+                self._entrada.put((llegada, linea.strip().decode()))
+
+    def _procesar(self):
+        while True:
+            llegada, linea = self._entrada.get()
+            time.sleep(max(0.0, llegada - time.monotonic()) + self.servicio_s)
+            self.recibidos += 1
+            if self._random.random() < self.perdida:
+                continue
+            texto = f"Enviado: {linea[:5]} {int(linea[5:])}\r\n"
+            self._salida.put((time.monotonic() + self.enlace_s, texto.encode()))
+
+    def _responder(self):
+        while True:
+            vence, datos = self._salida.get()
+            time.sleep(max(0.0, vence - time.monotonic()))
+            os.write(self.master, datos)
+
+
+def correr(maestro, ventana, pedidos, timeout_s):
+    terminado = threading.Event()
+    resultados = []
+
+    def on_result(comando):
+        resultados.append(comando)
+        if len(resultados) == pedidos * len(PRODUCTOS):
+            terminado.set()
+
+    cola = ColaComandos(ventana=ventana, timeout_s=timeout_s, on_result=on_result)
+    cola.pedir(maestro.path, "HBRGR", 50)  # Abrir el puerto fuera de la medición
+    while cola.pendientes:
+        time.sleep(0.001)
+    resultados.clear()
+    inicio = time.perf_counter()
+    for _ in range(pedidos):
+        cola.pedir_pedido(maestro.path, PRODUCTOS)
+    terminado.wait(60)
+    segundos = time.perf_counter() - inicio
+    cola.stop()
+    confirmados = [c for c in resultados if c.estado == CONFIRMADO]
+    rtts = sorted(c.rtt_s * 1000 for c in confirmados) or [0.0]
+    reintentos = sum(c.intentos - 1 for c in resultados)
+    return len(confirmados) / segundos, rtts[len(rtts) // 2], rtts[-1], reintentos, len(resultados) - len(confirmados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ventanas", type=int, nargs="+", default=[1, 2, 4, 6])
+    parser.add_argument("--pedidos", type=int, default=5)
+    parser.add_argument("--enlace-ms", type=float, default=2.0)
+    parser.add_argument("--servicio-ms", type=float, default=1.0)
+    parser.add_argument("--perdida", type=float, default=0.0)
+    parser.add_argument("--timeout-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    print(f"{args.pedidos} pedidos x {len(PRODUCTOS)} productos, enlace {args.enlace_ms} ms, "
+          f"servicio {args.servicio_ms} ms, pérdida {args.perdida:.0%}")
+    print(f"{'ventana':>7} {'comandos/s':>11} {'rtt p50 ms':>11} {'rtt máx ms':>11} {'reintentos':>11} {'fallidos':>9}")
+    for ventana in args.ventanas:
+        maestro = MaestroSimulado(args.enlace_ms / 1000, args.servicio_ms / 1000, args.perdida)
+        rate, p50, maximo, reintentos, fallidos = correr(maestro, ventana, args.pedidos,
+                                                         args.timeout_ms / 1000)
+        print(f"{ventana:>7} {rate:>11.1f} {p50:>11.1f} {maximo:>11.1f} {reintentos:>11} {fallidos:>9}")
+
+
+if __name__ == '__main__':
+    main()
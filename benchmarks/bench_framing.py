@@ -0,0 +1,88 @@
+"""
+Micro-benchmark de la separación de líneas de SerialReader.
+
+Compara el método anterior (decodificar cada bloque a str, concatenar y
+partir con split('\\n', 1) en bucle) con monitor_framing.LineFramer sobre un
+log capturado, troceado en bloques como los que devuelve el puerto serial.
+También verifica cuántos caracteres multibyte se pierden cuando quedan
+partidos entre dos bloques.
+
+Uso:
+    python benchmarks/bench_framing.py [--log captura.txt] [--chunk 4096]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parser import construir_corpus  # noqa: E402
+from monitor_framing import LineFramer  # noqa: E402
+
+
+def legacy_framing(chunks):
+    """Separación original de SerialReader.run"""
+    lines = []
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode('utf-8', errors='ignore')
+        while '\n' in buffer:
+            line, buffer = buffer.split('\n', 1)
+            line = line.strip()
+            if line:
+                lines.append(line)
+    return lines
+
+
+def framer_framing(chunks):
+    framer = LineFramer()
+    lines = []
+    for chunk in chunks:
+        lines.extend(framer.feed(chunk))
+    return lines
+
+
+def trocear(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def medir(nombre, funcion, chunks, total_bytes, repeticiones=5):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        lines = funcion(chunks)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    print(f"{nombre:<18} {total_bytes / mejor / 1e6:>8.1f} MB/s  {len(lines) / mejor:>12,.0f} líneas/s")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--log', help="log capturado en formato [HH:MM:SS.mmm] [A] ...")
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--chunk', type=int, default=4096, help="bytes por lectura")
+    args = parser.parse_args()
+
+    corpus = construir_corpus(args.lines, args.log)
+    data = ("\n".join(corpus) + "\n").encode('utf-8')
+    print(f"{len(corpus)} líneas, {len(data) / 1e6:.1f} MB, bloques de {args.chunk} bytes")
+
+    for size in (args.chunk, 64, 65536):
+        chunks = trocear(data, size)
+        print(f"-- bloques de {size} bytes")
+        medir("split sobre str", legacy_framing, chunks, len(data))
+        medir("LineFramer", framer_framing, chunks, len(data))
+
+    # Caracteres no ASCII perdidos al partirse entre bloques
+    chunks = trocear(data, 64)
+    antes, despues = legacy_framing(chunks), framer_framing(chunks)
+    esperados = sum(len(re.findall(r'[^\x00-\x7f]', line)) for line in despues)
+    perdidos = esperados - sum(len(re.findall(r'[^\x00-\x7f]', line)) for line in antes)
+    print(f"Caracteres no ASCII perdidos por el método anterior (bloques de 64): {perdidos}")
+
+
+if __name__ == '__main__':
+    main()
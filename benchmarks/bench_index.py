@@ -0,0 +1,122 @@
+"""
+Benchmark de las búsquedas indexadas sobre una sesión grabada.
+
+Genera con el simulador una sesión larga grabada con índice y compara cada
+consulta resuelta con SessionIndex contra un recorrido completo de la sesión
+(iter_records). Ambos caminos deben devolver las mismas filas.
+
+Uso:
+    python benchmarks/bench_index.py [--intersections 8] [--seconds 3600]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_framing import LineFramer, frame_text  # noqa: E402
+from monitor_index import IndexWriter, SessionIndex, parse_query, parse_when, run_query  # noqa: E402
+from monitor_parser import parse_line, SerialLine  # noqa: E402
+from monitor_recorder import SessionRecorder, iter_records  # noqa: E402
+from monitor_simulator import Simulation  # noqa: E402
+
+
+def generar(base, intersections, seconds, loss, i2c_rate):
+    """Simular y grabar la sesión con su índice"""
+    recorder = SessionRecorder(base, fsync=False, index=IndexWriter(base))
+    recorder.start()
+    framers = {}
+    t0_ns = time.monotonic_ns()
+
+    def sink(node, data):
+        framer = framers.setdefault(node, LineFramer())
+        t_ns = t0_ns + int(sim.now * 1e6)
+        items = []
+        for item in framer.feed(data):
+            if type(item) is str:
+                text = item.strip()
+                event = parse_line(text)
+            else:
+                text, event = frame_text(item), item
+            items.append(SerialLine("", text, event, t_ns))
+        recorder.record_batch(node, items)
+
+    sim = Simulation(intersections, loss=loss, i2c_rate=i2c_rate, seed=1, use_pty=False, sink=sink)
+    sim.run(seconds, speed=0)
+    recorder.close()
+    return recorder.rows_written
+
+
+def recorrido(base, query, index):
+    """Misma consulta recorriendo todas las filas (referencia)"""
+    filters, anchor, within_s = parse_query(query)
+    if anchor is not None:
+        return None
+    start = index.start_ns
+    t_start = parse_when(filters.get('start'), start)
+    t_end = parse_when(filters.get('end'), start)
+    text = filters.get('text', '').lower()
+    results = []
+    for r in iter_records(base):
+        if filters.get('node') is not None and r.node != filters['node']:
+            continue
+        if filters.get('kinds') and r.kind not in filters['kinds']:
+            continue
+        if filters.get('state') is not None and r.state != filters['state']:
+            continue
+        if t_start is not None and r.t_ns < t_start:
+            continue
+        if t_end is not None and r.t_ns > t_end:
+            continue
+        if text and text not in r.text.lower():
+            continue
+        results.append(r)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--intersections', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3600, help="tiempo simulado")
+    parser.add_argument('--loss', type=float, default=0.3)
+    parser.add_argument('--i2c-rate', type=float, default=0.002, help="ráfagas I2C NACK por segundo y nodo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "sesion")
+        rows = generar(base, args.intersections, args.seconds, args.loss, args.i2c_rate)
+        start = time.perf_counter()
+        index = SessionIndex(base)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{rows} filas, {len(index)} bloques, índice cargado en {load_ms:.1f} ms")
+
+        t = index.start_ns
+        desde = time.strftime("%H:%M:%S", time.localtime(t / 1e9 + args.seconds / 2))
+        hasta = time.strftime("%H:%M:%S", time.localtime(t / 1e9 + args.seconds / 2 + 300))
+        consultas = [
+            f"nodo:B1 tipo:TX_ERROR desde:{desde} hasta:{hasta}",
+            "unexpected nack",
+            f"nodo:A2 desde:{desde} hasta:{hasta} estado=3",
+            "tipo:TRANSITION cerca:TX_ERROR ventana:0.5",
+        ]
+        print(f"{'consulta':<52} {'filas':>7} {'índice':>9} {'completo':>9}")
+        for query in consultas:
+            start = time.perf_counter()
+            found = run_query(index, query, limit=None)
+            indexed_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            expected = recorrido(base, query, index)
+            full_ms = (time.perf_counter() - start) * 1000
+            if expected is not None:
+                assert sorted(found) == sorted(expected), query
+                full = f"{full_ms:>7.1f}ms"
+            else:
+                full = f"{'-':>9}"
+            print(f"{query[:52]:<52} {len(found):>7} {indexed_ms:>7.1f}ms {full}")
+
+
+if __name__ == '__main__':
+    main()
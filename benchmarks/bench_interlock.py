@@ -0,0 +1,94 @@
+"""
+Benchmark del verificador de enclavamiento en línea y sobre sesiones grabadas.
+
+Genera con el simulador una sesión de varias intersecciones, la graba con
+SessionRecorder y mide:
+  - en línea:  InterlockVerifier.feed con cada evento parseado (como MainWindow)
+  - sesión:    verify_session sobre los bloques columnares grabados
+Ambos caminos deben reportar los mismos incumplimientos.
+
+Uso:
+    python benchmarks/bench_interlock.py [--intersections 8] [--seconds 3600]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_framing import LineFramer, frame_text  # noqa: E402
+from monitor_interlock import InterlockVerifier, verify_session  # noqa: E402
+from monitor_parser import parse_line, SerialLine  # noqa: E402
+from monitor_recorder import SessionRecorder  # noqa: E402
+from monitor_simulator import Simulation  # noqa: E402
+
+
+def generar(base, intersections, seconds, loss):
+    """Simular y grabar; devuelve los eventos como (nodo, evento, t_ns)"""
+    recorder = SessionRecorder(base, fsync=False)
+    recorder.start()
+    framers = {}
+    eventos = []
+
+    def sink(node, data):
+        framer = framers.setdefault(node, LineFramer())
+        t_ns = int(sim.now * 1e6)
+        items = []
+        for item in framer.feed(data):
+            if type(item) is str:
+                text = item.strip()
+                event = parse_line(text)
+            else:
+                text, event = frame_text(item), item
+            items.append(SerialLine("", text, event, t_ns))
+            if event is not None:
+                eventos.append((node, event, t_ns))
+        recorder.record_batch(node, items)
+
+    sim = Simulation(intersections, loss=loss, seed=1, use_pty=False, sink=sink)
+    sim.run(seconds, speed=0)
+    recorder.close()
+    return eventos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--intersections', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3600, help="tiempo simulado")
+    parser.add_argument('--loss', type=float, default=0.3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "sesion")
+        eventos = generar(base, args.intersections, args.seconds, args.loss)
+
+        live = InterlockVerifier(max_violations=None)
+        for i in range(1, args.intersections + 1):
+            if args.intersections == 1:
+                live.pair("A", "B")
+            else:
+                live.pair(f"A{i}", f"B{i}")
+        feed = live.feed
+        start = time.perf_counter()
+        for node, event, t_ns in eventos:
+            feed(node, event, t_ns)
+        live.flush()
+        live_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        offline, rows_read, rows_used = verify_session(base, InterlockVerifier(max_violations=None))
+        offline_s = time.perf_counter() - start
+
+    print(f"{'modo':<10} {'eventos':>10} {'tiempo':>9} {'eventos/s':>12}")
+    print(f"{'en línea':<10} {len(eventos):>10} {live_s:>8.2f}s {len(eventos) / live_s:>12,.0f}")
+    print(f"{'sesión':<10} {rows_read:>10} {offline_s:>8.2f}s {rows_read / offline_s:>12,.0f}"
+          f"   ({rows_used} filas procesadas)")
+    print("en línea:", live.counts)
+    print("sesión:  ", offline.counts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark del parser de líneas seriales.
+
+Compara la cascada de expresiones regulares original de
+MainWindow.parse_serial_line con monitor_parser.parse_line sobre una mezcla
+de tráfico representativa (TX/RX cada 200 ms, transiciones, decisiones y la
+tormenta de errores I2C documentada en ANALISIS_LOGS.md).
+
+Uso:
+    python benchmarks/bench_parser.py [--lines 200000] [--log archivo.txt]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_parser import parse_line  # noqa: E402
+
+
+MUESTRA = [
+    "TX: estado=1, request=0, dist=9999",
+    "RX de ESP 2: estado=3, request=0, dist=9999",
+    "TX: estado=3, request=1, dist=4",
+    "RX de ESP 1: estado=1, request=1, dist=45",
+    "E (7813) i2c.master: I2C hardware NACK detected",
+    "E (7818) i2c.master: I2C transaction unexpected nack detected",
+    "E (7825) i2c.master: s_i2c_synchronous_transaction(945): I2C transaction failed",
+    "E (7833) i2c.master: i2c_master_multi_buffer_transmit(1214): I2C transaction failed",
+    "-> VERDE [CONFIRMADO SEGURO]",
+    "-> AMARILLO",
+    "-> ROJO (turno de B)",
+    "-> ALL_RED (preparar cambio)",
+    "[DECISION] Ninguno detecta, ciclo par -> A pasa a verde",
+    "[SEGURIDAD] Otro semáforo en verde/amarillo - manteniendo ALL_RED",
+    "Callback: Error en envío, status=1",
+    "Error TX ESP-NOW: 0x3069",
+    "Sin comunicación con peer - modo seguro",
+    "12,34567,1,45,1,0",
+    "Peer MAC: 50:78:7D:15:B3:84",
+]
+
+# Proporciones aproximadas por segundo y nodo: 5 TX + 5 RX, ~50 errores I2C
+PESOS = [5, 5, 0, 0, 13, 13, 12, 12, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0]
+
+
+def legacy_parse(line):
+    """Cascada original de parse_serial_line, sin efectos sobre la UI"""
+    updated_dist = False
+    csv_match = re.match(r'^\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([01])\s*,\s*([01])\s*$', line.strip())
+    if csv_match:
+        state_map = {'0': 'ALL RED', '1': 'VERDE', '2': 'AMARILLO', '3': 'ROJO'}
+        return ('csv', state_map.get(csv_match.group(3)))
+    result = None
+    if "-> VERDE" in line:
+        result = 'VERDE'
+    elif "-> AMARILLO" in line:
+        result = 'AMARILLO'
+    elif "-> ROJO" in line:
+        result = 'ROJO'
+    elif "-> ALL_RED" in line:
+        result = 'ALL RED'
+    tx_match = re.search(r'TX: estado=(\d+), request=(\d+), dist=(\d+)', line)
+    if tx_match:
+        state_map = {'0': 'ALL RED', '1': 'VERDE', '2': 'AMARILLO', '3': 'ROJO'}
+        result = ('tx', state_map.get(tx_match.group(1), '---'))
+        updated_dist = True
+    rx_match = re.search(r'RX de ESP (\d+): estado=(\d+), request=(\d+), dist=(\d+)', line)
+    if rx_match:
+        state_map = {'0': 'ALL RED', '1': 'VERDE', '2': 'AMARILLO', '3': 'ROJO'}
+        result = ('rx', state_map.get(rx_match.group(2), '---'))
+        updated_dist = True
+    dist_match = re.search(r'dist[ancia]*[=:]\s*(\d+)', line, re.IGNORECASE)
+    if dist_match and not updated_dist:
+        result = ('dist', int(dist_match.group(1)))
+    if "SIN SYNC" in line or "Sin comunicación" in line:
+        result = 'sync'
+    elif "Peer añadido correctamente" in line:
+        result = 'peer'
+    elif "ESP-NOW inicializado OK" in line:
+        result = 'init'
+    elif "Error TX ESP-NOW" in line or "Callback: Error" in line or "status=1" in line:
+        result = 'txerr'
+    elif "Peer MAC:" in line:
+        mac_match = re.search(r'([0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2}:[0-9A-F]{2})', line)
+        if mac_match:
+            result = mac_match.group(1)
+    return result
+
+
+def construir_corpus(n, log_path=None):
+    if log_path:
+        patron = re.compile(r'^\[[\d:.]+\] \[\w+\] ')
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            base = [patron.sub('', l.strip()) for l in f if l.strip()]
+    else:
+        base = [linea for linea, peso in zip(MUESTRA, PESOS) for _ in range(peso)]
+        base += MUESTRA
+    return (base * (n // len(base) + 1))[:n]
+
+
+def medir(nombre, funcion, corpus):
+    inicio = time.perf_counter()
+    for linea in corpus:
+        funcion(linea)
+    duracion = time.perf_counter() - inicio
+    tasa = len(corpus) / duracion
+    print(f"{nombre:<22} {tasa:>12,.0f} líneas/s  ({duracion * 1e9 / len(corpus):,.0f} ns/línea)")
+    return tasa
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--log', help="log capturado en formato [HH:MM:SS.mmm] [A] ...")
+    args = parser.parse_args()
+
+    corpus = construir_corpus(args.lines, args.log)
+    antes = medir("cascada original", legacy_parse, corpus)
+    despues = medir("monitor_parser", parse_line, corpus)
+    print(f"Aceleración: {despues / antes:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
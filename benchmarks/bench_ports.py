@@ -0,0 +1,89 @@
+"""
+Benchmark de la lista de puertos: escaneo con comports() vs. inventario de PortWatcher.
+
+Mide:
+  - comports():      lo que hacía refresh_ports() en el thread de la interfaz
+  - ports():         lectura del inventario en memoria (lo que hace ahora)
+  - aviso inotify:   desde crear/borrar un nodo hasta on_change, con --devices
+                     archivos ttyUSB* en una carpeta temporal vigilada (solo Linux)
+
+Uso:
+    python benchmarks/bench_ports.py [--repeat 200] [--devices 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serial.tools import list_ports  # noqa: E402
+
+from monitor_ports import PortWatcher, WATCH_INOTIFY  # noqa: E402
+
+
+def medir(funcion, repeat):
+    """Mediana en µs de `repeat` llamadas"""
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter_ns()
+        funcion()
+        tiempos.append((time.perf_counter_ns() - inicio) / 1000)
+    return statistics.median(tiempos)
+
+
+def latencia_avisos(devices):
+    """Latencias (µs) de alta y baja de `devices` nodos en una carpeta vigilada"""
+    carpeta = tempfile.mkdtemp()
+    aviso = threading.Event()
+    watcher = PortWatcher(on_change=lambda added, removed: aviso.set(), dev_dir=carpeta)
+    watcher.start()
+    if watcher.backend != WATCH_INOTIFY:
+        watcher.stop()
+        return None
+    aviso.wait(2.0)  # Escaneo inicial
+    altas, bajas = [], []
+    for i in range(devices):
+        ruta = os.path.join(carpeta, f"ttyUSB{i}")
+        for accion, tiempos in ((lambda: open(ruta, 'w').close(), altas), (lambda: os.unlink(ruta), bajas)):
+            aviso.clear()
+            inicio = time.perf_counter_ns()
+            accion()
+            aviso.wait(1.0)
+            tiempos.append((time.perf_counter_ns() - inicio) / 1000)
+    watcher.stop()
+    os.rmdir(carpeta)
+    return statistics.median(altas), statistics.median(bajas), watcher.scans, watcher.lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--devices", type=int, default=20)
+    args = parser.parse_args()
+
+    watcher = PortWatcher()
+    watcher.start()
+    time.sleep(0.2)
+    puertos = len(watcher.ports())
+    print(f"{puertos} puertos presentes, backend {watcher.backend}")
+    print(f"comports()            {medir(list_ports.comports, args.repeat):10.1f} µs")
+    print(f"PortWatcher.ports()   {medir(watcher.ports, args.repeat):10.1f} µs")
+    watcher.stop()
+
+    resultado = latencia_avisos(args.devices)
+    if resultado is None:
+        print("aviso inotify         no disponible (se usa sondeo de comports())")
+        return
+    alta, baja, scans, lookups = resultado
+    print(f"aviso de alta         {alta:10.1f} µs")
+    print(f"aviso de baja         {baja:10.1f} µs")
+    print(f"escaneos completos {scans}, consultas de un dispositivo {lookups}")
+
+
+if __name__ == '__main__':
+    main()
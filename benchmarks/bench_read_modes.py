@@ -0,0 +1,103 @@
+"""
+Benchmark de los modos de lectura de SerialReader ("blocking" vs. "poll").
+
+Crea pseudo-terminales (Linux) y conecta un SerialReader real a cada una.
+Mide:
+  - CPU consumida con los puertos inactivos.
+  - Latencia desde que el emisor escribe la línea hasta que el slot del
+    thread principal la recibe (el emisor incluye su time.monotonic_ns).
+
+Uso:
+    python benchmarks/bench_read_modes.py [--ports 4] [--rate 50] [--seconds 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from monitor_semaforos import SerialReader  # noqa: E402
+
+
+def esperar(app, segundos):
+    QTimer.singleShot(int(segundos * 1000), app.quit)
+    app.exec()
+
+
+def correr(app, modo, puertos, rate, segundos):
+    ptys = [os.openpty() for _ in range(puertos)]
+    latencias = []
+
+    def on_lines_parsed(port_id, items):
+        ahora = time.monotonic_ns()
+        for item in items:
+            if item.text.startswith("TX:") and " t=" in item.text:
+                latencias.append(ahora - int(item.text.rsplit("t=", 1)[1]))
+
+    readers = []
+    for i, (_, slave) in enumerate(ptys):
+        reader = SerialReader(os.ttyname(slave), 115200, str(i), read_mode=modo)
+        reader.lines_parsed.connect(on_lines_parsed)
+        reader.start()
+        readers.append(reader)
+    esperar(app, 0.5)
+
+    # CPU con los puertos inactivos
+    cpu0 = time.process_time()
+    esperar(app, segundos)
+    cpu_idle = (time.process_time() - cpu0) / segundos * 100
+
+    # Latencia con tráfico
+    activo = threading.Event()
+    activo.set()
+
+    def emisor():
+        periodo = 1.0 / rate
+        while activo.is_set():
+            for master, _ in ptys:
+                linea = f"TX: estado=1, request=0, dist=45 t={time.monotonic_ns()}\n"
+                os.write(master, linea.encode())
+            time.sleep(periodo)
+
+    hilo = threading.Thread(target=emisor, daemon=True)
+    hilo.start()
+    esperar(app, segundos)
+    activo.clear()
+    hilo.join()
+
+    for reader in readers:
+        reader.stop()
+        reader.wait()
+    for master, slave in ptys:
+        os.close(master)
+        os.close(slave)
+    return cpu_idle, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ports', type=int, default=4)
+    parser.add_argument('--rate', type=int, default=50, help="líneas/s por puerto")
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    print(f"{args.ports} puertos, {args.rate} líneas/s por puerto")
+    print(f"{'modo':<10} {'CPU inactivo':>13} {'lat. media':>11} {'lat. p99':>10}")
+    for modo in ("poll", "blocking"):
+        cpu_idle, latencias = correr(app, modo, args.ports, args.rate, args.seconds)
+        latencias.sort()
+        media = statistics.mean(latencias) / 1e6 if latencias else float('nan')
+        p99 = latencias[int(len(latencias) * 0.99) - 1] / 1e6 if latencias else float('nan')
+        print(f"{modo:<10} {cpu_idle:>12.2f}% {media:>9.2f} ms {p99:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de emisión por lotes de SerialReader.
+
+Conecta SerialReader a un FakeSerial que bombea líneas a una tasa
+configurable y mide, para cada modo de agrupación (una señal por línea, por
+bloque leído y por ventana de tiempo), cuántas señales cruzan al thread
+principal, el tiempo de CPU gastado en el slot y el caudal total.
+
+Uso:
+    python benchmarks/bench_serial_batch.py [--rate 5000] [--lines 50000]
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from fake_serial import FakeSerial  # noqa: E402
+from monitor_log import LogBuffer  # noqa: E402
+from monitor_semaforos import SerialReader  # noqa: E402
+from monitor_state import NodeState  # noqa: E402
+
+
+MODOS = [
+    ("por línea", None),
+    ("por bloque", 0),
+    ("ventana 20 ms", 20),
+]
+
+
+def correr(app, rate, total, batch_interval_ms):
+    state = NodeState("A")
+    logs = LogBuffer()
+    stats = {'signals': 0, 'lines': 0, 'slot_s': 0.0}
+
+    def on_lines_parsed(port_id, items):
+        # Mismo trabajo que MainWindow.on_lines_parsed, sin widgets
+        t0 = time.perf_counter()
+        for item in items:
+            logs.append(port_id, f"[{item.stamp}] [{port_id}] {item.text}")
+            if item.event is not None:
+                state.apply(item.event)
+        stats['slot_s'] += time.perf_counter() - t0
+        stats['signals'] += 1
+        stats['lines'] += len(items)
+        if stats['lines'] > total:
+            app.quit()
+
+    factory = functools.partial(FakeSerial, rate=rate, total=total)
+    reader = SerialReader("fake", 115200, "A", batch_interval_ms=batch_interval_ms,
+                          serial_factory=factory)
+    reader.lines_parsed.connect(on_lines_parsed)
+    inicio = time.perf_counter()
+    reader.start()
+    QTimer.singleShot(120000, app.quit)  # Límite de seguridad
+    app.exec()
+    duracion = time.perf_counter() - inicio
+    reader.stop()
+    reader.wait()
+    return stats, duracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rate', type=int, default=5000, help="líneas/s (0 = sin límite)")
+    parser.add_argument('--lines', type=int, default=50000)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    print(f"{args.lines} líneas a {args.rate or 'máx'} líneas/s")
+    print(f"{'modo':<15} {'señales':>9} {'líneas/señal':>13} {'slot (ms)':>10} {'líneas/s':>12}")
+    for nombre, intervalo in MODOS:
+        stats, duracion = correr(app, args.rate, args.lines, intervalo)
+        print(f"{nombre:<15} {stats['signals']:>9} {stats['lines'] / max(stats['signals'], 1):>13.1f} "
+              f"{stats['slot_s'] * 1000:>10.1f} {stats['lines'] / duracion:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark del arranque en frío: modo sin interfaz vs. interfaz PyQt6.
+
+Lanza intérpretes nuevos con `python -X importtime` y mide, para cada modo,
+el tiempo total del proceso (mediana de --runs) y el tiempo de importación
+informado por importtime, con los paquetes que más pesan:
+  - headless:  lo que importa `monitor_semaforos.py --headless`
+  - gui:       lo que importa `monitor_semaforos.py` al abrir la interfaz
+  - ventana:   gui + QApplication y MainWindow (plataforma "offscreen")
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 7] [--top 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = (
+    ('headless', "import monitor_semaforos, monitor_headless"),
+    ('gui', "import monitor_semaforos, monitor_gui"),
+    ('ventana', "import monitor_semaforos, monitor_gui\n"
+                "from PyQt6.QtWidgets import QApplication\n"
+                "app = QApplication([])\n"
+                "window = monitor_gui.MainWindow()"),
+)
+
+
+def correr(codigo):
+    """(segundos del proceso, {módulo de primer nivel: µs acumulados}, ¿cargó PyQt6?)"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    codigo += "\nimport sys; print('PyQt6' in sys.modules)"
+    inicio = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                            cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    duracion = time.perf_counter() - inicio
+    modulos = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # Solo los de primer nivel (sin sangría extra)
+            modulos[name.strip()] = int(cumulative)
+    return duracion, modulos, result.stdout.strip().endswith('True')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--top', type=int, default=5, help="paquetes más pesados a mostrar")
+    args = parser.parse_args()
+
+    print(f"{'modo':<10} {'proceso':>9} {'imports':>9} {'PyQt6':>6}  más pesados")
+    for nombre, codigo in MODOS:
+        duraciones = []
+        importaciones = []
+        for _ in range(args.runs):
+            duracion, modulos, qt = correr(codigo)
+            duraciones.append(duracion)
+            importaciones.append(sum(modulos.values()))
+        pesados = sorted(modulos.items(), key=lambda item: -item[1])[:args.top]
+        detalle = ", ".join(f"{name} {us / 1000:.0f}" for name, us in pesados)
+        print(f"{nombre:<10} {statistics.median(duraciones) * 1000:>7.0f}ms "
+              f"{statistics.median(importaciones) / 1000:>7.0f}ms {'sí' if qt else 'no':>6}  {detalle} (ms)")
+
+
+if __name__ == '__main__':
+    main()
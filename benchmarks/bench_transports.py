@@ -0,0 +1,123 @@
+"""
+Benchmark de transportes seriales: un thread por puerto vs. un event loop.
+
+Crea pseudo-terminales (Linux) y compara, para 2, 8 y 32 puertos:
+  - threads-poll:     SerialReader con read_mode="poll" (sondeo cada 10 ms)
+  - threads-blocking: SerialReader con read_mode="blocking" (por defecto)
+  - asyncio:          un solo AsyncSerialHub para todos los puertos
+Mide la CPU del proceso con los puertos inactivos y con tráfico, y la latencia
+desde que el emisor escribe la línea hasta que el slot del thread principal la
+recibe. El emisor corre en un proceso aparte para no sumar su CPU.
+
+Uso:
+    python benchmarks/bench_transports.py [--ports 2 8 32] [--rate 50] [--seconds 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication, QTimer  # noqa: E402
+
+from monitor_semaforos import SerialReader, AsyncSerialHub  # noqa: E402
+
+
+MODOS = ("threads-poll", "threads-blocking", "asyncio")
+
+
+def esperar(app, segundos):
+    QTimer.singleShot(int(segundos * 1000), app.quit)
+    app.exec()
+
+
+def emisor(masters, rate, segundos):
+    """Proceso hijo: escribe en cada pty una línea TX con su time.monotonic_ns"""
+    periodo = 1.0 / rate
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        for master in masters:
+            linea = f"TX: estado=1, request=0, dist=45 t={time.monotonic_ns()}\n"
+            os.write(master, linea.encode())
+        time.sleep(periodo)
+    os._exit(0)
+
+
+def correr(app, modo, puertos, rate, segundos):
+    ptys = [os.openpty() for _ in range(puertos)]
+    latencias = []
+
+    def on_lines_parsed(port_id, items):
+        ahora = time.monotonic_ns()
+        for item in items:
+            if item.text.startswith("TX:") and " t=" in item.text:
+                latencias.append(ahora - int(item.text.rsplit("t=", 1)[1]))
+
+    lectores = []
+    if modo == "asyncio":
+        hub = AsyncSerialHub()
+        hub.lines_parsed.connect(on_lines_parsed)
+        hub.start()
+        for i, (_, slave) in enumerate(ptys):
+            hub.add_port(str(i), os.ttyname(slave))
+        lectores.append(hub)
+    else:
+        for i, (_, slave) in enumerate(ptys):
+            reader = SerialReader(os.ttyname(slave), 115200, str(i), read_mode=modo.split("-")[1])
+            reader.lines_parsed.connect(on_lines_parsed)
+            reader.start()
+            lectores.append(reader)
+    esperar(app, 0.5)
+
+    # CPU con los puertos inactivos
+    cpu0 = time.process_time()
+    esperar(app, segundos)
+    cpu_idle = (time.process_time() - cpu0) / segundos * 100
+
+    # CPU y latencia con tráfico (el emisor es otro proceso)
+    pid = os.fork()
+    if pid == 0:
+        emisor([master for master, _ in ptys], rate, segundos)
+    cpu = [time.process_time()]
+    QTimer.singleShot(int(segundos * 1000), lambda: cpu.append(time.process_time()))
+    # Seguir atendiendo señales un momento: las últimas líneas también cuentan
+    esperar(app, segundos + 0.3)
+    cpu_carga = (cpu[1] - cpu[0]) / segundos * 100
+    os.waitpid(pid, 0)
+
+    for lector in lectores:
+        lector.stop()
+        lector.wait()
+    for master, slave in ptys:
+        os.close(master)
+        os.close(slave)
+    return cpu_idle, cpu_carga, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ports', type=int, nargs='+', default=[2, 8, 32])
+    parser.add_argument('--rate', type=int, default=50, help="líneas/s por puerto")
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    print(f"{args.rate} líneas/s por puerto, {args.seconds:g} s por medición")
+    print(f"{'puertos':>7} {'modo':<17} {'CPU inactivo':>13} {'CPU carga':>10} "
+          f"{'lat. media':>11} {'lat. p99':>10}")
+    for puertos in args.ports:
+        for modo in MODOS:
+            cpu_idle, cpu_carga, latencias = correr(app, modo, puertos, args.rate, args.seconds)
+            latencias.sort()
+            media = statistics.mean(latencias) / 1e6 if latencias else float('nan')
+            p99 = latencias[int(len(latencias) * 0.99) - 1] / 1e6 if latencias else float('nan')
+            print(f"{puertos:>7} {modo:<17} {cpu_idle:>12.2f}% {cpu_carga:>9.2f}% "
+                  f"{media:>9.2f} ms {p99:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
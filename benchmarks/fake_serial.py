@@ -0,0 +1,66 @@
+"""
+Puerto serial simulado para benchmarks.
+
+FakeSerial imita la parte de la API de pyserial que usa SerialReader
+(in_waiting, read, reset_*_buffer, close, is_open) y genera líneas de una
+muestra a una tasa configurable, como si llegaran desde un ESP32.
+"""
+
+import itertools
+import time
+
+from bench_parser import MUESTRA
+
+
+class FakeSerial:
+    """Puerto que entrega `total` líneas a `rate` líneas/s (0 = sin límite)"""
+    def __init__(self, port=None, baudrate=115200, timeout=None, write_timeout=None,
+                 rate=1000, total=10000, lines=MUESTRA, chunk_limit=4096):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.rate = rate
+        self.total = total
+        self.chunk_limit = chunk_limit  # Tamaño del buffer del driver
+        self.is_open = True
+        self.produced = 0
+        self._source = itertools.cycle([(line + "\n").encode('utf-8') for line in lines])
+        self._buffer = bytearray()
+        self._t0 = time.monotonic()
+
+    def _pump(self):
+        if self.rate:
+            due = min(self.total, int((time.monotonic() - self._t0) * self.rate))
+        else:
+            due = self.total
+        while self.produced < due and len(self._buffer) < self.chunk_limit:
+            self._buffer += next(self._source)
+            self.produced += 1
+
+    @property
+    def in_waiting(self):
+        self._pump()
+        return len(self._buffer)
+
+    def read(self, size=1):
+        self._pump()
+        if not self._buffer and self.timeout:
+            # Bloqueo corto como el de pyserial cuando no hay datos
+            time.sleep(min(self.timeout, 0.001))
+            self._pump()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+    @property
+    def done(self):
+        return self.produced >= self.total and not self._buffer
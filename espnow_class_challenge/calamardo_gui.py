@@ -3,9 +3,10 @@ from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QSpinBox, QMessageBox
 )
 from PyQt6.QtGui import QFont, QPalette, QColor
-from PyQt6.QtCore import Qt
-import serial
-import serial.tools.list_ports
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from puertos import VigiaPuertos, describir_puerto
+from cola_comandos import ColaComandos, CONFIRMADO
 
 PRODUCTOS = [
     ("Hamburguesas", "HBRGR", 50),
@@ -17,12 +18,21 @@ PRODUCTOS = [
 ]
 
 class CalamardoGUI(QWidget):
+    # Altas/bajas de puertos desde el thread de VigiaPuertos
+    ports_changed = pyqtSignal(list, list)
+    # Resultado de cada comando desde los threads de ColaComandos
+    resultado_comando = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
+        self.port_watcher = VigiaPuertos(on_change=self.ports_changed.emit)
+        self.ports_changed.connect(self.on_ports_changed)
         self.setWindowTitle("Calamardo - Envío de Insumos (ESP-NOW)")
         self.setFixedSize(420, 260)
         self.init_ui()
-        self.serial_port = None
+        self.cola = ColaComandos(on_result=self.resultado_comando.emit)
+        self.resultado_comando.connect(self.on_resultado_comando)
+        self.port_watcher.start()
 
     def init_ui(self):
         # Dark mode palette
@@ -49,7 +59,7 @@ class CalamardoGUI(QWidget):
         self.refresh_ports()
         refresh_btn = QPushButton("⟳")
         refresh_btn.setFixedWidth(32)
-        refresh_btn.clicked.connect(self.refresh_ports)
+        refresh_btn.clicked.connect(self.port_watcher.reescanear)
         port_layout.addWidget(port_label)
         port_layout.addWidget(self.port_combo)
         port_layout.addWidget(refresh_btn)
@@ -89,10 +99,21 @@ class CalamardoGUI(QWidget):
         self.prod_combo.currentIndexChanged.connect(self.update_cantidad)
 
     def refresh_ports(self):
+        # Lista desde la de VigiaPuertos (sin escanear en la interfaz)
+        current = self.port_combo.currentText()
         self.port_combo.clear()
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            self.port_combo.addItem(port.device)
+        for info in self.port_watcher.puertos():
+            self.port_combo.addItem(info.device)
+            self.port_combo.setItemData(self.port_combo.count() - 1, describir_puerto(info),
+                                        Qt.ItemDataRole.ToolTipRole)
+        index = self.port_combo.findText(current)
+        if index >= 0:
+            self.port_combo.setCurrentIndex(index)
+
+    def on_ports_changed(self, added, removed):
+        if any(info.device == self.cola.port for info in removed):
+            self.cola.conexion.cerrar()
+        self.refresh_ports()
 
     def update_cantidad(self):
         _, cantidad = self.prod_combo.currentData()
@@ -105,13 +126,21 @@ class CalamardoGUI(QWidget):
             return
         codigo, _ = self.prod_combo.currentData()
         cantidad = self.cant_spin.value()
-        comando = f"{codigo}{cantidad}\n"
-        try:
-            with serial.Serial(port_name, 115200, timeout=1) as ser:
-                ser.write(comando.encode())
-            self.status_label.setText(f"✅ Enviado: {codigo} {cantidad}")
-        except Exception as e:
-            self.status_label.setText(f"❌ Error: {e}")
+        # El puerto queda abierto: el envío sale del thread de ConexionSerial
+        self.cola.pedir(port_name, codigo, cantidad)
+        self.status_label.setText(f"⏳ Enviando: {codigo} {cantidad}")
+
+    def on_resultado_comando(self, comando):
+        if comando.estado == CONFIRMADO:
+            self.status_label.setText(f"✅ Enviado: {comando.codigo} {comando.cantidad} "
+                                      f"(confirmado en {comando.rtt_s * 1000:.1f} ms)")
+        else:
+            self.status_label.setText(f"❌ Error: {comando.error}")
+
+    def closeEvent(self, event):
+        self.port_watcher.stop()
+        self.cola.stop()
+        event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -2,12 +2,13 @@ import sys
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QSpinBox, QTextEdit, QMessageBox, QFrame
 )
-from PyQt6.QtGui import QFont, QPalette, QColor, QPixmap
-from PyQt6.QtCore import Qt
-import serial
-import serial.tools.list_ports
+from PyQt6.QtGui import QFont, QPalette, QColor, QPixmap, QTextCursor
+from PyQt6.QtCore import Qt, pyqtSignal
 import datetime
 
+from puertos import VigiaPuertos, describir_puerto
+from cola_comandos import ColaComandos, CONFIRMADO, ACK_RE
+
 PRODUCTOS = [
     ("Hamburguesas", "HBRGR", 50),
     ("Pan de alga", "SWBRD", 50),
@@ -20,12 +21,25 @@ PRODUCTOS = [
 SPONGE_COLORS = [QColor(255, 255, 102), QColor(255, 230, 128), QColor(255, 255, 153)]
 
 class CalamardoGUI(QWidget):
+    # Altas/bajas de puertos desde el thread de VigiaPuertos
+    ports_changed = pyqtSignal(list, list)
+    # Resultado de cada comando y líneas del maestro desde los threads de ColaComandos
+    resultado_comando = pyqtSignal(object)
+    linea_recibida = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
+        self.port_watcher = VigiaPuertos(on_change=self.ports_changed.emit)
+        self._ports_listed = False
+        self.ports_changed.connect(self.on_ports_changed)
         self.setWindowTitle("Calamardo - Envío de Insumos (ESP-NOW)")
-        self.setFixedSize(500, 420)
+        self.setFixedSize(500, 470)
         self.init_ui()
-        self.serial_port = None
+        self.cola = ColaComandos(on_result=self.resultado_comando.emit, on_line=self.linea_recibida.emit)
+        self.resultado_comando.connect(self.on_resultado_comando)
+        self.linea_recibida.connect(self.on_linea_recibida)
+        self._pedido_en_curso = False
+        self.port_watcher.start()
 
     def set_spongebob_palette(self):
         palette = QPalette()
@@ -67,7 +81,7 @@ class CalamardoGUI(QWidget):
         self.refresh_ports()
         refresh_btn = QPushButton("⟳")
         refresh_btn.setFixedWidth(32)
-        refresh_btn.clicked.connect(self.refresh_ports)
+        refresh_btn.clicked.connect(self.port_watcher.reescanear)
         port_layout.addWidget(port_label)
         port_layout.addWidget(self.port_combo)
         port_layout.addWidget(refresh_btn)
@@ -99,6 +113,12 @@ class CalamardoGUI(QWidget):
         self.send_btn.clicked.connect(self.enviar_comando)
         layout.addWidget(self.send_btn)
 
+        # Pedido completo: todos los productos en tubería
+        self.pedido_btn = QPushButton("Enviar pedido completo 📦")
+        self.pedido_btn.setStyleSheet("background-color: #4fc3f7; color: #2d2d2d; font-weight: bold; border-radius: 8px; padding: 8px 0;")
+        self.pedido_btn.clicked.connect(self.enviar_pedido)
+        layout.addWidget(self.pedido_btn)
+
         # Línea separadora
         sep = QFrame()
         sep.setFrameShape(QFrame.Shape.HLine)
@@ -130,10 +150,27 @@ class CalamardoGUI(QWidget):
         return img
 
     def refresh_ports(self):
+        # Lista desde la de VigiaPuertos (sin escanear en la interfaz)
+        current = self.port_combo.currentText()
         self.port_combo.clear()
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            self.port_combo.addItem(port.device)
+        for info in self.port_watcher.puertos():
+            self.port_combo.addItem(info.device)
+            self.port_combo.setItemData(self.port_combo.count() - 1, describir_puerto(info),
+                                        Qt.ItemDataRole.ToolTipRole)
+        index = self.port_combo.findText(current)
+        if index >= 0:
+            self.port_combo.setCurrentIndex(index)
+
+    def on_ports_changed(self, added, removed):
+        if self._ports_listed:  # El primer aviso es el escaneo inicial
+            for info in added:
+                self.log(f"🔌 [{self.now()}] Conectado: {describir_puerto(info)}")
+            for info in removed:
+                self.log(f"🔌 [{self.now()}] Desconectado: {info.device}")
+        if any(info.device == self.cola.port for info in removed):
+            self.cola.conexion.cerrar()
+        self._ports_listed = True
+        self.refresh_ports()
 
     def update_cantidad(self):
         _, cantidad = self.prod_combo.currentData()
@@ -146,21 +183,46 @@ class CalamardoGUI(QWidget):
             return
         codigo, _ = self.prod_combo.currentData()
         cantidad = self.cant_spin.value()
-        comando = f"{codigo}{cantidad}\n"
-        try:
-            with serial.Serial(port_name, 115200, timeout=1) as ser:
-                ser.write(comando.encode())
-            self.log(f"✅ [{self.now()}] Enviado: {codigo} {cantidad}")
-        except Exception as e:
-            self.log(f"❌ [{self.now()}] Error: {e}")
+        # El puerto queda abierto: el envío sale del thread de ConexionSerial
+        self.cola.pedir(port_name, codigo, cantidad)
+
+    def enviar_pedido(self):
+        port_name = self.port_combo.currentText()
+        if not port_name:
+            QMessageBox.warning(self, "Error", "Selecciona un puerto serial.")
+            return
+        self.log(f"📦 [{self.now()}] Pedido completo: {len(PRODUCTOS)} productos")
+        self._pedido_en_curso = True
+        self.cola.pedir_pedido(port_name, [(codigo, cantidad) for _, codigo, cantidad in PRODUCTOS])
+
+    def on_resultado_comando(self, comando):
+        reintentos = f", {comando.intentos} intentos" if comando.intentos > 1 else ""
+        if comando.estado == CONFIRMADO:
+            self.log(f"✅ [{self.now()}] Enviado: {comando.codigo} {comando.cantidad} "
+                     f"(confirmado en {comando.rtt_s * 1000:.1f} ms{reintentos})")
+        else:
+            self.log(f"❌ [{self.now()}] {comando.codigo} {comando.cantidad}: {comando.error}{reintentos}")
+        if self._pedido_en_curso and self.cola.pendientes == 0:
+            self._pedido_en_curso = False
+            self.log(f"📊 {self.cola.resumen()}")
+
+    def on_linea_recibida(self, linea):
+        # Las confirmaciones ya aparecen en el resultado de cada comando
+        if linea and not ACK_RE.search(linea):
+            self.log(f"⬅ [{self.now()}] {linea}")
 
     def log(self, msg):
         self.logs.append(msg)
-        self.logs.moveCursor(self.logs.textCursor().End)
+        self.logs.moveCursor(QTextCursor.MoveOperation.End)
 
     def now(self):
         return datetime.datetime.now().strftime("%H:%M:%S")
 
+    def closeEvent(self, event):
+        self.port_watcher.stop()
+        self.cola.stop()
+        event.accept()
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = CalamardoGUI()
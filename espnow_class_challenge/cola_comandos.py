@@ -0,0 +1,330 @@
+"""
+Cola de comandos con confirmación para el maestro Calamardo.
+
+ColaComandos envía los comandos (HBRGR50\\n) sobre una ConexionSerial sin
+esperar la respuesta de cada uno: mantiene hasta `ventana` comandos en vuelo y
+manda el siguiente en cuanto se libera un lugar. calamardo_master_s3.ino
+responde cada línea en orden:
+  - "Enviado: HBRGR 50"           -> confirmación (esp_now_send devolvió ESP_OK)
+  - "Error enviando por ESP-NOW"  -> se reintenta (hasta `reintentos` veces)
+  - "Formato inválido" / "Cantidad inválida" -> falla sin reintento (se validan
+    antes de enviar con las mismas reglas, así que no deberían llegar)
+Un comando cuenta como escrito desde que se entrega al escritor: el maestro
+puede responder antes de que termine el flush(). Como responde en orden, la
+confirmación se asigna al comando en vuelo más antiguo con ese código y
+cantidad, y los errores (que no dicen de qué comando son) al más antiguo.
+
+Reenviar un comando puede duplicar el envío (un reabastecimiento repetido): si
+se perdió o llegó corrupta la línea "Enviado", el maestro igual lo mandó. Por
+eso solo el error de ESP-NOW se reintenta varias veces. Si se confirma un
+comando posterior, los anteriores fallan sin reenviarse ("sin confirmación").
+Sin ninguna respuesta en `timeout_s` se reenvía una sola vez
+(REINTENTOS_TIMEOUT); ese reenvío también puede duplicar el comando si solo se
+perdió la respuesta.
+
+Por producto se lleva la cuenta de enviados, confirmados, fallidos, reintentos
+y el tiempo de ida y vuelta (escritura -> confirmación). resumen() agrega el
+rendimiento (confirmaciones/s) de la última tanda: desde que se encoló con la
+cola vacía hasta el último resultado.
+
+Uso:
+    cola = ColaComandos(on_result=print)
+    cola.pedir_pedido("/dev/ttyACM0", [("HBRGR", 50), ("SWBRD", 50)])
+    ...
+    print(cola.resumen())
+    cola.stop()
+"""
+
+import re
+import threading
+import time
+from collections import deque
+
+from conexion_serial import ConexionSerial
+from latencia import Latencia
+
+
+VENTANA = 4        # Comandos en vuelo (el buffer serial del ESP32 recibe 256 bytes)
+TIMEOUT_S = 1.0    # Espera de la respuesta desde que se escribió el comando
+REINTENTOS = 2     # Reenvíos tras "Error enviando por ESP-NOW" (el maestro no lo envió)
+REINTENTOS_TIMEOUT = 1  # Reenvíos sin respuesta (pueden duplicar el comando)
+
+# Estados de un comando
+ESPERANDO = "esperando"      # En la cola, sin lugar en la ventana
+EN_VUELO = "en vuelo"
+CONFIRMADO = "confirmado"
+FALLIDO = "fallido"
+
+ACK_RE = re.compile(r'Enviado:\s*(\S+)\s+(\d+)')
+NACK_REINTENTAR = ("Error enviando por ESP-NOW",)
+NACK_FINAL = ("Formato inválido", "Cantidad inválida")
+
+
+def validar(codigo, cantidad):
+    """Error que daría calamardo_master_s3.ino para el comando (None si lo acepta)"""
+    if len(codigo) != 5:
+        return "Formato inválido"  # El maestro toma los 5 primeros caracteres como código
+    if not 0 < cantidad <= 255:
+        return "Cantidad inválida"
+    return None
+
+
+class Comando:
+    """Un comando de la cola y su resultado"""
+    __slots__ = ('id', 'port', 'codigo', 'cantidad', 'estado', 'intentos', 'error',
+                 'rtt_s', 't_pedido_ns', 't_escrito_ns', 'deadline_ns', 'envio', 'timeouts')
+
+    def __init__(self, command_id, port, codigo, cantidad):
+        self.id = command_id
+        self.port = port
+        self.codigo = codigo
+        self.cantidad = cantidad
+        self.estado = ESPERANDO
+        self.intentos = 0
+        self.error = None
+        self.rtt_s = None            # Escritura -> confirmación
+        self.t_pedido_ns = time.monotonic_ns()
+        self.t_escrito_ns = None     # Entrega al escritor (o fin del write, si fue antes de la respuesta)
+        self.deadline_ns = None
+        self.envio = None            # id de ConexionSerial del intento actual
+        self.timeouts = 0
+
+    @property
+    def texto(self):
+        return f"{self.codigo}{self.cantidad}\n"
+
+
+class EstadisticaProducto:
+    """Contadores y tiempo de ida y vuelta de un código de producto"""
+    def __init__(self):
+        self.enviados = 0
+        self.confirmados = 0
+        self.fallidos = 0
+        self.reintentos = 0
+        self.rtt = Latencia()
+
+
+class ColaComandos:
+    """Comandos en tubería sobre una conexión abierta, con confirmación y reintentos"""
+    def __init__(self, conexion=None, ventana=VENTANA, timeout_s=TIMEOUT_S, reintentos=REINTENTOS,
+                 reintentos_timeout=REINTENTOS_TIMEOUT, on_result=None, on_line=None, on_status=None):
+        self.ventana = ventana
+        self.timeout_ns = int(timeout_s * 1e9)
+        self.reintentos = reintentos
+        self.reintentos_timeout = reintentos_timeout
+        self.on_result = on_result    # on_result(Comando) al confirmarse o fallar
+        self.on_line = on_line        # on_line(línea) para todas las líneas del maestro
+        self.conexion = conexion or ConexionSerial(on_status=on_status)
+        self.conexion.on_sent = self._on_sent
+        self.conexion.on_line = self._on_line
+        self.stats = {}               # codigo -> EstadisticaProducto
+        self.t_inicio_ns = None       # Tanda actual: primer pedido, último resultado
+        self.t_ultimo_ns = None
+        self.confirmados_tanda = 0
+        self._ids = 0
+        self._esperando = deque()
+        self._en_vuelo = []           # En orden de envío
+        self._por_envio = {}          # id de ConexionSerial -> Comando
+        self._lock = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._vigilar, name="ColaComandos", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.conexion.port
+
+    def pedir(self, port, codigo, cantidad):
+        """Encolar un comando (no bloquea); devuelve su Comando"""
+        return self.pedir_pedido(port, [(codigo, cantidad)])[0]
+
+    def pedir_pedido(self, port, productos):
+        """Encolar [(codigo, cantidad), ...] en orden; devuelve sus Comando"""
+        invalidos = []
+        with self._lock:
+            comandos = []
+            for codigo, cantidad in productos:
+                self._ids += 1
+                comando = Comando(self._ids, port, codigo, cantidad)
+                stats = self.stats.setdefault(codigo, EstadisticaProducto())
+                comandos.append(comando)
+                # Lo que el maestro rechazaría no se envía: sus errores no dicen de qué comando son
+                error = validar(codigo, cantidad)
+                if error is not None:
+                    comando.estado = FALLIDO
+                    comando.error = error
+                    stats.fallidos += 1
+                    invalidos.append(comando)
+            if not (self._esperando or self._en_vuelo):
+                # Empieza una tanda nueva (el rendimiento se mide por tanda)
+                self.t_inicio_ns = time.monotonic_ns()
+                self.t_ultimo_ns = None
+                self.confirmados_tanda = 0
+            self._esperando.extend(c for c in comandos if c.estado == ESPERANDO)
+            self._llenar_ventana()
+        self._resultados(invalidos)
+        return comandos
+
+    @property
+    def pendientes(self):
+        return len(self._esperando) + len(self._en_vuelo)
+
+    def cancelar(self):
+        """Descartar los comandos que esperan lugar (los en vuelo terminan solos)"""
+        with self._lock:
+            cancelados = list(self._esperando)
+            self._esperando.clear()
+            for comando in cancelados:
+                comando.estado = FALLIDO
+                comando.error = "cancelado"
+        self._resultados(cancelados)
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify()
+        self._thread.join(2.0)
+        self.conexion.stop()
+
+    # ---------- envío (con el lock tomado) ----------
+
+    def _llenar_ventana(self):
+        while self._esperando and len(self._en_vuelo) < self.ventana:
+            self._escribir(self._esperando.popleft())
+
+    def _escribir(self, comando):
+        comando.estado = EN_VUELO
+        comando.intentos += 1
+        # Escrito desde ya: la respuesta puede llegar antes de on_sent
+        comando.t_escrito_ns = time.monotonic_ns()
+        comando.deadline_ns = comando.t_escrito_ns + self.timeout_ns
+        if comando in self._en_vuelo:
+            self._en_vuelo.remove(comando)  # Un reenvío pasa al final: la lista sigue el orden de escritura
+        self._en_vuelo.append(comando)
+        stats = self.stats[comando.codigo]
+        stats.enviados += 1
+        if comando.intentos > 1:
+            stats.reintentos += 1
+        comando.envio = self.conexion.enviar(comando.port, comando.texto)
+        self._por_envio[comando.envio] = comando
+        self._lock.notify()
+
+    def _terminar(self, comando, estado, error=None):
+        """Sacar el comando de la ventana con su resultado y llenar el lugar"""
+        comando.estado = estado
+        comando.error = error
+        self._en_vuelo.remove(comando)
+        stats = self.stats[comando.codigo]
+        if estado == CONFIRMADO:
+            stats.confirmados += 1
+            self.confirmados_tanda += 1
+            stats.rtt.add(int(comando.rtt_s * 1e9))
+        else:
+            stats.fallidos += 1
+        self.t_ultimo_ns = time.monotonic_ns()
+        self._llenar_ventana()
+
+    def _fallar_o_reintentar(self, comando, error, terminados):
+        """Reenviar tras un error de ESP-NOW o de escritura (el comando no salió)"""
+        if comando.intentos <= self.reintentos:
+            self._escribir(comando)
+        else:
+            self._fallar(comando, error, terminados)
+
+    def _fallar(self, comando, error, terminados):
+        self._terminar(comando, FALLIDO, error)
+        terminados.append(comando)
+
+    # ---------- callbacks de ConexionSerial (sus threads) ----------
+
+    def _on_sent(self, envio_id, texto, latencia_s, error):
+        terminados = []
+        with self._lock:
+            comando = self._por_envio.pop(envio_id, None)
+            if comando is None or comando.estado != EN_VUELO or comando.envio != envio_id:
+                return  # Ya respondido, o es de un intento anterior
+            if error is not None:
+                self._fallar_o_reintentar(comando, str(error), terminados)
+            else:
+                # El plazo corre desde el fin de la escritura (abrir el puerto puede tardar)
+                comando.t_escrito_ns = time.monotonic_ns()
+                comando.deadline_ns = comando.t_escrito_ns + self.timeout_ns
+                self._lock.notify()
+        self._resultados(terminados)
+
+    def _on_line(self, linea):
+        if self.on_line is not None:
+            self.on_line(linea)
+        terminados = []
+        with self._lock:
+            escritos = list(self._en_vuelo)  # Todos, en orden de escritura
+            if not escritos:
+                return
+            ack = ACK_RE.search(linea)
+            if ack is not None:
+                codigo, cantidad = ack.group(1), int(ack.group(2))
+                for i, comando in enumerate(escritos):
+                    # El maestro imprime los 5 primeros caracteres del código
+                    if comando.codigo[:5] == codigo and comando.cantidad == cantidad:
+                        comando.rtt_s = (time.monotonic_ns() - comando.t_escrito_ns) / 1e9
+                        self._terminar(comando, CONFIRMADO)
+                        terminados.append(comando)
+                        # Respondió a uno posterior: los anteriores perdieron su respuesta,
+                        # pero el maestro pudo haberlos enviado; reenviarlos los duplicaría
+                        # (salvo que sea la respuesta tardía de un intento previo)
+                        if comando.intentos == 1:
+                            for anterior in escritos[:i]:
+                                self._fallar(anterior, "sin confirmación (pudo haberse enviado)",
+                                             terminados)
+                        break
+            elif linea.startswith(NACK_REINTENTAR):
+                self._fallar_o_reintentar(escritos[0], linea, terminados)
+            elif linea.startswith(NACK_FINAL):
+                self._fallar(escritos[0], linea, terminados)
+        self._resultados(terminados)
+
+    def _resultados(self, comandos):
+        if self.on_result is not None:
+            for comando in comandos:
+                self.on_result(comando)
+
+    # ---------- timeouts ----------
+
+    def _vigilar(self):
+        while True:
+            terminados = []
+            with self._lock:
+                if not self._running:
+                    return
+                now = time.monotonic_ns()
+                plazos = [c.deadline_ns for c in self._en_vuelo if c.deadline_ns is not None]
+                vencidos = [c for c in self._en_vuelo if c.deadline_ns is not None and c.deadline_ns <= now]
+                for comando in vencidos:
+                    error = f"sin respuesta en {self.timeout_ns / 1e6:.0f} ms"
+                    comando.timeouts += 1
+                    if comando.timeouts <= self.reintentos_timeout:
+                        self._escribir(comando)
+                    else:
+                        self._fallar(comando, error, terminados)
+                if not vencidos:
+                    espera = (min(plazos) - now) / 1e9 if plazos else None
+                    self._lock.wait(espera)
+            self._resultados(terminados)
+
+    # ---------- estadísticas ----------
+
+    def resumen(self):
+        """Rendimiento de la última tanda e ida y vuelta por producto (acumulado)"""
+        lineas = []
+        confirmados = self.confirmados_tanda
+        if self.t_inicio_ns is not None and self.t_ultimo_ns is not None:
+            segundos = (self.t_ultimo_ns - self.t_inicio_ns) / 1e9
+            rate = confirmados / segundos if segundos > 0 else 0.0
+            lineas.append(f"{confirmados} confirmados en {segundos * 1000:.0f} ms ({rate:.1f} comandos/s, "
+                          f"ventana {self.ventana})")
+        for codigo, stats in self.stats.items():
+            rtt = stats.rtt.summary_ms()
+            lineas.append(f"{codigo}: {stats.confirmados} confirmados, {stats.fallidos} fallidos, "
+                          f"{stats.reintentos} reintentos, ida y vuelta {rtt['mean_ms']:.1f} ms "
+                          f"(máx {rtt['max_ms']:.1f})")
+        return "\n".join(lineas)
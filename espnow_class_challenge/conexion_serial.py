@@ -0,0 +1,161 @@
+"""
+Conexión serial persistente para las interfaces de Calamardo.
+
+Antes cada envío abría y cerraba el puerto: al abrir, pyserial levanta DTR/RTS
+y eso reinicia muchas placas ESP32-S3 (cientos de ms por comando, con la
+interfaz bloqueada). ConexionSerial abre el puerto una sola vez con DTR/RTS en
+bajo y lo mantiene abierto; enviar() solo encola el comando y vuelve. Un thread
+escritor abre (o cambia de) puerto si hace falta, escribe y avisa por
+on_sent(id, texto, latencia_s, error) con la latencia desde enviar() hasta que
+los bytes quedaron escritos. Mientras el puerto está abierto, un thread lector
+entrega las líneas del maestro ("Enviado: HBRGR 50", errores) por on_line.
+
+Si el puerto falla se cierra y el próximo envío lo vuelve a abrir.
+
+No depende de Qt: las interfaces reemiten los callbacks como señales.
+
+Uso:
+    conexion = ConexionSerial(on_sent=print, on_line=print)
+    conexion.enviar("/dev/ttyACM0", "HBRGR50\\n")
+    ...
+    conexion.stop()
+"""
+
+import queue
+import threading
+import time
+
+import serial
+
+from latencia import Latencia
+
+
+BAUDRATE = 115200
+READ_TIMEOUT_S = 0.1   # Para que el lector note el cierre sin cancel_read()
+WRITE_TIMEOUT_S = 1.0
+
+# Órdenes para el thread escritor
+_ENVIAR = "enviar"
+_CERRAR = "cerrar"
+_FIN = "fin"
+
+
+class ConexionSerial:
+    """Puerto abierto una vez; los envíos salen de un thread escritor"""
+    def __init__(self, baudrate=BAUDRATE, serial_factory=serial.Serial,
+                 on_sent=None, on_line=None, on_status=None):
+        self.baudrate = baudrate
+        self.serial_factory = serial_factory
+        self.on_sent = on_sent        # on_sent(id, texto, latencia_s, error o None)
+        self.on_line = on_line        # on_line(línea recibida del puerto)
+        self.on_status = on_status    # on_status(mensaje)
+        self.port = None              # Puerto abierto (None si está cerrado)
+        self.latencia = Latencia()  # enviar() -> bytes escritos
+        self.enviados = 0
+        self.errores = 0
+        self.aperturas = 0
+        self._conn = None
+        self._lector = None
+        self._ids = 0
+        self._cola = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ConexionSerial", daemon=True)
+        self._thread.start()
+
+    def enviar(self, port, texto):
+        """Encolar `texto` para `port` (no bloquea); devuelve el id del envío"""
+        self._ids += 1
+        self._cola.put((_ENVIAR, self._ids, port, texto, time.monotonic_ns()))
+        return self._ids
+
+    def cerrar(self):
+        """Cerrar el puerto (p. ej. si se desconectó); el próximo envío lo reabre"""
+        self._cola.put((_CERRAR,))
+
+    def stop(self, timeout_s=2.0):
+        self._cola.put((_FIN,))
+        self._thread.join(timeout_s)
+
+    # ---------- thread escritor ----------
+
+    def _run(self):
+        while True:
+            orden = self._cola.get()
+            if orden[0] == _FIN:
+                break
+            if orden[0] == _CERRAR:
+                self._close()
+                continue
+            _, envio_id, port, texto, t_ns = orden
+            try:
+                if port != self.port:
+                    self._close()
+                    self._open(port)
+                self._conn.write(texto.encode('utf-8'))
+                self._conn.flush()
+            except (serial.SerialException, OSError) as e:
+                self.errores += 1
+                self._close()
+                self._sent(envio_id, texto, t_ns, e)
+                continue
+            self.enviados += 1
+            self._sent(envio_id, texto, t_ns, None)
+        self._close()
+
+    def _open(self, port):
+        conn = self.serial_factory()
+        conn.port = port
+        conn.baudrate = self.baudrate
+        conn.timeout = READ_TIMEOUT_S
+        conn.write_timeout = WRITE_TIMEOUT_S
+        # Sin el pulso de DTR/RTS que reinicia el ESP32 al abrir
+        conn.dtr = False
+        conn.rts = False
+        conn.open()
+        self._conn = conn
+        self.port = port
+        self.aperturas += 1
+        self._lector = threading.Thread(target=self._read_loop, args=(conn,),
+                                        name="ConexionSerial-lector", daemon=True)
+        self._lector.start()
+        self._status(f"🔗 Puerto {port} abierto")
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._lector.join(1.0)
+        self._lector = None
+        self._status(f"Puerto {self.port} cerrado")
+        self.port = None
+
+    def _sent(self, envio_id, texto, t_ns, error):
+        latency_ns = time.monotonic_ns() - t_ns
+        if error is None:
+            self.latencia.add(latency_ns)
+        if self.on_sent is not None:
+            self.on_sent(envio_id, texto, latency_ns / 1e9, error)
+
+    def _status(self, message):
+        if self.on_status is not None:
+            self.on_status(message)
+
+    # ---------- thread lector ----------
+
+    def _read_loop(self, conn):
+        buffer = b''
+        while conn.is_open:
+            try:
+                chunk = conn.read(conn.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                break  # Cerrado por el escritor o el dispositivo se fue
+            if not chunk:
+                continue
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            if self.on_line is not None:
+                for line in lines:
+                    self.on_line(line.decode('utf-8', 'replace').strip())
@@ -0,0 +1,34 @@
+"""
+Acumulador de latencias de las interfaces de Calamardo.
+
+Propio de esta carpeta para que el proyecto funcione copiado o ejecutado desde
+cualquier lugar, sin depender del monitor de semáforos.
+"""
+
+
+class Latencia:
+    """Latencias en ns: último valor, promedio móvil exponencial y máximo"""
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.count = 0
+        self.last_ns = 0
+        self.mean_ns = 0.0
+        self.max_ns = 0
+
+    def add(self, latency_ns):
+        self.count += 1
+        self.last_ns = latency_ns
+        if self.count == 1:
+            self.mean_ns = float(latency_ns)
+        else:
+            self.mean_ns += self.alpha * (latency_ns - self.mean_ns)
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+    def summary_ms(self):
+        return {
+            'count': self.count,
+            'last_ms': self.last_ns / 1e6,
+            'mean_ms': self.mean_ns / 1e6,
+            'max_ms': self.max_ns / 1e6,
+        }
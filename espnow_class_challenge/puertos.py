@@ -0,0 +1,88 @@
+"""
+Lista de puertos seriales para las interfaces de Calamardo, sin Qt.
+
+VigiaPuertos revisa comports() en su propio thread cada INTERVALO_S (o al
+pedir reescanear()) y llama a on_change(agregados, quitados) cuando cambia la
+lista. El primer aviso trae todos los puertos y llega siempre, aunque no haya
+ninguno, para que la interfaz sepa que terminó el escaneo inicial. puertos()
+solo lee la lista en memoria: la interfaz no escanea en su thread.
+
+Uso:
+    vigia = VigiaPuertos(on_change=lambda agregados, quitados: print(agregados, quitados))
+    vigia.start()
+    vigia.puertos()   # [ListPortInfo, ...] ordenados por nombre
+    vigia.stop()
+"""
+
+import threading
+
+from serial.tools import list_ports
+
+
+INTERVALO_S = 1.0  # Sondeo de comports()
+
+
+def describir_puerto(info):
+    """Texto para la lista de puertos: descripción, VID:PID y número de serie"""
+    partes = [info.description] if info.description and info.description != 'n/a' else []
+    if info.vid is not None:
+        partes.append(f"{info.vid:04x}:{info.pid:04x}")
+    if info.serial_number:
+        partes.append(f"SN {info.serial_number}")
+    return f"{info.device} - {' '.join(partes)}" if partes else info.device
+
+
+class VigiaPuertos:
+    """Lista de puertos actualizada en segundo plano"""
+    def __init__(self, on_change=None, intervalo_s=INTERVALO_S):
+        self.on_change = on_change    # on_change([ListPortInfo agregados], [ListPortInfo quitados])
+        self.intervalo_s = intervalo_s
+        self._puertos = {}            # device -> ListPortInfo (se reemplaza entero, se lee sin lock)
+        self._reportado = False       # Ya se avisó el escaneo inicial
+        self._corriendo = False
+        self._despertar = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._corriendo = True
+        self._thread = threading.Thread(target=self._run, name="VigiaPuertos", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s=2.0):
+        if self._thread is None:
+            return
+        self._corriendo = False
+        self._despertar.set()
+        self._thread.join(timeout_s)
+        self._thread = None
+
+    def puertos(self):
+        """Puertos presentes según el último escaneo (no consulta al sistema)"""
+        return sorted(self._puertos.values())
+
+    def reescanear(self):
+        """Escanear ya en el thread del vigía (no bloquea)"""
+        self._despertar.set()
+
+    def _run(self):
+        while self._corriendo:
+            self._escanear()
+            self._despertar.wait(self.intervalo_s)
+            self._despertar.clear()
+
+    def _escanear(self):
+        try:
+            encontrados = {info.device: info for info in list_ports.comports()}
+        except OSError:
+            return
+        anteriores = self._puertos
+        quitados = [info for device, info in anteriores.items()
+                    if device not in encontrados or encontrados[device].hwid != info.hwid]
+        agregados = [info for device, info in encontrados.items()
+                     if device not in anteriores or anteriores[device].hwid != info.hwid]
+        if not agregados and not quitados and self._reportado:
+            return
+        self._puertos = encontrados
+        self._reportado = True
+        if self.on_change is not None:
+            self.on_change(agregados, quitados)
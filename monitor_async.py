@@ -0,0 +1,294 @@
+"""
+Transporte serial asyncio del Monitor de Semáforos.
+
+AsyncSerialLoop atiende todos los puertos desde un único thread: cada puerto
+se abre con pyserial (que configura baudios y modo raw), se pasa a modo no
+bloqueante y su descriptor se registra en el event loop con add_reader. Los
+bytes pasan por el mismo LineFramer y parse_line que SerialReader y se
+entregan en lotes con la misma ventana de agrupación.
+
+Si un puerto se cae, su canal sigue registrado y se reabre como en
+SerialReaderCore (monitor_reader): espera exponencial con loop.call_later
+(mismas constantes), vigilancia de reaparición cada RECONNECT_POLL_S sin
+escanear comports() y búsqueda por número de serie USB en cada intento. Los
+demás puertos siguen leyendo en el mismo loop.
+
+No depende de Qt: la interfaz lo envuelve en AsyncSerialHub
+(monitor_gui.py). Requiere descriptores seleccionables (Linux/macOS).
+
+Uso:
+    hub = AsyncSerialLoop(on_lines=print, on_status=print)
+    hub.add_port("A", "/dev/ttyUSB0")
+    threading.Thread(target=hub.run).start()
+    ...
+    hub.stop()
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import serial
+
+from monitor_parser import parse_line, SerialLine
+from monitor_framing import LineFramer, frame_text
+from monitor_reader import (
+    READER_CONNECTING, READER_CONNECTED, READER_RECONNECTING,
+    RECONNECT_INITIAL_S, RECONNECT_MAX_S, RECONNECT_POLL_S,
+    device_present, find_port_by_serial, usb_serial_number
+)
+from monitor_stats import ParseStats
+
+
+READ_SIZE = 65536  # Bytes por lectura: menos que esto significa que el puerto quedó vacío
+
+
+class _PortChannel:
+    """Estado de un puerto dentro del loop: conexión, framer, lote pendiente y
+    reconexión (el canal sobrevive a los cortes; conn es None mientras tanto)"""
+    def __init__(self, port_id, port):
+        self.port_id = port_id
+        self.port = port
+        self.conn = None
+        self.fd = None
+        # El framer sobrevive a los cortes, como en SerialReaderCore
+        self.framer = LineFramer()
+        self.pending = []
+        self.last_emit = 0.0
+        self.flush_handle = None
+        self.state = READER_CONNECTING
+        self.usb_serial = None       # Número de serie USB visto al conectar
+        self.reconnects = 0
+        self.last_outage_s = None
+        self.lost_ns = None          # Inicio del corte en curso
+        self.attempts = 0
+        self.delay = RECONNECT_INITIAL_S
+        self.retry_handle = None     # Próximo intento o vigilancia programados
+
+    @property
+    def connected(self):
+        return self.conn is not None
+
+
+class AsyncSerialLoop:
+    """Un event loop asyncio que lee, sella y parsea todos los puertos"""
+    def __init__(self, on_lines, on_status=None, baudrate=115200, batch_interval_ms=20,
+                 serial_factory=serial.Serial, reconnect=True, port_watcher=None):
+        self.on_lines = on_lines      # on_lines(port_id, [SerialLine, ...])
+        self.on_status = on_status    # on_status(port_id, mensaje)
+        self.baudrate = baudrate
+        # Igual que SerialReader: None = una entrega por línea,
+        # 0 = por lectura, > 0 = como máximo una cada batch_interval_ms
+        self.batch_interval_ms = batch_interval_ms
+        self.serial_factory = serial_factory
+        # Reabrir los puertos que se caen (False = cerrarlos como antes)
+        self.reconnect = reconnect
+        # Inventario de puertos (monitor_ports.PortWatcher) para buscar el
+        # dispositivo tras un corte sin escanear comports()
+        self.port_watcher = port_watcher
+        self.loop = asyncio.new_event_loop()
+        self.channels = {}
+        self.parse_stats = ParseStats()  # Framing y parseo de todos los puertos
+
+    # ---------- API (segura desde cualquier thread) ----------
+
+    def run(self):
+        """Ejecutar el loop en el thread actual hasta stop()"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            for port_id in list(self.channels):
+                self._close(port_id)
+            self.loop.close()
+
+    def add_port(self, port_id, port):
+        self.loop.call_soon_threadsafe(self._open, port_id, port)
+
+    def remove_port(self, port_id):
+        self.loop.call_soon_threadsafe(self._close, port_id)
+
+    def stop(self):
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    # ---------- dentro del loop ----------
+
+    def _status(self, port_id, message):
+        if self.on_status is not None:
+            self.on_status(port_id, message)
+
+    def _open(self, port_id, port):
+        if port_id in self.channels:
+            self._close(port_id)
+        channel = _PortChannel(port_id, port)
+        self.channels[port_id] = channel
+        self._status(port_id, f"Conectando a {port}...")
+        self._connect(channel)
+
+    def _connect(self, channel):
+        """Intentar abrir el puerto del canal; si falla, programar el próximo intento"""
+        channel.retry_handle = None
+        port = channel.port
+        if channel.usb_serial and channel.lost_ns is not None:
+            port = find_port_by_serial(channel.usb_serial, self.port_watcher) or port
+        try:
+            conn = self.serial_factory(port=port, baudrate=self.baudrate, timeout=0, write_timeout=1)
+            conn.reset_input_buffer()
+            conn.reset_output_buffer()
+            os.set_blocking(conn.fileno(), False)
+        except (serial.SerialException, OSError) as e:
+            channel.attempts += 1
+            if channel.attempts == 1 and channel.state == READER_CONNECTING:
+                self._status(channel.port_id, f"❌ Error: {e}")
+                channel.pending.append(self._line(f"ERROR: No se pudo abrir {port} - {e}"))
+                self._flush(channel)
+                if self.reconnect:
+                    self._status(channel.port_id, f"⏳ Reintentando {port}...")
+            if self.reconnect:
+                self._wait_reconnect(channel)
+            else:
+                self.channels.pop(channel.port_id, None)
+            return
+        channel.conn = conn
+        channel.fd = conn.fileno()
+        self.loop.add_reader(channel.fd, self._on_readable, channel)
+        port_id = channel.port_id
+        if port != channel.port:
+            self._status(port_id, f"🔁 Dispositivo {channel.usb_serial} reapareció en {port} (antes {channel.port})")
+            channel.port = port
+        channel.usb_serial = usb_serial_number(port) or channel.usb_serial
+        if channel.state == READER_CONNECTING:
+            self._status(port_id, f"✅ Conectado a {port} @ {self.baudrate} baud")
+            channel.pending.append(self._line(f"=== CONECTADO a {port} ({self.baudrate} baud) ==="))
+        else:
+            channel.last_outage_s = (time.monotonic_ns() - channel.lost_ns) / 1e9
+            channel.reconnects += 1
+            self._status(port_id, f"✅ Reconectado a {port} tras {channel.last_outage_s * 1000:.0f} ms "
+                                  f"({channel.attempts + 1} intentos)")
+            channel.pending.append(self._line(
+                f"=== RECONECTADO a {port} tras {channel.last_outage_s * 1000:.0f} ms ==="))
+        self._flush(channel)
+        channel.state = READER_CONNECTED
+        channel.lost_ns = None
+        channel.attempts = 0
+        channel.delay = RECONNECT_INITIAL_S
+
+    def _wait_reconnect(self, channel):
+        """Programar el próximo intento; antes si el dispositivo reaparece"""
+        deadline = self.loop.time() + channel.delay
+        channel.delay = min(channel.delay * 2, RECONNECT_MAX_S)
+        present = device_present(channel.port, channel.usb_serial, self.port_watcher)
+        if present is None:
+            # Sin forma barata de saberlo: esperar el intervalo completo
+            channel.retry_handle = self.loop.call_at(deadline, self._connect, channel)
+            return
+        channel.retry_handle = self.loop.call_later(
+            RECONNECT_POLL_S, self._poll_reconnect, channel, deadline, present)
+
+    def _poll_reconnect(self, channel, deadline, present):
+        now_present = device_present(channel.port, channel.usb_serial, self.port_watcher)
+        if (now_present and not present) or self.loop.time() >= deadline:
+            self._connect(channel)  # Reapareció o venció la espera
+            return
+        channel.retry_handle = self.loop.call_later(
+            min(RECONNECT_POLL_S, deadline - self.loop.time()),
+            self._poll_reconnect, channel, deadline, now_present)
+
+    def _disconnect(self, channel):
+        """Dejar de leer y cerrar la conexión del canal (entrega lo pendiente)"""
+        if channel.conn is None:
+            return
+        self.loop.remove_reader(channel.fd)
+        if channel.flush_handle is not None:
+            channel.flush_handle.cancel()
+            channel.flush_handle = None
+        self._flush(channel)
+        conn, channel.conn, channel.fd = channel.conn, None, None
+        try:
+            conn.close()
+        except Exception as e:
+            print(f"Error cerrando puerto: {e}")
+
+    def _close(self, port_id):
+        channel = self.channels.pop(port_id, None)
+        if channel is None:
+            return
+        if channel.retry_handle is not None:
+            channel.retry_handle.cancel()
+            channel.retry_handle = None
+        connected = channel.conn is not None
+        self._disconnect(channel)
+        self._flush(channel)
+        if connected:
+            self._status(port_id, f"Desconectado de {channel.port}")
+
+    def _lost(self, channel, error):
+        """El puerto se cayó: cerrarlo y reintentar (o dejarlo cerrado sin reconnect)"""
+        channel.pending.append(self._line(f"ERROR serial: {error}"))
+        if not self.reconnect:
+            self._close(channel.port_id)
+            return
+        self._disconnect(channel)
+        channel.lost_ns = time.monotonic_ns()
+        channel.state = READER_RECONNECTING
+        self._status(channel.port_id, f"🔌 Puerto perdido ({error}); reconectando...")
+        self._wait_reconnect(channel)
+
+    @staticmethod
+    def _line(text):
+        """Línea propia del transporte (conexión, errores), sellada al crearla"""
+        stamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        return SerialLine(stamp, text, parse_line(text), time.monotonic_ns())
+
+    def _on_readable(self, channel):
+        try:
+            data = os.read(channel.fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            data = None
+            error = e
+        if not data:
+            # Lectura vacía con el descriptor listo: el dispositivo desapareció
+            if data is not None:
+                error = "el dispositivo no devolvió datos (¿desconectado?)"
+            self._lost(channel, error)
+            return
+        t_read_ns = time.monotonic_ns()
+        stamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        pending = channel.pending
+        before = len(pending)
+        t0 = time.perf_counter_ns()
+        for item in channel.framer.feed(data):
+            if type(item) is str:
+                pending.append(SerialLine(stamp, item, parse_line(item), t_read_ns))
+            else:
+                pending.append(SerialLine(stamp, frame_text(item), item, t_read_ns))
+        self.parse_stats.add(len(pending) - before, time.perf_counter_ns() - t0)
+        if self.batch_interval_ms is None:
+            self._flush(channel)
+        else:
+            self._flush(channel, force=len(data) < READ_SIZE)
+
+    def _flush(self, channel, force=True):
+        """Entregar el lote pendiente (o programarlo al vencer la ventana)"""
+        if not channel.pending:
+            return
+        if not force and self.batch_interval_ms:
+            wait = self.batch_interval_ms / 1000 - (time.monotonic() - channel.last_emit)
+            if wait > 0:
+                if channel.flush_handle is None:
+                    channel.flush_handle = self.loop.call_later(wait, self._deferred_flush, channel)
+                return
+        if channel.flush_handle is not None:
+            channel.flush_handle.cancel()
+            channel.flush_handle = None
+        batch, channel.pending = channel.pending, []
+        channel.last_emit = time.monotonic()
+        self.on_lines(channel.port_id, batch)
+
+    def _deferred_flush(self, channel):
+        channel.flush_handle = None
+        self._flush(channel)
@@ -0,0 +1,219 @@
+"""
+Alineación de los relojes millis() de los ESP32 con el reloj del monitor.
+
+Cada nodo reporta su millis() en los TX (timestamp_ms) y en la columna ts del
+CSV. ClockEstimator relaciona ese reloj con time.monotonic_ns del monitor:
+
+  host_ms - device_ms = offset + pendiente * device_ms + retardo
+
+El retardo (USB, lote, cola del thread) solo puede sumar, así que el ajuste se
+hace sobre la envolvente inferior: el mínimo de cada ventana de WINDOW_MS de
+reloj del dispositivo, y una recta por mínimos cuadrados sobre las últimas
+ventanas. La pendiente es la deriva del cristal y el residuo de la envolvente
+indica qué tan buena es la estimación. Cada observación cuesta O(1); el
+ajuste (NumPy, DEFAULT_POINTS puntos) se rehace una vez por ventana.
+
+ClockSync mantiene un estimador por nodo y da a cada evento su hora estimada
+en el reloj del monitor (event_time), con la que se ordenan los nodos entre
+sí. Las líneas sin millis() heredan el retardo de la última línea con millis()
+del mismo nodo.
+
+Uso:
+    clocks = ClockSync()
+    t_ns = clocks.event_time("A", evento, t_read_ns)
+    clocks.stats("A")  # {'offset_ms': ..., 'drift_ppm': ..., 'residual_ms': ...}
+"""
+
+from collections import deque
+
+import numpy as np
+
+from monitor_parser import CsvTelemetry, TxFrame
+
+
+WINDOW_MS = 2000         # Ventana de reloj del dispositivo por punto de la envolvente
+DEFAULT_POINTS = 150     # Puntos del ajuste (150 x 2 s = 5 min)
+MIN_FIT_POINTS = 3       # Con menos puntos no se estima deriva
+WRAP_MS = 1 << 32        # millis() es uint32: da la vuelta cada ~49.7 días
+REBOOT_JUMP_MS = 10000   # Retroceso de millis() que se interpreta como reinicio
+
+
+def _line(x, d):
+    """Pendiente y ordenada de la recta de mínimos cuadrados d = a + b x"""
+    x_mean = x.mean()
+    d_mean = d.mean()
+    dx = x - x_mean
+    sxx = dx @ dx
+    slope = (dx @ (d - d_mean)) / sxx if sxx else 0.0
+    return slope, d_mean - slope * x_mean
+
+
+class ClockEstimator:
+    """Offset y deriva del reloj de un nodo respecto del reloj del monitor"""
+    def __init__(self, window_ms=WINDOW_MS, points=DEFAULT_POINTS):
+        self.window_ms = window_ms
+        self.points = deque(maxlen=points)  # (device_ms, mínimo de host - device) por ventana
+        self.reset()
+
+    def reset(self):
+        """Olvidar el ajuste (el nodo se reinició)"""
+        self.points.clear()
+        self.wrap = 0
+        self.last_device = None
+        self.window = None
+        self.window_min = None      # (device_ms, d) mínimo de la ventana en curso
+        self.intercept = None       # d estimado en device_ms = x0
+        self.slope = 0.0
+        self.x0 = 0
+        self.residual_ms = 0.0
+        self.excess_ms = 0.0        # Retardo de la última observación sobre la envolvente
+        self.samples = 0
+        self.resets = getattr(self, 'resets', -1) + 1
+
+    def unwrap(self, device_ms):
+        last = self.last_device
+        if last is not None:
+            x = device_ms + self.wrap
+            if x < last - REBOOT_JUMP_MS:
+                if last - x > WRAP_MS // 2:
+                    self.wrap += WRAP_MS
+                else:
+                    self.reset()
+        return device_ms + self.wrap
+
+    def observe(self, device_ms, host_ns):
+        """Agregar una observación: millis() del nodo y hora de lectura en el monitor"""
+        x = self.unwrap(device_ms)
+        self.last_device = x
+        d = host_ns / 1e6 - x
+        self.samples += 1
+        window = x // self.window_ms
+        if window != self.window:
+            if self.window_min is not None:
+                self.points.append(self.window_min)
+            self.window = window
+            self.window_min = (x, d)
+            self.fit()
+        elif d < self.window_min[1]:
+            self.window_min = (x, d)
+        self.excess_ms = float(d - self.offset_at(x))
+
+    def fit(self):
+        """Recta por mínimos cuadrados sobre los mínimos de cada ventana"""
+        points = list(self.points)
+        if self.window_min is not None:
+            points.append(self.window_min)
+        if len(points) < MIN_FIT_POINTS:
+            self.x0 = points[-1][0]
+            self.intercept = min(d for _, d in points)
+            self.slope = 0.0
+            self.residual_ms = 0.0
+            return
+        xd = np.array(points, dtype=np.float64)
+        x0 = xd[:, 0].mean()
+        x = xd[:, 0] - x0
+        d = xd[:, 1]
+        slope, intercept = _line(x, d)
+        # Segunda pasada con la mitad inferior: ventanas en que todas las
+        # líneas llegaron tarde no deben inclinar la envolvente
+        residual = d - (intercept + slope * x)
+        lower = residual <= np.median(residual)
+        if lower.sum() >= MIN_FIT_POINTS and np.ptp(x[lower]) > 0:
+            slope, intercept = _line(x[lower], d[lower])
+        # La recta queda bajo todos los mínimos: el retardo nunca es negativo
+        envelope = d - slope * x
+        lowest = envelope.min()
+        self.x0 = float(x0)
+        self.slope = float(slope)
+        self.intercept = float(lowest)
+        self.residual_ms = float(np.sqrt(np.mean((envelope[lower] - lowest) ** 2)))
+
+    def offset_at(self, x):
+        """host_ms - device_ms estimado para un millis() ya desenrollado"""
+        if self.intercept is None:
+            return 0.0
+        return self.intercept + self.slope * (x - self.x0)
+
+    def to_host_ns(self, device_ms):
+        """Hora del monitor (ns) estimada para un millis() del nodo"""
+        x = self.unwrap(device_ms) if self.last_device is not None else device_ms
+        return int((x + self.offset_at(x)) * 1e6)
+
+    @property
+    def ready(self):
+        return self.intercept is not None
+
+    @property
+    def drift_ppm(self):
+        """Adelanto del reloj del nodo respecto del monitor (ppm)"""
+        if self.slope <= -1.0:
+            return 0.0
+        return (1.0 / (1.0 + self.slope) - 1.0) * 1e6
+
+    def stats(self):
+        x = self.last_device or 0
+        return {
+            'offset_ms': self.offset_at(x),
+            'drift_ppm': self.drift_ppm,
+            'residual_ms': self.residual_ms,
+            'excess_ms': self.excess_ms,
+            'points': len(self.points) + (self.window_min is not None),
+            'samples': self.samples,
+            'resets': self.resets,
+        }
+
+
+class _NodeClock:
+    __slots__ = ('estimator', 'excess_ns', 'last_ns')
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.excess_ns = 0    # Retardo de la última línea con millis()
+        self.last_ns = 0      # Última hora entregada (no retrocede)
+
+
+class ClockSync:
+    """Un ClockEstimator por nodo y la hora alineada de cada evento"""
+    def __init__(self, window_ms=WINDOW_MS, points=DEFAULT_POINTS):
+        self.window_ms = window_ms
+        self.points = points
+        self.nodes = {}
+
+    def node(self, node_id):
+        clock = self.nodes.get(node_id)
+        if clock is None:
+            clock = self.nodes[node_id] = _NodeClock(ClockEstimator(self.window_ms, self.points))
+        return clock
+
+    def event_time(self, node_id, event, t_read_ns):
+        """Hora estimada (reloj del monitor, ns) en que el nodo generó el evento"""
+        clock = self.nodes.get(node_id) or self.node(node_id)
+        event_type = type(event)
+        if event_type is TxFrame:
+            device_ms = event.timestamp_ms
+        elif event_type is CsvTelemetry:
+            device_ms = event.ts
+        else:
+            device_ms = None
+        if device_ms is None:
+            t_ns = t_read_ns - clock.excess_ns
+        else:
+            estimator = clock.estimator
+            estimator.observe(device_ms, t_read_ns)
+            t_ns = estimator.to_host_ns(device_ms)
+            if t_ns > t_read_ns:
+                t_ns = t_read_ns
+            clock.excess_ns = t_read_ns - t_ns
+        if t_ns < clock.last_ns:
+            t_ns = clock.last_ns
+        clock.last_ns = t_ns
+        return t_ns
+
+    def stats(self, node_id):
+        clock = self.nodes.get(node_id)
+        if clock is None or not clock.estimator.ready:
+            return None
+        return clock.estimator.stats()
+
+    def remove(self, node_id):
+        self.nodes.pop(node_id, None)
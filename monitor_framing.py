@@ -0,0 +1,182 @@
+"""
+Separación de líneas sobre bytes para SerialReader.
+
+LineFramer acumula los bloques leídos en un bytearray, localiza el último
+salto de línea con rfind(b'\\n') y decodifica de una vez solo el tramo de
+líneas completas (sobre un memoryview, sin copia, si el tramo es grande). Como un
+carácter UTF-8 de varios bytes nunca contiene 0x0A, un carácter partido
+entre dos lecturas se decodifica entero cuando llega el resto de la línea.
+Los bytes inválidos se muestran como U+FFFD en lugar de descartarse.
+
+Entre líneas de texto el firmware puede intercalar tramas binarias de
+telemetría (BINARY_TELEMETRY en traffic_A.ino/traffic_B.ino):
+
+    SYNC (0xA5) | LEN | TYPE | TrafficMsg (LEN bytes) | CRC-16 LE (LEN..payload)
+
+0xA5 nunca inicia un carácter UTF-8, así que una trama se reconoce cuando
+ese byte aparece al inicio de un registro (tras un salto de línea o tras otra
+trama). El payload se desempaqueta con struct directamente sobre el buffer.
+"""
+
+import binascii
+import struct
+
+from monitor_parser import TxFrame, RxFrame
+
+
+MAX_LINE_BYTES = 4096  # Sin salto de línea tras este tamaño se entrega igual
+
+# Por debajo de este tamaño copiar el tramo es más barato que crear un memoryview
+_COPY_LIMIT = 1024
+
+
+# ==================== TELEMETRÍA BINARIA ====================
+
+TELEMETRY_SYNC = 0xA5
+FRAME_TX = 0x01
+FRAME_RX = 0x02
+
+# struct TrafficMsg (packed, little-endian):
+# sender_id, seq, state, request, distance_cm, timestamp_ms
+TRAFFIC_MSG = struct.Struct('<BBBBHI')
+CRC = struct.Struct('<H')
+_FRAME_TYPES = (FRAME_TX, FRAME_RX)
+_FRAME_OVERHEAD = 5  # SYNC + LEN + TYPE + CRC (2 bytes)
+
+
+def crc16(data):
+    """CRC-16/XMODEM (polinomio 0x1021, valor inicial 0) igual al del firmware"""
+    return binascii.crc_hqx(data, 0)
+
+
+def encode_frame(frame_type, sender_id, seq, state, request, dist, timestamp_ms):
+    """Construir una trama como la envía el firmware (simulador y pruebas)"""
+    payload = TRAFFIC_MSG.pack(sender_id, seq, state, request, dist, timestamp_ms)
+    body = bytes((len(payload), frame_type)) + payload
+    return bytes((TELEMETRY_SYNC,)) + body + CRC.pack(crc16(body))
+
+
+def decode_frame(frame_type, buffer, offset):
+    """Convertir el payload TrafficMsg en el mismo evento que su línea de texto"""
+    sender, seq, state, request, dist, timestamp_ms = TRAFFIC_MSG.unpack_from(buffer, offset)
+    if frame_type == FRAME_TX:
+        return TxFrame(state, request, dist, seq, timestamp_ms)
+    if frame_type == FRAME_RX:
+        return RxFrame(sender, state, request, dist, seq, timestamp_ms)
+    return None
+
+
+def frame_text(event):
+    """Texto equivalente de una trama binaria, para los logs"""
+    if type(event) is TxFrame:
+        head = f"TX: estado={event.state}, request={event.request}, dist={event.dist}"
+    else:
+        head = (f"RX de ESP {event.sender}: estado={event.state}, "
+                f"request={event.request}, dist={event.dist}")
+    return f"{head}, seq={event.seq}, ts={event.timestamp_ms}"
+
+
+class LineFramer:
+    """Convierte bloques de bytes en líneas de texto completas y eventos de
+    tramas binarias (TxFrame/RxFrame), en orden de llegada"""
+    def __init__(self, encoding='utf-8', max_line_bytes=MAX_LINE_BYTES, binary=True):
+        self.encoding = encoding
+        self.max_line_bytes = max_line_bytes
+        self.binary = binary  # Reconocer tramas de telemetría binaria
+        self.bad_frames = 0  # Tramas descartadas por longitud o CRC
+        self._buffer = bytearray()
+
+    def __len__(self):
+        """Bytes pendientes (línea incompleta)"""
+        return len(self._buffer)
+
+    def feed(self, chunk):
+        """Agregar un bloque y devolver las líneas completas (sin espacios
+        extremos ni vacías) y los eventos de las tramas binarias completas"""
+        buffer = self._buffer
+        buffer += chunk
+        if self.binary and TELEMETRY_SYNC in buffer:
+            return self._feed_mixed()
+        # Solo el tramo hasta el último salto de línea contiene líneas completas
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            if len(buffer) > self.max_line_bytes:
+                return self.flush()
+            return []
+        if end < _COPY_LIMIT:
+            text = buffer[:end].decode(self.encoding, 'replace')
+        else:
+            # Tramos grandes: decodificar sobre la vista, sin copiar los bytes
+            with memoryview(buffer) as view:
+                text = str(view[:end], self.encoding, 'replace')
+        # Compactar una sola vez por bloque
+        del buffer[:end + 1]
+        lines = [line for line in map(str.strip, text.split('\n')) if line]
+        if len(buffer) > self.max_line_bytes:
+            lines.extend(self.flush())
+        return lines
+
+    def _feed_mixed(self):
+        """Separar registro a registro cuando el buffer puede contener tramas"""
+        buffer = self._buffer
+        size = len(buffer)
+        items = []
+        append = items.append
+        pos = 0
+        msg_size = TRAFFIC_MSG.size
+        unpack_msg = TRAFFIC_MSG.unpack_from
+        unpack_crc = CRC.unpack_from
+        crc_hqx = binascii.crc_hqx
+        new_tuple = tuple.__new__
+        view = memoryview(buffer)
+        try:
+            while pos < size:
+                if buffer[pos] == TELEMETRY_SYNC:
+                    if size - pos < 3:
+                        break
+                    if buffer[pos + 1] == msg_size:
+                        end = pos + msg_size + _FRAME_OVERHEAD
+                        if end > size:
+                            break  # Trama incompleta: esperar el resto
+                        frame_type = buffer[pos + 2]
+                        if (crc_hqx(view[pos + 1:end - 2], 0) == unpack_crc(buffer, end - 2)[0]
+                                and frame_type in _FRAME_TYPES):
+                            sender, seq, state, request, dist, ts = unpack_msg(buffer, pos + 3)
+                            # tuple.__new__ evita el __new__ en Python de NamedTuple
+                            if frame_type == FRAME_TX:
+                                append(new_tuple(TxFrame, (state, request, dist, seq, ts)))
+                            else:
+                                append(new_tuple(RxFrame, (sender, state, request, dist, seq, ts)))
+                            pos = end
+                            continue
+                        # CRC o tipo inválidos: descartar la trama entera (el byte LEN
+                        # es 0x0A y el resto se pegaría a la línea siguiente)
+                        self.bad_frames += 1
+                        pos = end
+                        continue
+                    # Longitud inválida: descartar el byte de sincronía
+                    self.bad_frames += 1
+                    pos += 1
+                    continue
+                end = buffer.find(b'\n', pos)
+                if end < 0:
+                    break
+                line = str(view[pos:end], self.encoding, 'replace').strip()
+                if line:
+                    append(line)
+                pos = end + 1
+        finally:
+            view.release()
+        del buffer[:pos]
+        if len(buffer) > self.max_line_bytes:
+            items.extend(self.flush())
+        return items
+
+    def flush(self):
+        """Entregar lo pendiente como línea aunque no haya terminado"""
+        line = self._buffer.decode(self.encoding, 'replace').strip()
+        self._buffer.clear()
+        return [line] if line else []
+
+    def clear(self):
+        self._buffer.clear()
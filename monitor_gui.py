@@ -0,0 +1,1412 @@
+"""
+Monitor de Semáforos Inteligentes - interfaz PyQt6
+Universidad Militar Nueva Granada
+
+Ventana de monitoreo en tiempo real para los ESP32 con semáforos inteligentes.
+Muestra estado de LEDs, distancias del sensor HC-SR04, logs serial y mensajes ESP-NOW.
+
+Requisitos:
+- PyQt6
+- pyserial
+
+Se abre desde el lanzador, que solo importa este módulo si hace falta la
+interfaz:
+python monitor_semaforos.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from operator import attrgetter
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QLabel, QPushButton, QPlainTextEdit, QComboBox, QGroupBox, QGridLayout,
+    QProgressBar, QTabWidget, QSplitter, QFrame, QScrollArea, QTableWidget,
+    QTableWidgetItem, QHeaderView, QLineEdit
+)
+from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer, QLineF
+from PyQt6.QtGui import QFont, QColor, QPalette, QPainter, QPen
+import serial
+
+from monitor_parser import STATE_NAMES, SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK
+from monitor_log import LogBuffer, DEFAULT_CAPACITY
+from monitor_stats import LatencyStats, ParseStats
+from monitor_recorder import SessionRecorder, EVT_SUFFIX
+from monitor_index import IndexWriter, SessionIndex, run_query, format_record
+from monitor_reader import SerialReaderCore, TRANSPORT_THREADS, TRANSPORT_ASYNCIO
+from monitor_async import AsyncSerialLoop
+from monitor_ports import PortWatcher, describe_port
+from monitor_series import SeriesBuffer
+from monitor_interlock import FALLBACK_PEER_TIMEOUT
+from monitor_pipeline import EventPipeline
+from monitor_metrics import (
+    MetricsExporter, DEFAULT_HOST as METRICS_HOST, node_samples, reader_samples, analytics_samples,
+    pipeline_samples
+)
+from monitor_state import (
+    NodeState, FIELDS, PRIORITY_NONE, PRIORITY_LOCAL, PRIORITY_REMOTE,
+    PRIORITY_BOTH, SYNC_UNKNOWN, SYNC_OK, SYNC_TX_ERROR, SYNC_MAC
+)
+
+
+class SerialReader(QThread):
+    """Thread para leer, sellar y parsear datos del puerto serial sin bloquear la UI
+    (la lectura es SerialReaderCore; ver monitor_reader)"""
+    lines_parsed = pyqtSignal(str, list)  # (port_id, [SerialLine, ...])
+    connection_status = pyqtSignal(str, str)  # (port_id, status_message)
+    
+    def __init__(self, port, baudrate=115200, port_id="A", batch_interval_ms=20,
+                 serial_factory=serial.Serial, read_mode="blocking", port_watcher=None):
+        super().__init__()
+        self.core = SerialReaderCore(
+            port, baudrate, port_id, batch_interval_ms, serial_factory, read_mode,
+            on_lines=self.lines_parsed.emit, on_status=self.connection_status.emit,
+            port_watcher=port_watcher
+        )
+    
+    def run(self):
+        self.core.run()
+    
+    def stop(self):
+        self.core.stop()
+
+
+class AsyncSerialHub(QThread):
+    """Un solo thread con un event loop asyncio para todos los puertos
+    (alternativa a un SerialReader por puerto; ver monitor_async)"""
+    lines_parsed = pyqtSignal(str, list)  # (port_id, [SerialLine, ...])
+    connection_status = pyqtSignal(str, str)  # (port_id, status_message)
+    
+    def __init__(self, baudrate=115200, batch_interval_ms=20, serial_factory=serial.Serial,
+                 port_watcher=None):
+        super().__init__()
+        self.core = AsyncSerialLoop(
+            self.lines_parsed.emit, self.connection_status.emit,
+            baudrate=baudrate, batch_interval_ms=batch_interval_ms,
+            serial_factory=serial_factory, port_watcher=port_watcher
+        )
+    
+    def run(self):
+        self.core.run()
+    
+    def add_port(self, port_id, port):
+        self.core.add_port(port_id, port)
+    
+    def remove_port(self, port_id):
+        self.core.remove_port(port_id)
+    
+    def stop(self):
+        self.core.stop()
+
+
+# Hojas de estilo precalculadas: render() solo asigna las que cambian
+ESTADO_COLORS = {
+    'VERDE': 'green',
+    'AMARILLO': 'orange',
+    'ROJO': 'red',
+    'ALL RED': 'darkred'
+}
+ESTADO_STYLES = {
+    estado: f"font-weight: bold; font-size: 14px; color: {color};"
+    for estado, color in ESTADO_COLORS.items()
+}
+ESTADO_STYLE_DEFAULT = "font-weight: bold; font-size: 14px; color: black;"
+
+REMOTO_STYLES = {
+    estado: f"font-weight: bold; color: {color};"
+    for estado, color in {**ESTADO_COLORS, '---': 'gray'}.items()
+}
+REMOTO_STYLE_DEFAULT = "font-weight: bold; color: black;"
+
+PRIORIDAD_VIEWS = {
+    PRIORITY_BOTH: ("Conflicto (ambos)", "font-weight: bold; color: orange;"),
+    PRIORITY_LOCAL: ("Solicitada (local)", "font-weight: bold; color: blue;"),
+    PRIORITY_REMOTE: ("Remota", "font-weight: bold; color: purple;"),
+    PRIORITY_NONE: ("---", ""),
+}
+
+DISTANCIA_STYLES = {
+    color: f"QProgressBar::chunk {{ background-color: {color}; }}"
+    for color in ('red', 'orange', 'green')
+}
+
+VEHICULO_STYLES = {
+    True: "font-weight: bold; color: red;",
+    False: "font-weight: bold; color: gray;",
+}
+
+SYNC_VIEWS = {
+    SYNC_UNKNOWN: ("---", ""),
+    SYNC_OK: ("✅ OK", "color: green; font-weight: bold;"),
+    SYNC_LOST: ("❌ SIN SYNC", "color: red; font-weight: bold;"),
+    SYNC_PEER_OK: ("✅ PEER OK", "color: green; font-weight: bold;"),
+    SYNC_INIT_OK: ("✅ INIT OK", "color: yellow; font-weight: bold;"),
+    SYNC_TX_ERROR: ("⚠️ ERROR TX (status=1)", "color: orange; font-weight: bold; background: #330000; border: 2px solid red;"),
+    SYNC_MAC: ("✅ {mac}", "color: green; font-weight: bold;"),
+}
+
+
+# Ventanas de tiempo de las gráficas (etiqueta -> segundos)
+CHART_WINDOWS = {
+    "1 min": 60,
+    "10 min": 600,
+    "1 h": 3600,
+    "24 h": 24 * 3600,
+}
+CHART_MAX_CM = 400  # Escala de distancia (igual que distancia_bar)
+CHART_STATE_COLORS = {
+    code: QColor(ESTADO_COLORS[name]) for code, name in STATE_NAMES.items()
+}
+
+
+class SeriesChart(QWidget):
+    """Gráfica de distancia, estado y request de un nodo (una columna por píxel)"""
+    def __init__(self, series, window_s=60):
+        super().__init__()
+        self.series = series
+        self.window_s = window_s
+        self.setMinimumHeight(110)
+        self._cache_key = None
+        self._columns = None
+        self._dist_pen = QPen(QColor("#00bcd4"))
+    
+    def set_window(self, seconds):
+        self.window_s = seconds
+        self._cache_key = None
+        self.update()
+    
+    def refresh(self):
+        """Pedir repintado si llegaron muestras o la ventana avanzó una columna"""
+        if self._decimate():
+            self.update()
+    
+    def _decimate(self):
+        width = max(self.width(), 1)
+        series = self.series
+        if series.origin_ns is None:
+            return False
+        span_ms = self.window_s * 1000
+        column_ms = span_ms / width
+        # Fin de la ventana alineado a columnas: la gráfica avanza de a un píxel
+        now_ms = series.to_ms(time.monotonic_ns())
+        end_column = int(now_ms // column_ms) + 1
+        key = (width, self.window_s, end_column, series.version)
+        if key == self._cache_key:
+            return False
+        self._cache_key = key
+        t_end = end_column * column_ms
+        self._columns = series.decimate(t_end - span_ms, t_end, width)
+        return True
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1e1e1e"))
+        if self._columns is None:
+            self._decimate()
+        columns = self._columns
+        if columns is None:
+            painter.end()
+            return
+        height = self.height()
+        band = 8
+        plot_h = height - 2 * band - 2
+        # Franjas de estado y request (tramos de columnas con el mismo valor)
+        self._paint_runs(painter, columns.state, plot_h + 2, band, CHART_STATE_COLORS)
+        self._paint_runs(painter, columns.request, plot_h + 2 + band, band, {1: QColor("#ffeb3b")})
+        # Distancia: segmento vertical mínimo-máximo por columna
+        scale = plot_h / CHART_MAX_CM
+        lines = []
+        for x, (low, high) in enumerate(zip(columns.dist_min.tolist(), columns.dist_max.tolist())):
+            if low != low:  # NaN: columna sin muestras
+                continue
+            y_low = plot_h - min(low, CHART_MAX_CM) * scale
+            y_high = plot_h - min(high, CHART_MAX_CM) * scale
+            lines.append(QLineF(x + 0.5, y_low + 0.5, x + 0.5, y_high - 0.5))
+        painter.setPen(self._dist_pen)
+        painter.drawLines(lines)
+        painter.end()
+    
+    @staticmethod
+    def _paint_runs(painter, values, top, height, colors):
+        values = values.tolist()
+        start = 0
+        for x in range(1, len(values) + 1):
+            if x == len(values) or values[x] != values[start]:
+                color = colors.get(values[start])
+                if color is not None:
+                    painter.fillRect(start, top, x - start, height, color)
+                start = x
+
+
+class LEDIndicator(QWidget):
+    """Widget personalizado para simular un LED con color"""
+    def __init__(self, color_name, label=""):
+        super().__init__()
+        self.color_name = color_name
+        self.is_on = False
+        self.init_ui(label)
+    
+    def init_ui(self, label):
+        layout = QVBoxLayout()
+        
+        # Círculo LED
+        self.led_label = QLabel()
+        self.led_label.setFixedSize(50, 50)
+        self.led_label.setStyleSheet(self._get_stylesheet())
+        self.led_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        # Etiqueta
+        text_label = QLabel(label)
+        text_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        font = QFont()
+        font.setPointSize(9)
+        font.setBold(True)
+        text_label.setFont(font)
+        
+        layout.addWidget(self.led_label)
+        layout.addWidget(text_label)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setLayout(layout)
+    
+    def _get_stylesheet(self):
+        colors = {
+            'red': ('#ff4444', '#330000'),
+            'yellow': ('#ffff00', '#333300'),
+            'green': ('#00ff00', '#003300')
+        }
+        
+        on_color, off_color = colors.get(self.color_name, ('#888888', '#222222'))
+        current_color = on_color if self.is_on else off_color
+        
+        return f"""
+            QLabel {{
+                background-color: {current_color};
+                border: 3px solid #444;
+                border-radius: 25px;
+            }}
+        """
+    
+    def set_state(self, is_on):
+        """Encender/apagar el LED; devuelve True si hubo que redibujarlo"""
+        if is_on == self.is_on:
+            return False
+        self.is_on = is_on
+        self.led_label.setStyleSheet(self._get_stylesheet())
+        return True
+
+
+class SemaforoPanel(QWidget):
+    """Panel para un semáforo individual"""
+    def __init__(self, semaforo_id="A"):
+        super().__init__()
+        self.semaforo_id = semaforo_id
+        # Historial de distancia/estado/request para la gráfica
+        self.series = SeriesBuffer()
+        self.init_ui()
+        # Modelo de estado: los eventos escriben aquí, render() lo dibuja
+        self.state = NodeState(semaforo_id)
+        self._rendered = dict.fromkeys(FIELDS)
+        self._rendered_version = -1
+        # Medición: escrituras de widgets aplicadas y frames dibujados
+        self.applied_updates = 0
+        self.frames = 0
+        # Primer dibujo con los valores iniciales (no cuenta en la medición)
+        self.render()
+        self.applied_updates = 0
+        self.frames = 0
+    
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        
+        # Título
+        title = QLabel(f"SEMÁFORO {self.semaforo_id}")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        font = QFont()
+        font.setPointSize(16)
+        font.setBold(True)
+        title.setFont(font)
+        self.title_label = title
+        
+        # LEDs
+        led_group = QGroupBox("Estado de LEDs")
+        led_layout = QHBoxLayout()
+        
+        self.led_rojo = LEDIndicator('red', 'ROJO')
+        self.led_amarillo = LEDIndicator('yellow', 'AMARILLO')
+        self.led_verde = LEDIndicator('green', 'VERDE')
+        
+        led_layout.addWidget(self.led_rojo)
+        led_layout.addWidget(self.led_amarillo)
+        led_layout.addWidget(self.led_verde)
+        led_group.setLayout(led_layout)
+        
+        # Información de estado
+        info_group = QGroupBox("Información del Sistema")
+        info_layout = QGridLayout()
+        
+        # Estado actual
+        info_layout.addWidget(QLabel("Estado:"), 0, 0)
+        self.estado_label = QLabel("---")
+        self.estado_label.setStyleSheet("font-weight: bold; font-size: 14px;")
+        info_layout.addWidget(self.estado_label, 0, 1)
+        
+        # Tiempo restante
+        info_layout.addWidget(QLabel("Tiempo restante:"), 1, 0)
+        self.tiempo_label = QLabel("--- s")
+        info_layout.addWidget(self.tiempo_label, 1, 1)
+        
+        # Distancia sensor (solo local)
+        info_layout.addWidget(QLabel("Distancia (local):"), 2, 0)
+        self.distancia_label = QLabel("--- cm")
+        info_layout.addWidget(self.distancia_label, 2, 1)
+        
+        # Vehículo detectado
+        info_layout.addWidget(QLabel("Vehículo:"), 3, 0)
+        self.vehiculo_label = QLabel("NO")
+        info_layout.addWidget(self.vehiculo_label, 3, 1)
+        
+        # Prioridad
+        info_layout.addWidget(QLabel("Prioridad:"), 4, 0)
+        self.prioridad_label = QLabel("---")
+        info_layout.addWidget(self.prioridad_label, 4, 1)
+        
+        # Estado remoto
+        info_layout.addWidget(QLabel("Vía remota:"), 5, 0)
+        self.remoto_label = QLabel("---")
+        info_layout.addWidget(self.remoto_label, 5, 1)
+        
+        # Sincronización
+        info_layout.addWidget(QLabel("Sincronización:"), 6, 0)
+        self.sync_label = QLabel("---")
+        info_layout.addWidget(self.sync_label, 6, 1)
+        
+        info_group.setLayout(info_layout)
+        
+        # Barra de distancia visual
+        dist_group = QGroupBox("Sensor Ultrasónico")
+        dist_layout = QVBoxLayout()
+        self.distancia_bar = QProgressBar()
+        self.distancia_bar.setMaximum(400)  # 0-400 cm
+        self.distancia_bar.setValue(400)
+        self.distancia_bar.setTextVisible(True)
+        self.distancia_bar.setFormat("%v cm")
+        dist_layout.addWidget(self.distancia_bar)
+        
+        # Historial: distancia (mín/máx por píxel), estado y request
+        history_layout = QHBoxLayout()
+        history_layout.addWidget(QLabel("Historial:"))
+        self.chart_window_combo = QComboBox()
+        self.chart_window_combo.addItems(CHART_WINDOWS)
+        history_layout.addWidget(self.chart_window_combo)
+        history_layout.addStretch()
+        dist_layout.addLayout(history_layout)
+        self.chart = SeriesChart(self.series)
+        self.chart_window_combo.currentTextChanged.connect(
+            lambda text: self.chart.set_window(CHART_WINDOWS[text])
+        )
+        dist_layout.addWidget(self.chart)
+        dist_group.setLayout(dist_layout)
+        
+        # Estadísticas ESP-NOW
+        espnow_group = QGroupBox("ESP-NOW")
+        espnow_layout = QGridLayout()
+        
+        espnow_layout.addWidget(QLabel("Mensajes TX:"), 0, 0)
+        self.tx_count_label = QLabel("0")
+        espnow_layout.addWidget(self.tx_count_label, 0, 1)
+        
+        espnow_layout.addWidget(QLabel("Mensajes RX:"), 1, 0)
+        self.rx_count_label = QLabel("0")
+        espnow_layout.addWidget(self.rx_count_label, 1, 1)
+        
+        espnow_layout.addWidget(QLabel("Último TX:"), 2, 0)
+        self.last_tx_label = QLabel("---")
+        espnow_layout.addWidget(self.last_tx_label, 2, 1)
+        
+        espnow_layout.addWidget(QLabel("Enlace RX:"), 3, 0)
+        self.link_label = QLabel("---")
+        self.link_label.setToolTip("Mensajes del peer en la ventana: pérdida, duplicados, "
+                                   "desorden, jitter y retardo medido en el monitor")
+        espnow_layout.addWidget(self.link_label, 3, 1)
+        
+        espnow_layout.addWidget(QLabel("Reloj:"), 4, 0)
+        self.clock_label = QLabel("---")
+        self.clock_label.setToolTip("millis() del nodo frente al reloj del monitor: offset, "
+                                    "deriva del cristal y residuo del ajuste")
+        espnow_layout.addWidget(self.clock_label, 4, 1)
+        
+        espnow_group.setLayout(espnow_layout)
+        
+        # Ensamblar layout
+        main_layout.addWidget(title)
+        main_layout.addWidget(led_group)
+        main_layout.addWidget(info_group)
+        main_layout.addWidget(dist_group)
+        main_layout.addWidget(espnow_group)
+        main_layout.addStretch()
+        
+        self.setLayout(main_layout)
+        self._distancia_style = None
+    
+    def set_port(self, port):
+        """Mostrar el puerto asignado en el título"""
+        suffix = f" ({port})" if port else ""
+        self.title_label.setText(f"SEMÁFORO {self.semaforo_id}{suffix}")
+    
+    def render(self):
+        """Dibujar los campos del modelo que cambiaron desde el último frame"""
+        state = self.state
+        if state.version == self._rendered_version:
+            return 0
+        applied = 0
+        rendered = self._rendered
+        for name in FIELDS:
+            value = getattr(state, name)
+            if rendered[name] != value:
+                rendered[name] = value
+                applied += self._renderers[name](self, value)
+        self._rendered_version = state.version
+        self.applied_updates += applied
+        self.frames += 1
+        return applied
+    
+    def render_stats(self):
+        """Escrituras pedidas por eventos vs. aplicadas a widgets"""
+        requested = self.state.writes
+        return {
+            'requested': requested,
+            'applied': self.applied_updates,
+            'coalesced': max(requested - self.applied_updates, 0),
+            'frames': self.frames,
+        }
+    
+    def update_estado(self, estado):
+        """Actualizar estado del semáforo y LEDs"""
+        self.estado_label.setText(estado)
+        self.estado_label.setStyleSheet(ESTADO_STYLES.get(estado, ESTADO_STYLE_DEFAULT))
+        # Actualizar LEDs (solo los que cambian)
+        applied = 2
+        applied += self.led_rojo.set_state(estado in ['ROJO', 'ALL RED'])
+        applied += self.led_amarillo.set_state(estado == 'AMARILLO')
+        applied += self.led_verde.set_state(estado == 'VERDE')
+        return applied
+
+    def update_prioridad(self, prioridad):
+        """Actualizar visualización de prioridad local/remota"""
+        text, style = PRIORIDAD_VIEWS[prioridad]
+        self.prioridad_label.setText(text)
+        self.prioridad_label.setStyleSheet(style)
+        return 2
+
+    def update_estado_remoto(self, estado_remoto):
+        """Actualizar visualización de estado remoto"""
+        self.remoto_label.setText(estado_remoto)
+        self.remoto_label.setStyleSheet(REMOTO_STYLES.get(estado_remoto, REMOTO_STYLE_DEFAULT))
+        return 2
+    
+    def update_distancia(self, dist):
+        """Actualizar distancia del sensor"""
+        if dist is None:
+            return 0
+        self.distancia_label.setText(f"{dist} cm")
+        
+        # Actualizar barra (invertida: menor distancia = más lleno)
+        self.distancia_bar.setValue(400 - min(dist, 400))
+        
+        # Color según proximidad (solo si cambia de franja)
+        if dist < 50:
+            style = DISTANCIA_STYLES['red']
+        elif dist < 100:
+            style = DISTANCIA_STYLES['orange']
+        else:
+            style = DISTANCIA_STYLES['green']
+        if style is self._distancia_style:
+            return 2
+        self._distancia_style = style
+        self.distancia_bar.setStyleSheet(style)
+        return 3
+    
+    def update_vehiculo(self, detectado):
+        """Actualizar detección de vehículo"""
+        self.vehiculo_label.setText("SÍ" if detectado else "NO")
+        self.vehiculo_label.setStyleSheet(VEHICULO_STYLES[detectado])
+        return 2
+    
+    def update_sync(self, sync):
+        """Actualizar estado de sincronización ESP-NOW"""
+        status, mac = sync
+        text, style = SYNC_VIEWS[status]
+        self.sync_label.setText(text.format(mac=mac))
+        self.sync_label.setStyleSheet(style)
+        return 2
+    
+    def update_tx_count(self, count):
+        self.tx_count_label.setText(str(count))
+        return 1
+    
+    def update_rx_count(self, count):
+        self.rx_count_label.setText(str(count))
+        return 1
+    
+    def update_link(self, stats):
+        """Calidad del enlace que llega a este nodo (stats de LinkAnalyzer.incoming)"""
+        if stats is None or not stats['sent']:
+            text = "---"
+        else:
+            text = (f"pérdida {stats['loss_pct']:.1f}% | dup {stats['duplicates']} | "
+                    f"desorden {stats['reordered']} | jitter {stats['jitter_ms']:.1f} ms | "
+                    f"retardo {stats['delay_mean_ms']:.1f} ms")
+        if text != self.link_label.text():
+            self.link_label.setText(text)
+    
+    def update_clock(self, stats):
+        """Alineación del reloj del nodo (stats de ClockSync.stats)"""
+        if stats is None:
+            text = "---"
+        else:
+            text = (f"offset {stats['offset_ms'] / 1000:.3f} s | deriva {stats['drift_ppm']:+.1f} ppm | "
+                    f"residuo {stats['residual_ms']:.1f} ms")
+        if text != self.clock_label.text():
+            self.clock_label.setText(text)
+    
+    def update_last_tx(self, text):
+        self.last_tx_label.setText(text)
+        return 1
+    
+    _renderers = {
+        'estado': update_estado,
+        'distancia': update_distancia,
+        'vehiculo': update_vehiculo,
+        'prioridad': update_prioridad,
+        'remoto': update_estado_remoto,
+        'sync': update_sync,
+        'tx_count': update_tx_count,
+        'rx_count': update_rx_count,
+        'last_tx': update_last_tx,
+    }
+
+
+class LogView(QPlainTextEdit):
+    """Vista de log acotada: filtra el LogBuffer compartido e inserta en lote"""
+    def __init__(self, node=None, capacity=DEFAULT_CAPACITY):
+        super().__init__()
+        self.node = node  # None = todas las líneas (log combinado)
+        self.last_seq = -1
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(capacity)
+        self.setUndoRedoEnabled(False)
+        self.setStyleSheet("background-color: #1e1e1e; color: #00ff00; font-family: 'Courier New';")
+    
+    def append_entries(self, entries):
+        """Agregar en un solo bloque las entradas nuevas que corresponden a esta vista"""
+        if self.node is None:
+            lines = [entry.text for entry in entries]
+        else:
+            lines = [entry.text for entry in entries if entry.node == self.node]
+        if entries:
+            self.last_seq = max(self.last_seq, max(entry.seq for entry in entries))
+        if lines:
+            self.appendPlainText("\n".join(lines))
+    
+    def reset(self):
+        self.clear()
+        self.last_seq = -1
+
+
+class SearchView(QWidget):
+    """Búsqueda indexada en las sesiones grabadas (monitor_index)"""
+    def __init__(self, record_dir):
+        super().__init__()
+        self.record_dir = record_dir
+        self.indexes = {}  # base -> SessionIndex
+        layout = QVBoxLayout()
+        row = QHBoxLayout()
+        self.session_combo = QComboBox()
+        self.session_combo.setMinimumWidth(200)
+        refresh_btn = QPushButton("🔄")
+        refresh_btn.clicked.connect(self.refresh_sessions)
+        row.addWidget(QLabel("Sesión:"))
+        row.addWidget(self.session_combo, 1)
+        row.addWidget(refresh_btn)
+        layout.addLayout(row)
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText(
+            "nodo:B tipo:TX_ERROR desde:14:00 hasta:14:05 · tipo:TRANSITION cerca:SYNC=SIN_SYNC ventana:2 · texto"
+        )
+        self.query_edit.returnPressed.connect(self.run_search)
+        layout.addWidget(self.query_edit)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        self.results = QPlainTextEdit()
+        self.results.setReadOnly(True)
+        self.results.setUndoRedoEnabled(False)
+        self.results.setStyleSheet("background-color: #1e1e1e; color: #00ff00; font-family: 'Courier New';")
+        layout.addWidget(self.results)
+        self.setLayout(layout)
+        self.refresh_sessions()
+    
+    def refresh_sessions(self):
+        """Listar las sesiones de la carpeta de grabación (la más reciente primero)"""
+        current = self.session_combo.currentData()
+        self.session_combo.clear()
+        directory = self.record_dir
+        names = sorted(
+            (name[:-len(EVT_SUFFIX)] for name in os.listdir(directory) if name.endswith(EVT_SUFFIX)),
+            reverse=True
+        ) if os.path.isdir(directory) else []
+        for name in names:
+            self.session_combo.addItem(name, os.path.join(directory, name))
+        if current is not None:
+            index = self.session_combo.findData(current)
+            if index >= 0:
+                self.session_combo.setCurrentIndex(index)
+    
+    def run_search(self):
+        base = self.session_combo.currentData()
+        query = self.query_edit.text().strip()
+        if base is None or not query:
+            return
+        start = time.perf_counter()
+        try:
+            index = self.indexes.get(base)
+            if index is None:
+                index = self.indexes[base] = SessionIndex(base)
+            else:
+                index.refresh()  # La sesión puede seguir grabándose
+            results = run_query(index, query)
+        except (OSError, ValueError) as e:
+            self.status_label.setText(f"❌ {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.results.setPlainText("\n".join(format_record(record) for record in results))
+        self.status_label.setText(
+            f"{len(results)} resultados en {elapsed_ms:.1f} ms ({len(index)} bloques indexados)"
+        )
+
+
+class OverviewTable(QTableWidget):
+    """Resumen compacto: una fila por nodo, se actualiza solo lo que cambió"""
+    COLUMNS = ('Nodo', 'Puerto', 'Estado', 'Vía remota', 'Distancia', 'Vehículo',
+               'Prioridad', 'Sincronización', 'TX', 'RX')
+    
+    def __init__(self):
+        super().__init__(0, len(self.COLUMNS))
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self._rows = {}      # node_id -> fila
+        self._versions = {}  # node_id -> versión del modelo mostrada
+    
+    def add_node(self, node_id, port):
+        row = self.rowCount()
+        self.insertRow(row)
+        for column in range(len(self.COLUMNS)):
+            self.setItem(row, column, QTableWidgetItem(""))
+        self._rows[node_id] = row
+        self._versions[node_id] = -1
+        self.item(row, 0).setText(node_id)
+        self.set_port(node_id, port)
+    
+    def set_port(self, node_id, port):
+        self.item(self._rows[node_id], 1).setText(port or "---")
+    
+    def refresh(self, panels):
+        """Reescribir las filas de los nodos cuyo modelo cambió"""
+        for node_id, panel in panels.items():
+            state = panel.state
+            if self._versions[node_id] == state.version:
+                continue
+            self._versions[node_id] = state.version
+            row = self._rows[node_id]
+            dist = '---' if state.distancia is None else f"{state.distancia} cm"
+            status, mac = state.sync
+            values = (
+                state.estado, state.remoto, dist, "SÍ" if state.vehiculo else "NO",
+                PRIORIDAD_VIEWS[state.prioridad][0], SYNC_VIEWS[status][0].format(mac=mac),
+                str(state.tx_count), str(state.rx_count),
+            )
+            for column, value in enumerate(values, start=2):
+                item = self.item(row, column)
+                if item.text() != value:
+                    item.setText(value)
+
+
+class MainWindow(QMainWindow):
+    """Ventana principal de la aplicación"""
+    # Altas/bajas de puertos desde el thread de PortWatcher (llegan encoladas al thread de la UI)
+    ports_changed = pyqtSignal(list, list)
+    
+    def __init__(self, refresh_hz=30, log_capacity=DEFAULT_CAPACITY, record_dir="sesiones",
+                 nodes=None, grid_columns=4, transport=TRANSPORT_THREADS,
+                 metrics_port=None, metrics_host=METRICS_HOST):
+        super().__init__()
+        self.serial_readers = {}
+        if transport == TRANSPORT_ASYNCIO and sys.platform == "win32":
+            transport = TRANSPORT_THREADS  # Los puertos COM no son descriptores seleccionables
+        self.transport = transport
+        self.serial_hub = None  # AsyncSerialHub (solo con transport="asyncio")
+        # Registro de nodos: node_id -> panel / puerto / vista de log
+        self.panels = {}
+        self.node_ports = {}
+        self.node_log_views = {}
+        self.grid_columns = grid_columns  # Paneles por fila en la vista de paneles
+        self.record_dir = record_dir  # Carpeta de las sesiones grabadas
+        self.recorder = None
+        self.refresh_hz = refresh_hz  # Máximo de repintados de paneles (y logs) por segundo
+        self.log_capacity = log_capacity  # Líneas de log conservadas
+        # Latencia desde la lectura de los bytes hasta el frame que los muestra
+        self.ui_latency = LatencyStats()
+        # Espera de cada lote entre la lectura de sus bytes y su manejo en el thread de la UI
+        self.queue_latency = LatencyStats()
+        # Líneas recibidas y tiempo de parseo de los lectores ya detenidos
+        self.lines_total = 0
+        self._lines_reported = 0
+        self._stats_time = time.monotonic()
+        self.parse_totals = ParseStats()
+        self._pending_read_ns = {}  # port_id -> lectura más antigua aún no dibujada
+        # Reloj, enlace y enclavamiento A/B: el mismo flujo que el modo sin interfaz y la reproducción
+        self.pipeline = EventPipeline(on_violation=self.on_interlock_violation)
+        self.link = self.pipeline.link
+        self.interlock = self.pipeline.interlock
+        self.clocks = self.pipeline.clocks
+        # El log combinado retiene las líneas este tiempo para ordenarlas entre puertos
+        self.log_order_ms = 60
+        self._log_seq = -1
+        self._log_pending = []
+        # Inventario de puertos en segundo plano: la lista se llena sin escanear en la UI
+        self.port_watcher = PortWatcher(on_change=self.ports_changed.emit)
+        self._ports_listed = False
+        self.ports_changed.connect(self.on_ports_changed)
+        self.init_ui()
+        for node_id, port in (nodes or {"A": None, "B": None}).items():
+            self.add_node(node_id, port)
+        
+        # Repintado de paneles a ritmo fijo
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.render_panels)
+        self.render_timer.start(max(1, round(1000 / refresh_hz)))
+        
+        # Medición de actualizaciones aplicadas vs. agrupadas
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_render_stats)
+        self.stats_timer.start(1000)
+        
+        self.port_watcher.start()
+        
+        # Exportador Prometheus (instantánea publicada junto con las estadísticas)
+        self.metrics = None
+        if metrics_port is not None:
+            exporter = MetricsExporter(metrics_host, metrics_port)
+            try:
+                exporter.start()
+            except OSError as e:
+                self.append_log("combined", f"❌ Métricas: no se pudo abrir {metrics_host}:{metrics_port} - {e}")
+            else:
+                self.metrics = exporter
+                self.append_log("combined", f"📈 Métricas en {exporter.url}")
+    
+    def init_ui(self):
+        self.setWindowTitle("Monitor de Semáforos Inteligentes - ESP32 ESP-NOW")
+        self.setGeometry(100, 100, 1400, 900)
+        
+        # Widget central
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        main_layout = QVBoxLayout()
+        
+        # Barra de control superior
+        control_layout = QHBoxLayout()
+        
+        # Selector de puerto: se asigna al siguiente nodo libre con "Agregar Nodo"
+        control_layout.addWidget(QLabel("Puerto COM:"))
+        self.port_combo = QComboBox()
+        control_layout.addWidget(self.port_combo)
+        
+        # Llenar el combo DESPUÉS de crearlo
+        self.refresh_ports()
+        
+        self.add_node_btn = QPushButton("➕ Agregar Nodo")
+        self.add_node_btn.clicked.connect(self.add_node_from_combo)
+        self.add_node_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #607D8B;
+                color: white;
+                font-weight: bold;
+                padding: 8px 16px;
+                border-radius: 6px;
+                border: none;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #546E7A;
+            }
+            QPushButton:pressed {
+                background-color: #37474F;
+            }
+        """)
+        control_layout.addWidget(self.add_node_btn)
+        
+        # Botones con mejor diseño UI/UX
+        self.refresh_btn = QPushButton("🔄 Actualizar Puertos")
+        self.refresh_btn.clicked.connect(self.port_watcher.rescan)
+        self.refresh_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                font-weight: bold;
+                padding: 8px 16px;
+                border-radius: 6px;
+                border: none;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+            QPushButton:pressed {
+                background-color: #0D47A1;
+            }
+        """)
+        control_layout.addWidget(self.refresh_btn)
+        
+        self.connect_btn = QPushButton("▶ Conectar")
+        self.connect_btn.clicked.connect(self.toggle_connection)
+        self.connect_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                font-weight: bold;
+                padding: 10px 24px;
+                border-radius: 6px;
+                border: none;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+            QPushButton:pressed {
+                background-color: #388E3C;
+            }
+        """)
+        control_layout.addWidget(self.connect_btn)
+        
+        self.clear_btn = QPushButton("🗑 Limpiar Logs")
+        self.clear_btn.clicked.connect(self.clear_logs)
+        self.clear_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #FF9800;
+                color: white;
+                font-weight: bold;
+                padding: 8px 16px;
+                border-radius: 6px;
+                border: none;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #F57C00;
+            }
+            QPushButton:pressed {
+                background-color: #E65100;
+            }
+        """)
+        control_layout.addWidget(self.clear_btn)
+        
+        self.record_btn = QPushButton("⏺ Grabar Sesión")
+        self.record_btn.setCheckable(True)
+        self.record_btn.clicked.connect(self.toggle_recording)
+        self.record_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;
+                color: white;
+                font-weight: bold;
+                padding: 8px 16px;
+                border-radius: 6px;
+                border: none;
+                font-size: 12px;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+            QPushButton:checked {
+                background-color: #f44336;
+            }
+        """)
+        control_layout.addWidget(self.record_btn)
+        
+        control_layout.addStretch()
+        
+        # Splitter principal (paneles de semáforos + logs)
+        main_splitter = QSplitter(Qt.Orientation.Horizontal)
+        
+        # Panel izquierdo: Semáforos (cuadrícula con scroll) y resumen por nodo
+        self.node_tabs = QTabWidget()
+        grid_widget = QWidget()
+        self.panels_grid = QGridLayout()
+        grid_widget.setLayout(self.panels_grid)
+        self.panels_scroll = QScrollArea()
+        self.panels_scroll.setWidgetResizable(True)
+        self.panels_scroll.setWidget(grid_widget)
+        self.overview = OverviewTable()
+        self.node_tabs.addTab(self.panels_scroll, "Paneles")
+        self.node_tabs.addTab(self.overview, "Resumen")
+        
+        # Panel derecho: Logs
+        logs_widget = QWidget()
+        logs_layout = QVBoxLayout()
+        
+        # Tabs para logs separados
+        self.log_tabs = QTabWidget()
+        
+        # Un solo buffer de líneas; las pestañas son vistas filtradas
+        # (el combinado primero, las de cada nodo se crean en add_node)
+        self.log_buffer = LogBuffer(self.log_capacity)
+        self.log_combined = LogView(None, self.log_capacity)
+        self.log_views = [self.log_combined]
+        self.log_tabs.addTab(self.log_combined, "Log Combinado")
+        self.search_view = SearchView(self.record_dir)
+        self.log_tabs.addTab(self.search_view, "🔎 Búsqueda")
+        
+        logs_layout.addWidget(QLabel("Logs en Tiempo Real"))
+        logs_layout.addWidget(self.log_tabs)
+        logs_widget.setLayout(logs_layout)
+        
+        main_splitter.addWidget(self.node_tabs)
+        main_splitter.addWidget(logs_widget)
+        main_splitter.setSizes([700, 700])
+        
+        # Ensamblar layout principal
+        main_layout.addLayout(control_layout)
+        main_layout.addWidget(main_splitter)
+        
+        central_widget.setLayout(main_layout)
+        
+        # Barra de estado con estadísticas de render
+        self.stats_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.stats_label)
+        self.interlock_label = QLabel("🛡️ Enclavamiento: OK")
+        self.statusBar().addPermanentWidget(self.interlock_label)
+        
+        # Estado de conexión
+        self.connected = False
+    
+    def refresh_ports(self):
+        """Actualizar lista de puertos COM disponibles (desde el inventario, sin escanear)"""
+        ports = self.port_watcher.ports()
+        current = self.port_combo.currentText()
+        
+        self.port_combo.clear()
+        
+        if ports:
+            for info in ports:
+                self.port_combo.addItem(info.device)
+                self.port_combo.setItemData(self.port_combo.count() - 1, describe_port(info),
+                                            Qt.ItemDataRole.ToolTipRole)
+            index = self.port_combo.findText(current)
+            if index >= 0:
+                self.port_combo.setCurrentIndex(index)
+        else:
+            self.port_combo.addItem("No hay puertos disponibles")
+    
+    def on_ports_changed(self, added, removed):
+        """Actualizar la lista al conectar o desconectar un dispositivo"""
+        if self._ports_listed:  # El primer aviso es el escaneo inicial
+            for info in added:
+                self.append_log("combined", f"🔌 Puerto conectado: {describe_port(info)}")
+            for info in removed:
+                self.append_log("combined", f"🔌 Puerto desconectado: {info.device}")
+        self._ports_listed = True
+        self.refresh_ports()
+    
+    def next_node_id(self):
+        """Primer identificador libre: A, B, ..., Z, luego N27, N28, ..."""
+        for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+            if letter not in self.panels:
+                return letter
+        n = 27
+        while f"N{n}" in self.panels:
+            n += 1
+        return f"N{n}"
+    
+    def add_node_from_combo(self):
+        """Asignar el puerto elegido al primer nodo sin puerto (o a uno nuevo)"""
+        port = self.port_combo.currentText()
+        if not port or "No hay puertos" in port:
+            self.append_log("combined", "ERROR: Selecciona un puerto COM válido")
+            return
+        free = [node_id for node_id, p in self.node_ports.items() if p is None]
+        self.add_node(free[0] if free else self.next_node_id(), port)
+    
+    def add_node(self, node_id, port=None):
+        """Registrar un nodo (panel, fila de resumen y log) y asignarle un puerto"""
+        if port is not None:
+            for other, other_port in self.node_ports.items():
+                if other_port == port and other != node_id:
+                    self.append_log("combined", f"ERROR: {port} ya está asignado al nodo {other}")
+                    return None
+        panel = self.panels.get(node_id)
+        if panel is None:
+            panel = SemaforoPanel(node_id)
+            index = len(self.panels)
+            self.panels[node_id] = panel
+            self.panels_grid.addWidget(panel, index // self.grid_columns, index % self.grid_columns)
+            self.overview.add_node(node_id, port)
+            view = LogView(node_id, self.log_capacity)
+            view.last_seq = self._log_seq
+            self.node_log_views[node_id] = view
+            self.log_views.append(view)
+            self.log_tabs.insertTab(self.log_tabs.indexOf(self.log_combined), view, f"Log Semáforo {node_id}")
+            self.pipeline.add_node(node_id, panel.state)
+        self.node_ports[node_id] = port
+        panel.set_port(port)
+        self.overview.set_port(node_id, port)
+        if port is not None:
+            self.append_log("combined", f"Nodo {node_id} -> {port}")
+            if self.connected:
+                self.start_reader(node_id)
+        return panel
+    
+    def start_reader(self, node_id):
+        """Crear y arrancar el SerialReader de un nodo (o registrarlo en el hub asyncio)"""
+        if self.transport == TRANSPORT_ASYNCIO:
+            if self.serial_hub is None:
+                self.serial_hub = AsyncSerialHub(port_watcher=self.port_watcher)
+                self.serial_hub.lines_parsed.connect(self.on_lines_parsed)
+                self.serial_hub.connection_status.connect(self.on_connection_status)
+                self.serial_hub.start()
+            self.serial_hub.add_port(node_id, self.node_ports[node_id])
+            return
+        old = self.serial_readers.pop(node_id, None)
+        if old is not None:
+            old.stop()
+            old.wait(2000)
+            self.parse_totals.merge(old.core.parse_stats)
+        reader = SerialReader(self.node_ports[node_id], 115200, node_id, port_watcher=self.port_watcher)
+        reader.lines_parsed.connect(self.on_lines_parsed)
+        reader.connection_status.connect(self.on_connection_status)
+        self.serial_readers[node_id] = reader
+        reader.start()
+    
+    def toggle_connection(self):
+        """Conectar o desconectar los puertos seriales"""
+        if not self.connected:
+            # Conectar
+            nodes = [node_id for node_id, port in self.node_ports.items() if port is not None]
+            if not nodes:
+                self.append_log("combined", "ERROR: Asigna un puerto COM a algún nodo (➕ Agregar Nodo)")
+                return
+            
+            try:
+                self.append_log("combined", f"=== Iniciando conexión... ===")
+                
+                # Un lector por nodo con puerto asignado
+                for node_id in nodes:
+                    self.start_reader(node_id)
+                
+                self.connected = True
+                self.connect_btn.setText("⏹ Desconectar")
+                self.connect_btn.setStyleSheet("""
+                    QPushButton {
+                        background-color: #f44336;
+                        color: white;
+                        font-weight: bold;
+                        padding: 10px 24px;
+                        border-radius: 6px;
+                        border: none;
+                        font-size: 14px;
+                    }
+                    QPushButton:hover {
+                        background-color: #da190b;
+                    }
+                    QPushButton:pressed {
+                        background-color: #a30000;
+                    }
+                """)
+                
+            except Exception as e:
+                self.append_log("combined", f"ERROR al iniciar conexión: {e}")
+        else:
+            # Desconectar
+            self.append_log("combined", "=== Desconectando... ===")
+            
+            self.stop_readers()
+            self.connected = False
+            self.connect_btn.setText("▶ Conectar")
+            self.connect_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #4CAF50;
+                    color: white;
+                    font-weight: bold;
+                    padding: 10px 24px;
+                    border-radius: 6px;
+                    border: none;
+                    font-size: 14px;
+                }
+                QPushButton:hover {
+                    background-color: #45a049;
+                }
+                QPushButton:pressed {
+                    background-color: #388E3C;
+                }
+            """)
+            
+            self.append_log("combined", "=== DESCONECTADO ===")
+    
+    def stop_readers(self, timeout_ms=2000):
+        """Detener los lectores (o el hub asyncio) y esperar a que terminen"""
+        for reader in self.serial_readers.values():
+            reader.stop()
+            reader.wait(timeout_ms)
+            self.parse_totals.merge(reader.core.parse_stats)
+        self.serial_readers.clear()
+        if self.serial_hub is not None:
+            self.serial_hub.stop()
+            self.serial_hub.wait(timeout_ms)
+            self.parse_totals.merge(self.serial_hub.core.parse_stats)
+            self.serial_hub = None
+    
+    def on_connection_status(self, port_id, message):
+        """Manejar mensajes de estado de conexión"""
+        self.append_log("combined", f"[{port_id}] {message}")
+        # El lector puede reencontrar el dispositivo en otro puerto (número de serie USB)
+        source = self.serial_readers.get(port_id)
+        if source is not None:
+            source = source.core
+        elif self.serial_hub is not None:
+            source = self.serial_hub.core.channels.get(port_id)
+        if source is None:
+            return
+        port = source.port
+        if port != self.node_ports.get(port_id):
+            self.node_ports[port_id] = port
+            self.panels[port_id].set_port(port)
+            self.overview.set_port(port_id, port)
+    
+    def on_lines_parsed(self, port_id, items):
+        """Registrar un lote de líneas ya selladas y parseadas por SerialReader"""
+        add_sample = self.panels[port_id].series.append_event
+        append = self.log_buffer.append
+        now = time.monotonic_ns()
+        self.lines_total += len(items)
+        if items[0].t_read_ns:
+            self.queue_latency.add(now - items[0].t_read_ns)
+        if port_id not in self._pending_read_ns and items[0].t_read_ns:
+            self._pending_read_ns[port_id] = items[0].t_read_ns
+        if self.recorder is not None:
+            # Solo se encola el lote; la escritura ocurre en el thread del grabador
+            self.recorder.record_batch(port_id, items)
+        def on_line(item, t_ns):
+            # Una sola copia en el buffer: la ven el log del nodo y el combinado
+            append(port_id, f"[{item.stamp}] [{port_id}] {item.text}", t_ns)
+            if item.event is not None:
+                add_sample(t_ns, item.event)
+        # Solo aplicar los cambios de estado (el parseo ya ocurrió en el thread lector)
+        self.pipeline.process(port_id, items, now, on_line)
+    
+    def render_panels(self):
+        """Dibujar los paneles a ritmo fijo, agrupando los cambios acumulados"""
+        for panel in self.panels.values():
+            # Los paneles fuera de la zona visible se dibujan al volver a verse
+            if not panel.visibleRegion().isEmpty():
+                panel.render()
+                panel.chart.refresh()
+        if self.overview.isVisible():
+            self.overview.refresh(self.panels)
+        self.flush_logs()
+        if self._pending_read_ns:
+            now = time.monotonic_ns()
+            for t_read_ns in self._pending_read_ns.values():
+                self.ui_latency.add(now - t_read_ns)
+            self._pending_read_ns.clear()
+    
+    def flush_logs(self):
+        """Insertar en las vistas, en un lote por tick, las líneas nuevas del buffer"""
+        new = self.log_buffer.since(self._log_seq)
+        if new:
+            self._log_seq = new[-1].seq
+            self._log_pending.extend(new)
+            # Repartir por nodo en una sola pasada
+            by_node = {}
+            for entry in new:
+                if entry.node is not None:
+                    by_node.setdefault(entry.node, []).append(entry)
+            for node_id, entries in by_node.items():
+                view = self.node_log_views.get(node_id)
+                if view is not None:
+                    view.append_entries(entries)
+        pending = self._log_pending
+        if not pending:
+            return
+        # Log combinado por hora estimada de generación: las líneas de los últimos
+        # log_order_ms esperan por si otro puerto entrega después una anterior
+        pending.sort(key=attrgetter('t_ns'))
+        cutoff = time.monotonic_ns() - self.log_order_ms * 1_000_000
+        ready = len(pending)
+        for index, entry in enumerate(pending):
+            if entry.t_ns > cutoff:
+                ready = index
+                break
+        if ready:
+            self.log_combined.append_entries(pending[:ready])
+            del pending[:ready]
+    
+    def render_stats(self):
+        """Estadísticas de render por panel (escrituras pedidas/aplicadas/agrupadas)"""
+        return {node_id: panel.render_stats() for node_id, panel in self.panels.items()}
+    
+    def update_render_stats(self):
+        requested = applied = frames = 0
+        for stats in self.render_stats().values():
+            requested += stats['requested']
+            applied += stats['applied']
+            frames += stats['frames']
+        now = time.monotonic_ns()
+        for node_id, panel in self.panels.items():
+            panel.update_link(self.link.incoming(node_id, now))
+            panel.update_clock(self.clocks.stats(node_id))
+        latency = self.ui_latency.summary_ms()
+        self.ui_latency.reset_max()
+        queue = self.queue_latency.summary_ms()
+        self.queue_latency.reset_max()
+        if self.metrics is not None:
+            self.publish_metrics(now, queue, latency)
+        self.stats_label.setText(
+            f"UI {self.refresh_hz} Hz | frames: {frames} | "
+            f"actualizaciones aplicadas: {applied} | agrupadas: {max(requested - applied, 0)} | "
+            f"cola lectura→UI: {queue['mean_ms']:.1f} ms (máx {queue['max_ms']:.1f} ms) | "
+            f"lectura→pantalla: {latency['mean_ms']:.1f} ms (máx {latency['max_ms']:.1f} ms)"
+        )
+    
+    def parse_stats(self):
+        """Totales de parseo: lectores detenidos más los activos"""
+        stats = ParseStats()
+        stats.merge(self.parse_totals)
+        for reader in self.serial_readers.values():
+            stats.merge(reader.core.parse_stats)
+        if self.serial_hub is not None:
+            stats.merge(self.serial_hub.core.parse_stats)
+        return stats
+    
+    def publish_metrics(self, now_ns, queue_latency, ui_latency):
+        """Armar la instantánea de métricas y entregarla al exportador"""
+        elapsed = time.monotonic() - self._stats_time
+        self._stats_time += elapsed
+        lines_per_s = (self.lines_total - self._lines_reported) / elapsed if elapsed > 0 else 0.0
+        self._lines_reported = self.lines_total
+        samples = []
+        for node_id, panel in self.panels.items():
+            samples.extend(node_samples(node_id, panel.state))
+        for node_id, reader in self.serial_readers.items():
+            samples.extend(reader_samples(node_id, reader.core))
+        if self.serial_hub is not None:
+            channels = self.serial_hub.core.channels
+            for node_id, port in self.node_ports.items():
+                if port:
+                    samples.extend(reader_samples(node_id, channels.get(node_id)))
+        samples.extend(analytics_samples(
+            self.link.stats(now_ns),
+            {node_id: self.clocks.stats(node_id) for node_id in self.panels},
+            self.interlock.counts
+        ))
+        samples.extend(pipeline_samples(
+            self.lines_total, lines_per_s, self.parse_stats(), queue_latency, ui_latency,
+            self.recorder.dropped_batches if self.recorder is not None else 0
+        ))
+        self.metrics.publish(samples)
+    
+    def on_interlock_violation(self, violation):
+        """Registrar en los logs un incumplimiento detectado por InterlockVerifier"""
+        text = f"[ENCLAVAMIENTO] {violation.kind}: {violation.detail}"
+        self.append_log("combined", text)
+        self.append_log(violation.node, text)
+        counts = self.interlock.counts
+        violations = sum(n for kind, n in counts.items() if kind != FALLBACK_PEER_TIMEOUT)
+        summary = ", ".join(f"{kind} {n}" for kind, n in counts.items() if n)
+        icon = "⛔" if violations else "⚠️"
+        self.interlock_label.setText(f"{icon} Enclavamiento: {summary}")
+    
+    def append_log(self, log_type, text):
+        """Agregar línea al buffer de logs ("A", "B" o "combined")"""
+        node = None if log_type == "combined" else log_type
+        self.log_buffer.append(node, text, time.monotonic_ns())
+    
+    def toggle_recording(self):
+        """Iniciar/detener la grabación de la sesión en disco"""
+        if self.recorder is None:
+            name = datetime.now().strftime("sesion_%Y%m%d_%H%M%S")
+            base = os.path.join(self.record_dir, name)
+            self.recorder = SessionRecorder(base, index=IndexWriter(base))
+            self.recorder.start()
+            self.search_view.refresh_sessions()
+            self.record_btn.setText("⏹ Detener Grabación")
+            self.append_log("combined", f"⏺ Grabando en {self.recorder.base_path}")
+        else:
+            self.stop_recording()
+    
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        recorder = self.recorder
+        self.recorder = None
+        recorder.close()
+        self.record_btn.setChecked(False)
+        self.record_btn.setText("⏺ Grabar Sesión")
+        self.append_log(
+            "combined",
+            f"⏹ Sesión guardada: {recorder.rows_written} líneas en {recorder.chunks_written} bloques"
+            + (f" ({recorder.dropped_batches} lotes descartados)" if recorder.dropped_batches else "")
+        )
+    
+    def clear_logs(self):
+        """Limpiar todos los logs"""
+        self.log_buffer.clear()
+        self._log_pending.clear()
+        for view in self.log_views:
+            view.reset()
+        # Las vistas continúan desde la última línea recibida
+        self._log_seq = self.log_buffer.last_seq
+        for view in self.log_views:
+            view.last_seq = self.log_buffer.last_seq
+    
+    def closeEvent(self, event):
+        """Cerrar conexiones al salir"""
+        if self.connected:
+            self.stop_readers()
+        self.stop_recording()
+        if self.metrics is not None:
+            self.metrics.close()
+        self.port_watcher.stop()
+        event.accept()
+
+
+def run_gui(nodes, args, qt_argv):
+    """Abrir la ventana con los argumentos ya interpretados por monitor_semaforos"""
+    app = QApplication(qt_argv)
+    
+    # Estilo moderno
+    app.setStyle('Fusion')
+    
+    # Paleta oscura
+    palette = QPalette()
+    palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
+    palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
+    palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
+    palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
+    palette.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
+    palette.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
+    palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
+    palette.setColor(QPalette.ColorRole.Button, QColor(53, 53, 53))
+    palette.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
+    palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
+    palette.setColor(QPalette.ColorRole.Link, QColor(42, 130, 218))
+    palette.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
+    palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
+    
+    app.setPalette(palette)
+    
+    window = MainWindow(nodes=nodes, transport=args.transport,
+                        metrics_port=args.metrics_port, metrics_host=args.metrics_host)
+    window.show()
+    
+    return app.exec()
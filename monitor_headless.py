@@ -0,0 +1,267 @@
+"""
+Modo sin interfaz del Monitor de Semáforos.
+
+HeadlessMonitor lee los puertos (un SerialReaderCore por thread, o un solo
+AsyncSerialLoop), aplica los eventos con el mismo EventPipeline que la ventana
+(NodeState, LinkAnalyzer, InterlockVerifier, ClockSync) y opcionalmente graba la sesión,
+publica métricas y escribe las líneas en stdout o en un archivo. No importa
+PyQt6: arranca rápido y corre sin pantalla (servidores, Raspberry Pi, jobs de
+registro).
+
+Los lectores dejan sus lotes en una cola y el thread principal los procesa en
+orden, igual que las señales encoladas de Qt en la interfaz.
+
+Uso:
+    python monitor_semaforos.py --headless --node A=/dev/ttyUSB0 --node B=/dev/ttyUSB1 \\
+        --record --metrics-port 9108 --status-interval 30
+"""
+
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+from monitor_reader import SerialReaderCore, TRANSPORT_THREADS, TRANSPORT_ASYNCIO
+from monitor_stats import LatencyStats, ParseStats
+from monitor_pipeline import EventPipeline
+from monitor_metrics import (
+    MetricsExporter, node_samples, reader_samples, analytics_samples, pipeline_samples
+)
+
+
+STATS_INTERVAL_S = 1.0  # Instantánea de métricas (igual que la barra de estado de la interfaz)
+
+
+class HeadlessMonitor:
+    """Lectores, modelo por nodo y salidas (grabación, métricas, texto) sin Qt"""
+    def __init__(self, nodes, transport=TRANSPORT_THREADS, baudrate=115200,
+                 recorder=None, metrics=None, out=None, status_interval_s=10.0):
+        if transport == TRANSPORT_ASYNCIO and sys.platform == "win32":
+            transport = TRANSPORT_THREADS  # Los puertos COM no son descriptores seleccionables
+        self.nodes = dict(nodes)          # node_id -> puerto
+        self.transport = transport
+        self.baudrate = baudrate
+        self.recorder = recorder          # SessionRecorder ya iniciado (o None)
+        self.metrics = metrics            # MetricsExporter ya iniciado (o None)
+        self.out = out                    # Archivo de texto para las líneas (o None)
+        self.status_interval_s = status_interval_s
+        self.pipeline = EventPipeline(on_violation=self.on_violation)
+        for node_id in self.nodes:
+            self.pipeline.add_node(node_id)
+        self.states = self.pipeline.states
+        self.link = self.pipeline.link
+        self.interlock = self.pipeline.interlock
+        self.clocks = self.pipeline.clocks
+        self.queue_latency = LatencyStats()
+        self.lines_total = 0
+        self.lines_per_s = 0.0
+        self._lines_reported = 0
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._readers = []   # SerialReaderCore o AsyncSerialLoop
+        self._threads = []
+
+    # ---------- lectores (callbacks desde sus threads) ----------
+
+    def _on_lines(self, port_id, items):
+        self._queue.put((port_id, items))
+
+    def _on_status(self, port_id, message):
+        self._queue.put((port_id, message))
+
+    def start(self):
+        if self.transport == TRANSPORT_ASYNCIO:
+            from monitor_async import AsyncSerialLoop
+            hub = AsyncSerialLoop(self._on_lines, self._on_status, baudrate=self.baudrate)
+            for node_id, port in self.nodes.items():
+                hub.add_port(node_id, port)
+            self._readers.append(hub)
+            self._threads.append(threading.Thread(target=hub.run, name="AsyncSerialLoop", daemon=True))
+        else:
+            for node_id, port in self.nodes.items():
+                reader = SerialReaderCore(port, self.baudrate, node_id,
+                                          on_lines=self._on_lines, on_status=self._on_status)
+                self._readers.append(reader)
+                self._threads.append(threading.Thread(target=reader.run, name=f"SerialReader-{node_id}",
+                                                      daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Pedir el fin de run() (seguro desde señales y otros threads)"""
+        self._stop.set()
+
+    def close(self, timeout_s=2.0):
+        for reader in self._readers:
+            reader.stop()
+        for thread in self._threads:
+            thread.join(timeout_s)
+        self._drain()
+        self.interlock.flush()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics is not None:
+            self.metrics.close()
+
+    # ---------- procesamiento (thread principal) ----------
+
+    def run(self, duration_s=None):
+        """Procesar lotes hasta stop(), Ctrl+C o duration_s"""
+        start = last_stats = last_status = time.monotonic()
+        deadline = None if duration_s is None else start + duration_s
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                try:
+                    port_id, payload = self._queue.get(timeout=STATS_INTERVAL_S / 4)
+                except queue.Empty:
+                    payload = None
+                if payload is not None:
+                    self._handle(port_id, payload)
+                now = time.monotonic()
+                if now - last_stats >= STATS_INTERVAL_S:
+                    self.publish_metrics(now - last_stats)
+                    last_stats = now
+                if self.status_interval_s and now - last_status >= self.status_interval_s:
+                    print(self.status_line(), file=sys.stderr, flush=True)
+                    last_status = now
+        except KeyboardInterrupt:
+            pass
+
+    def _drain(self):
+        while True:
+            try:
+                port_id, payload = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(port_id, payload)
+
+    def _handle(self, port_id, payload):
+        if type(payload) is str:
+            self._write(f"[{port_id}] {payload}")
+        else:
+            self.process(port_id, payload)
+
+    def process(self, port_id, items):
+        """Registrar un lote de SerialLine (lo mismo que MainWindow.on_lines_parsed)"""
+        if port_id not in self.states:
+            return
+        now = time.monotonic_ns()
+        self.lines_total += len(items)
+        if items[0].t_read_ns:
+            self.queue_latency.add(now - items[0].t_read_ns)
+        if self.recorder is not None:
+            self.recorder.record_batch(port_id, items)
+        self.pipeline.process(port_id, items, now)
+        if self.out is not None:
+            self.out.write("".join(f"[{item.stamp}] [{port_id}] {item.text}\n" for item in items))
+
+    def on_violation(self, violation):
+        text = f"[ENCLAVAMIENTO] {violation.kind}: {violation.detail}"
+        print(text, file=sys.stderr, flush=True)
+        self._write(f"[{violation.node}] {text}")
+
+    def _write(self, text):
+        if self.out is not None:
+            stamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            self.out.write(f"[{stamp}] {text}\n")
+
+    # ---------- estadísticas ----------
+
+    def parse_stats(self):
+        stats = ParseStats()
+        for reader in self._readers:
+            stats.merge(reader.parse_stats)
+        return stats
+
+    def publish_metrics(self, elapsed_s):
+        lines_per_s = (self.lines_total - self._lines_reported) / elapsed_s
+        self._lines_reported = self.lines_total
+        queue_latency = self.queue_latency.summary_ms()
+        self.queue_latency.reset_max()
+        self.lines_per_s = lines_per_s
+        if self.metrics is None:
+            return
+        samples = []
+        for node_id, state in self.states.items():
+            samples.extend(node_samples(node_id, state))
+        for reader in self._readers:
+            if isinstance(reader, SerialReaderCore):
+                samples.extend(reader_samples(reader.port_id, reader))
+            else:  # AsyncSerialLoop: un canal por nodo (aún sin canal = desconectado)
+                for node_id in self.nodes:
+                    samples.extend(reader_samples(node_id, reader.channels.get(node_id)))
+        samples.extend(analytics_samples(
+            self.link.stats(time.monotonic_ns()),
+            {node_id: self.clocks.stats(node_id) for node_id in self.states},
+            self.interlock.counts
+        ))
+        samples.extend(pipeline_samples(
+            self.lines_total, lines_per_s, self.parse_stats(), queue_latency,
+            dropped_batches=self.recorder.dropped_batches if self.recorder is not None else 0
+        ))
+        self.metrics.publish(samples)
+
+    def status_line(self):
+        nodes = " | ".join(
+            f"{node_id}: {state.estado} tx={state.tx_count} rx={state.rx_count} err={state.tx_errors} "
+            f"sync={state.sync[0]}"
+            for node_id, state in self.states.items()
+        )
+        violations = sum(self.interlock.counts.values())
+        return (f"{nodes} | {self.lines_per_s:.0f} líneas/s | "
+                f"enclavamiento: {violations}")
+
+
+def run_headless(nodes, args):
+    """Punto de entrada de `monitor_semaforos.py --headless` (devuelve el código de salida)"""
+    missing = [node_id for node_id, port in (nodes or {}).items() if not port]
+    if not nodes or missing:
+        print("Sin interfaz hay que indicar los puertos: --node A=/dev/ttyUSB0 --node B=/dev/ttyUSB1",
+              file=sys.stderr)
+        return 2
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsExporter(args.metrics_host, args.metrics_port)
+        try:
+            metrics.start()
+        except OSError as e:
+            print(f"❌ Métricas: no se pudo abrir {args.metrics_host}:{args.metrics_port} - {e}",
+                  file=sys.stderr)
+            return 1
+        print(f"📈 Métricas en {metrics.url}", file=sys.stderr)
+    recorder = None
+    if args.record:
+        from monitor_recorder import SessionRecorder
+        from monitor_index import IndexWriter
+        base = os.path.join(args.record_dir, datetime.now().strftime("sesion_%Y%m%d_%H%M%S"))
+        recorder = SessionRecorder(base, index=IndexWriter(base))
+        recorder.start()
+        print(f"⏺ Grabando en {base}", file=sys.stderr)
+    out = None
+    if args.log:
+        out = open(args.log, 'a', encoding='utf-8', buffering=1)
+    elif args.echo:
+        out = sys.stdout
+
+    monitor = HeadlessMonitor(nodes, args.transport, recorder=recorder, metrics=metrics, out=out,
+                              status_interval_s=args.status_interval)
+    # SIGTERM (systemd, docker stop) termina igual que Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: monitor.stop())
+    monitor.start()
+    try:
+        monitor.run(args.duration)
+    finally:
+        monitor.close()
+        if args.log:
+            out.close()
+    print(monitor.status_line(), file=sys.stderr)
+    if recorder is not None:
+        print(f"⏹ Sesión guardada: {recorder.rows_written} líneas en {recorder.chunks_written} bloques",
+              file=sys.stderr)
+    return 0
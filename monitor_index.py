@@ -0,0 +1,472 @@
+"""
+Índice en disco y búsqueda sobre sesiones grabadas del Monitor de Semáforos.
+
+Por cada bloque que escribe SessionRecorder se agrega un registro a
+<base>.idx con:
+
+  - posición del bloque en .evt y del miembro gzip en .raw.gz
+  - tiempo mínimo y máximo del bloque
+  - por nodo, una máscara de los tipos de evento presentes
+  - un filtro de Bloom con las palabras de las líneas (sin números sueltos)
+
+SessionIndex carga esos registros en arreglos NumPy y resuelve una consulta
+descartando primero bloques enteros (tiempo, nodo/tipo, palabras); solo lee
+y descomprime los bloques candidatos, y en ellos filtra filas con NumPy.
+Así el costo depende de los bloques que pueden contener resultados y no del
+tamaño de la sesión. Si una sesión no tiene índice se construye al abrirla.
+
+Uso:
+    index = SessionIndex("sesiones/sesion_20250101_140000")
+    index.search(node="B", kinds=[KIND_TX_ERROR], start="14:00", end="14:05")
+    index.search(text="Peer lost before send")
+    index.near({"kinds": [KIND_SYNC], "state": 0}, {"kinds": [KIND_TRANSITION]}, within_s=2)
+
+    python monitor_index.py sesiones/sesion_20250101_140000 "nodo:B tipo:TX_ERROR desde:14:00 hasta:14:05"
+"""
+
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from monitor_recorder import (
+    EVT_SUFFIX, RAW_SUFFIX, KIND_NAMES, SYNC_CODES, Record,
+    iter_chunks, read_chunk_at, read_raw_lines, reopen_truncated
+)
+
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'SEMIDX1\n'
+RECORD_MAGIC = b'IDXR'
+# magic, largo del payload, crc32 del payload
+RECORD_HEADER = struct.Struct('<4sII')
+# evt_offset, raw_offset, raw_length, filas, t_min, t_max, nodos
+CHUNK_FIELDS = struct.Struct('<QQIIqqB')
+
+BLOOM_BITS = 2048          # 256 bytes por bloque
+BLOOM_HASHES = 3
+DEFAULT_LIMIT = 1000
+
+_TOKEN_RE = re.compile(r'\w+')
+_KIND_CODES = {name: code for code, name in KIND_NAMES.items()}
+
+
+def tokenize(text):
+    """Palabras indexables de una línea: en minúsculas y con al menos una letra"""
+    return {token for token in _TOKEN_RE.findall(text.lower()) if not token.isdigit()}
+
+
+def query_tokens(text):
+    """Palabras de una búsqueda por subcadena que sirven para descartar bloques.
+
+    La búsqueda es por subcadena: "retry" encuentra "retrying" y en "Peer lost
+    before sen" la primera y la última palabra pueden ser parte de otra más
+    larga. Solo las palabras con un separador a cada lado dentro del
+    texto buscado son palabras enteras en la línea y pueden probarse en el
+    filtro de Bloom."""
+    text = text.lower()
+    tokens = set()
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        if match.start() > 0 and match.end() < len(text) and not token.isdigit():
+            tokens.add(token)
+    return tokens
+
+
+def _bloom_positions(token):
+    data = token.encode('utf-8')
+    h1 = zlib.crc32(data)
+    h2 = zlib.crc32(data, 0x9E3779B9) | 1
+    return [(h1 + i * h2) % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+
+def bloom_filter(lines):
+    """Filtro de Bloom (bytes) con las palabras de todas las líneas"""
+    bits = bytearray(BLOOM_BITS // 8)
+    tokens = set()
+    for line in lines:
+        tokens.update(tokenize(line))
+    for token in tokens:
+        for position in _bloom_positions(token):
+            bits[position >> 3] |= 1 << (position & 7)
+    return bytes(bits)
+
+
+def _chunk_record(chunk, lines):
+    """Payload del registro de índice de un bloque"""
+    c = chunk.columns
+    t = np.frombuffer(c['t_ns'], dtype=np.int64)
+    node = np.frombuffer(c['node'], dtype=np.uint8)
+    kind = np.frombuffer(c['kind'], dtype=np.uint8)
+    rows = len(t)
+    parts = [CHUNK_FIELDS.pack(chunk.offset, chunk.raw_offset, chunk.raw_length, rows,
+                               int(t.min()) if rows else 0, int(t.max()) if rows else 0,
+                               len(chunk.nodes))]
+    for index, name in enumerate(chunk.nodes):
+        kinds = np.unique(kind[node == index])
+        mask = int(np.bitwise_or.reduce(np.left_shift(1, kinds.astype(np.int64)))) if len(kinds) else 0
+        encoded = name.encode('utf-8')
+        parts.append(struct.pack('<B', len(encoded)) + encoded + struct.pack('<H', mask))
+    parts.append(bloom_filter(lines))
+    return b''.join(parts)
+
+
+class IndexWriter:
+    """Agrega registros a <base>.idx a medida que se escriben los bloques"""
+    def __init__(self, base_path):
+        self.path = base_path + INDEX_SUFFIX
+        directory = os.path.dirname(base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(INDEX_MAGIC)
+            self._file.flush()
+
+    def add_chunk(self, chunk, lines):
+        payload = _chunk_record(chunk, lines)
+        offset = self._file.tell()
+        try:
+            self._file.write(RECORD_HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+        except Exception:
+            # Un registro a medias bloquearía la lectura de los siguientes
+            self._file = reopen_truncated(self._file, offset)
+            raise
+
+    def close(self):
+        self._file.close()
+
+
+def build_index(base_path):
+    """Crear (o rehacer) el índice de una sesión grabada sin él"""
+    path = base_path + INDEX_SUFFIX
+    if os.path.exists(path):
+        os.remove(path)
+    writer = IndexWriter(base_path)
+    try:
+        with open(base_path + RAW_SUFFIX, 'rb') as raw_file:
+            for chunk in iter_chunks(base_path):
+                writer.add_chunk(chunk, read_raw_lines(base_path, chunk, raw_file))
+    finally:
+        writer.close()
+
+
+def parse_when(value, reference_ns):
+    """Hora de una consulta en ns: ns, datetime o "HH:MM[:SS]" del día de reference_ns"""
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1e9)
+    if isinstance(value, float):
+        return int(value * 1e9)
+    parts = [float(part) for part in str(value).split(':')]
+    day = datetime.fromtimestamp(reference_ns / 1e9).replace(hour=0, minute=0, second=0, microsecond=0)
+    seconds = parts[0] * 3600 + (parts[1] * 60 if len(parts) > 1 else 0) + (parts[2] if len(parts) > 2 else 0)
+    return int((day.timestamp() + seconds) * 1e9)
+
+
+class SessionIndex:
+    """Consultas sobre una sesión grabada usando su índice"""
+    def __init__(self, base_path):
+        if base_path.endswith(EVT_SUFFIX):
+            base_path = base_path[:-len(EVT_SUFFIX)]
+        self.base_path = base_path
+        if not os.path.exists(base_path + INDEX_SUFFIX):
+            build_index(base_path)
+        self.node_names = []      # Nodos vistos en toda la sesión (columna de kind_masks)
+        self._node_ids = {}
+        self._records = []        # (evt_offset, raw_offset, raw_length, rows, t_min, t_max)
+        self._chunk_masks = []    # {nodo_global: máscara} por bloque
+        self._blooms = []
+        self._read_pos = len(INDEX_MAGIC)
+        self.refresh()
+
+    def refresh(self):
+        """Leer los registros agregados desde la última carga (sesión en grabación)"""
+        with open(self.base_path + INDEX_SUFFIX, 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"{self.base_path}{INDEX_SUFFIX} no es un índice de sesión")
+            f.seek(self._read_pos)
+            data = f.read()
+        pos = 0
+        added = 0
+        while pos + RECORD_HEADER.size <= len(data):
+            magic, length, crc = RECORD_HEADER.unpack_from(data, pos)
+            payload = data[pos + RECORD_HEADER.size:pos + RECORD_HEADER.size + length]
+            if magic != RECORD_MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+                break  # Registro incompleto: se relee en el próximo refresh
+            self._add_record(payload)
+            pos += RECORD_HEADER.size + length
+            added += 1
+        self._read_pos += pos
+        if added or not hasattr(self, 't_min'):
+            self._build_arrays()
+        return added
+
+    def _add_record(self, payload):
+        evt_offset, raw_offset, raw_length, rows, t_min, t_max, n_nodes = CHUNK_FIELDS.unpack_from(payload)
+        pos = CHUNK_FIELDS.size
+        masks = {}
+        for _ in range(n_nodes):
+            length = payload[pos]
+            name = payload[pos + 1:pos + 1 + length].decode('utf-8')
+            (mask,) = struct.unpack_from('<H', payload, pos + 1 + length)
+            pos += 3 + length
+            node_id = self._node_ids.get(name)
+            if node_id is None:
+                node_id = self._node_ids[name] = len(self.node_names)
+                self.node_names.append(name)
+            masks[node_id] = mask
+        self._records.append((evt_offset, raw_offset, raw_length, rows, t_min, t_max))
+        self._chunk_masks.append(masks)
+        self._blooms.append(payload[pos:pos + BLOOM_BITS // 8])
+
+    def _build_arrays(self):
+        records = np.array(self._records, dtype=np.int64).reshape(-1, 6)
+        self.evt_offset = records[:, 0]
+        self.rows = records[:, 3]
+        self.t_min = records[:, 4]
+        self.t_max = records[:, 5]
+        self.kind_masks = np.zeros((len(self._records), max(len(self.node_names), 1)), dtype=np.uint16)
+        for i, masks in enumerate(self._chunk_masks):
+            for node_id, mask in masks.items():
+                self.kind_masks[i, node_id] = mask
+        self.blooms = np.frombuffer(b''.join(self._blooms), dtype=np.uint8).reshape(-1, BLOOM_BITS // 8)
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def start_ns(self):
+        return int(self.t_min.min()) if len(self) else 0
+
+    # ---------- selección de bloques ----------
+
+    def candidate_chunks(self, node=None, kinds=None, start=None, end=None, tokens=()):
+        """Índices de los bloques que pueden contener filas de la consulta"""
+        keep = np.ones(len(self), dtype=bool)
+        if start is not None:
+            keep &= self.t_max >= start
+        if end is not None:
+            keep &= self.t_min <= end
+        if node is not None or kinds:
+            kind_mask = 0xFFFF
+            if kinds:
+                kind_mask = 0
+                for kind in kinds:
+                    kind_mask |= 1 << kind
+            if node is not None:
+                node_id = self._node_ids.get(node)
+                if node_id is None:
+                    return np.empty(0, dtype=np.int64)
+                keep &= (self.kind_masks[:, node_id] & kind_mask) != 0
+            else:
+                keep &= ((self.kind_masks & kind_mask) != 0).any(axis=1)
+        for token in tokens:
+            for position in _bloom_positions(token):
+                keep &= (self.blooms[:, position >> 3] & (1 << (position & 7))) != 0
+        return np.flatnonzero(keep)
+
+    # ---------- consultas ----------
+
+    def _rows(self, chunk, node=None, kinds=None, start=None, end=None, state=None):
+        """Máscara de filas de un bloque que cumplen los filtros por columna"""
+        c = chunk.columns
+        t = np.frombuffer(c['t_ns'], dtype=np.int64)
+        keep = np.ones(len(t), dtype=bool)
+        if start is not None:
+            keep &= t >= start
+        if end is not None:
+            keep &= t <= end
+        if node is not None:
+            if node not in chunk.nodes:
+                return keep & False
+            keep &= np.frombuffer(c['node'], dtype=np.uint8) == chunk.nodes.index(node)
+        if kinds:
+            keep &= np.isin(np.frombuffer(c['kind'], dtype=np.uint8), list(kinds))
+        if state is not None:
+            keep &= np.frombuffer(c['state'], dtype=np.int8) == state
+        return keep
+
+    def _iter_matches(self, node=None, kinds=None, start=None, end=None, state=None, text=None):
+        """(t_ns, Record) de las filas que cumplen la consulta, en orden de bloque"""
+        start = parse_when(start, self.start_ns)
+        end = parse_when(end, self.start_ns)
+        needle = text.lower() if text else None
+        tokens = query_tokens(text) if text else ()
+        chunks = self.candidate_chunks(node, kinds, start, end, tokens)
+        if not len(chunks):
+            return
+        with open(self.base_path + EVT_SUFFIX, 'rb') as evt_file, \
+                open(self.base_path + RAW_SUFFIX, 'rb') as raw_file:
+            for i in chunks:
+                chunk = read_chunk_at(evt_file, int(self.evt_offset[i]), int(i))
+                if chunk is None:
+                    continue
+                rows = np.flatnonzero(self._rows(chunk, node, kinds, start, end, state))
+                if not len(rows):
+                    continue
+                lines = read_raw_lines(self.base_path, chunk, raw_file)
+                c = chunk.columns
+                for row in rows.tolist():
+                    text_row = lines[row]
+                    if needle is not None and needle not in text_row.lower():
+                        continue
+                    yield Record(
+                        c['t_ns'][row], chunk.nodes[c['node'][row]], c['kind'][row], c['state'][row],
+                        c['dist'][row], c['request'][row], c['seq'][row],
+                        c['tx_count'][row], c['rx_count'][row], text_row
+                    )
+
+    def search(self, text=None, node=None, kinds=None, start=None, end=None, state=None,
+               limit=DEFAULT_LIMIT):
+        """Filas que cumplen todos los filtros (texto: subcadena sin distinguir mayúsculas)"""
+        results = []
+        for record in self._iter_matches(node, kinds, start, end, state, text):
+            results.append(record)
+            if limit is not None and len(results) >= limit:
+                break
+        results.sort(key=lambda record: record.t_ns)
+        return results
+
+    def near(self, anchor, target, within_s=2.0, limit=DEFAULT_LIMIT):
+        """Filas `target` a menos de within_s de alguna fila `anchor` (filtros de search)"""
+        window = int(within_s * 1e9)
+        anchors = np.array([r.t_ns for r in self._iter_matches(**anchor)], dtype=np.int64)
+        if not len(anchors):
+            return []
+        anchors.sort()
+        # Solo bloques que se cruzan con alguna ventana [ancla - w, ancla + w]
+        target = dict(target)
+        start = parse_when(target.pop('start', None), self.start_ns)
+        end = parse_when(target.pop('end', None), self.start_ns)
+        lo = np.searchsorted(anchors, self.t_min - window, side='left')
+        hi = np.searchsorted(anchors, self.t_max + window, side='right')
+        windowed = np.flatnonzero(hi > lo)
+        results = []
+        if not len(windowed):
+            return results
+        first = int(self.t_min[windowed].min())
+        last = int(self.t_max[windowed].max())
+        start = first if start is None else max(start, first)
+        end = last if end is None else min(end, last)
+        candidates = list(self._iter_matches(start=start, end=end, **target))
+        if not candidates:
+            return results
+        t = np.array([r.t_ns for r in candidates], dtype=np.int64)
+        i = np.searchsorted(anchors, t)
+        before = np.abs(t - anchors[np.maximum(i - 1, 0)])
+        after = np.abs(anchors[np.minimum(i, len(anchors) - 1)] - t)
+        for row in np.flatnonzero(np.minimum(before, after) <= window).tolist():
+            results.append(candidates[row])
+            if limit is not None and len(results) >= limit:
+                break
+        results.sort(key=lambda record: record.t_ns)
+        return results
+
+
+# ==================== CONSULTAS DE TEXTO ====================
+
+_QUERY_KEYS = {
+    'nodo': 'node', 'node': 'node',
+    'tipo': 'kinds', 'kind': 'kinds',
+    'desde': 'start', 'hasta': 'end',
+    'estado': 'state',
+    'cerca': 'near', 'ventana': 'within_s',
+}
+
+
+def parse_query(query):
+    """Convertir "nodo:B tipo:TX_ERROR desde:14:00 hasta:14:05 texto" en filtros.
+
+    cerca:TIPO[=ESTADO] busca el resto de la consulta a menos de ventana:S
+    segundos (2 por defecto) de una fila de ese tipo, p. ej.
+    "tipo:TRANSITION cerca:SYNC=SIN_SYNC ventana:2".
+    Devuelve (filtros, ancla o None, ventana en s)."""
+    filters = {}
+    anchor = None
+    within_s = 2.0
+    words = []
+    for word in query.split():
+        key, sep, value = word.partition(':')
+        key = _QUERY_KEYS.get(key.lower()) if sep else None
+        if key is None:
+            words.append(word)
+        elif key == 'kinds':
+            filters['kinds'] = [_kind_code(name) for name in value.split(',')]
+        elif key == 'near':
+            name, _, state = value.partition('=')
+            anchor = {'kinds': [_kind_code(name)]}
+            if state:
+                anchor['state'] = _state_code(state)
+        elif key == 'within_s':
+            within_s = float(value.rstrip('s'))
+        elif key == 'state':
+            filters['state'] = _state_code(value)
+        else:
+            filters[key] = value
+    if words:
+        filters['text'] = ' '.join(words)
+    return filters, anchor, within_s
+
+
+def _kind_code(name):
+    code = _KIND_CODES.get(name.upper())
+    if code is None:
+        raise ValueError(f"Tipo desconocido: {name} (tipos: {', '.join(_KIND_CODES)})")
+    return code
+
+
+def _state_code(value):
+    if value.lstrip('-').isdigit():
+        return int(value)
+    if value.upper() in SYNC_CODES:
+        return SYNC_CODES.index(value.upper())
+    raise ValueError(f"Estado desconocido: {value}")
+
+
+def run_query(index, query, limit=DEFAULT_LIMIT):
+    """Resolver una consulta de texto (la del buscador del monitor)"""
+    filters, anchor, within_s = parse_query(query)
+    if anchor is not None:
+        return index.near(anchor, filters, within_s, limit)
+    return index.search(limit=limit, **filters)
+
+
+def format_record(record):
+    stamp = datetime.fromtimestamp(record.t_ns / 1e9).strftime("%H:%M:%S.%f")[:-3]
+    return f"[{stamp}] [{record.node}] {record.text}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buscar en una sesión grabada del monitor")
+    parser.add_argument("path", help="Sesión grabada (base o .evt)")
+    parser.add_argument("query", help='p. ej. "nodo:B tipo:TX_ERROR desde:14:00 hasta:14:05"')
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--rebuild", action="store_true", help="Rehacer el índice antes de buscar")
+    args = parser.parse_args(argv)
+
+    base = args.path[:-len(EVT_SUFFIX)] if args.path.endswith(EVT_SUFFIX) else args.path
+    if args.rebuild:
+        build_index(base)
+    start = time.perf_counter()
+    index = SessionIndex(base)
+    loaded = time.perf_counter()
+    results = run_query(index, args.query, args.limit)
+    done = time.perf_counter()
+    for record in results:
+        print(format_record(record))
+    print(f"{len(results)} resultados | índice: {len(index)} bloques en {(loaded - start) * 1000:.1f} ms | "
+          f"consulta: {(done - loaded) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
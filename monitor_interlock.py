@@ -0,0 +1,430 @@
+"""
+Verificador del enclavamiento de seguridad entre los semáforos de un cruce.
+
+La propiedad crítica del sistema es que A y B nunca estén en verde/amarillo a
+la vez. InterlockVerifier une por tiempo los flujos de estado de los dos
+nodos de cada par y marca:
+
+  - CONFLICTO:     ambos nodos en VERDE o AMARILLO al mismo tiempo
+  - DESPEJE:       un nodo pasa a VERDE sin venir de ALL RED o antes de
+                   MIN_CLEARANCE_MS desde que el cruce quedó en rojo
+  - SIN_PEER:      un nodo pasa a VERDE sin haber recibido al peer en los
+                   últimos PEER_TIMEOUT_MS (decide con un estado remoto viejo)
+  - TIMEOUT_PEER:  un nodo estuvo más de PEER_TIMEOUT_MS sin RX del peer, o el
+                   firmware reportó "Sin comunicación con peer - modo seguro"
+
+Los nodos se leen por puertos distintos, así que sus eventos llegan con
+desfase. Cada nodo tiene una cola (su propio flujo ya viene ordenado) y solo se
+procesan los eventos anteriores a la marca de agua: el menor de los últimos
+tiempos vistos, o el mayor menos max_lag_ms si un nodo calla. La memoria queda
+acotada por esa ventana y cada evento se encola y procesa una sola vez; las
+observaciones que repiten el estado del nodo (los TX a 5 Hz) se descartan al
+entrar.
+
+verify_session() aplica el mismo verificador a una sesión grabada leyendo los
+bloques columnares con NumPy y pasando solo las filas que pueden cambiar el
+resultado.
+
+Uso:
+    verifier = InterlockVerifier(on_violation=print)
+    verifier.pair("A", "B")
+    verifier.feed("A", evento, t_read_ns)
+
+    python monitor_interlock.py sesiones/sesion_20250101_120000
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from monitor_parser import (
+    STATE_NAMES, SYNC_LOST, parse_line,
+    CsvTelemetry, TxFrame, RxFrame, StateTransition, SyncEvent
+)
+from monitor_link import peer_of
+from monitor_recorder import (
+    EVT_SUFFIX, KIND_CSV, KIND_TX, KIND_RX, KIND_TRANSITION, KIND_SYNC,
+    SYNC_CODES, iter_chunks
+)
+
+
+# Estados del firmware (TrafficState)
+STATE_ALL_RED = 0
+STATE_GREEN = 1
+STATE_YELLOW = 2
+CONFLICT_STATES = (STATE_GREEN, STATE_YELLOW)
+
+MIN_CLEARANCE_MS = 1000    # ALL_RED_DURATION del firmware
+PEER_TIMEOUT_MS = 2000     # PEER_TIMEOUT del firmware
+DEFAULT_TOLERANCE_MS = 50  # Desfase admitido entre los puertos USB
+DEFAULT_MAX_LAG_MS = 500   # Espera máxima por el nodo que calla antes de procesar
+DEFAULT_MAX_VIOLATIONS = 1000
+
+VIOLATION_CONFLICT = 'CONFLICTO'
+VIOLATION_CLEARANCE = 'DESPEJE'
+VIOLATION_NO_PEER = 'SIN_PEER'
+FALLBACK_PEER_TIMEOUT = 'TIMEOUT_PEER'
+KINDS = (VIOLATION_CONFLICT, VIOLATION_CLEARANCE, VIOLATION_NO_PEER, FALLBACK_PEER_TIMEOUT)
+
+# Eventos internos de la cola de cada nodo
+EV_STATE = 0
+EV_RX = 1
+EV_SYNC_LOST = 2
+
+_STATE_CODES = {name: code for code, name in STATE_NAMES.items()}
+_SYNC_LOST_CODE = SYNC_CODES.index(SYNC_LOST)
+_DAY_S = 24 * 3600
+
+
+class Violation(NamedTuple):
+    """Incumplimiento detectado: tipo, hora (ns), nodo y descripción"""
+    kind: str
+    t_ns: int
+    node: str
+    detail: str
+
+
+class _Intersection:
+    """Estado del enclavamiento de un par de nodos"""
+    def __init__(self, verifier, nodes):
+        self.verifier = verifier
+        self.nodes = nodes
+        self.queues = (deque(), deque())
+        self.latest = [None, None]          # Último t_ns encolado por nodo
+        self.last_pushed = [None, None]     # Último estado encolado por nodo
+        self.state = [None, None]           # Estado procesado (None = desconocido)
+        self.last_rx = [None, None]
+        self.clear_since = None             # Desde cuándo ningún nodo está en verde/amarillo
+        self.conflict_start = None
+        self.conflict_ns = 0
+        self.last_t = 0
+        self.late = 0
+
+    def push(self, side, t_ns, code, value):
+        self.latest[side] = t_ns
+        queues = self.queues
+        if code == EV_STATE:
+            # Misma fase que la última observación: solo avanza la marca de agua
+            if value != self.last_pushed[side]:
+                self.last_pushed[side] = value
+                queues[side].append((t_ns, code, value))
+        elif code == EV_RX and not queues[side]:
+            # Un RX solo afecta a su nodo: sin eventos propios pendientes se procesa ya
+            self.receive(side, t_ns)
+        else:
+            queues[side].append((t_ns, code, value))
+        if queues[0] or queues[1]:
+            self.drain()
+
+    def drain(self, flush=False):
+        qa, qb = self.queues
+        latest_a, latest_b = self.latest
+        if flush:
+            watermark = None
+        elif latest_a is None or latest_b is None:
+            watermark = (latest_a if latest_b is None else latest_b) - self.verifier.max_lag_ns
+        else:
+            watermark = max(min(latest_a, latest_b), max(latest_a, latest_b) - self.verifier.max_lag_ns)
+        process = self.process
+        while qa or qb:
+            if qa and (not qb or qa[0][0] <= qb[0][0]):
+                side, queue = 0, qa
+            else:
+                side, queue = 1, qb
+            if watermark is not None and queue[0][0] > watermark:
+                break
+            t_ns, code, value = queue.popleft()
+            process(side, t_ns, code, value)
+
+    def process(self, side, t_ns, code, value):
+        if t_ns < self.last_t:
+            self.late += 1  # Llegó después de la marca de agua: se procesa en su turno
+        else:
+            self.last_t = t_ns
+        if code == EV_RX:
+            self.receive(side, t_ns)
+            return
+        verifier = self.verifier
+        node = self.nodes[side]
+        if code == EV_SYNC_LOST:
+            verifier.report(FALLBACK_PEER_TIMEOUT, t_ns, node, "modo seguro reportado por el firmware")
+            return
+        previous = self.state[side]
+        if value == previous:
+            return
+        self.state[side] = value
+        entering = value in CONFLICT_STATES
+        leaving = previous in CONFLICT_STATES
+        other = self.state[1 - side]
+        if entering and not leaving:
+            if value == STATE_GREEN and previous is not None:
+                self.check_green(side, t_ns, previous)
+            if other in CONFLICT_STATES:
+                self.conflict_start = t_ns
+                verifier.report(VIOLATION_CONFLICT, t_ns, node,
+                                f"{node} en {STATE_NAMES[value]} con {self.nodes[1 - side]} "
+                                f"en {STATE_NAMES[other]}")
+            self.clear_since = None
+        elif leaving and not entering:
+            if self.conflict_start is not None:
+                self.conflict_ns += t_ns - self.conflict_start
+                self.conflict_start = None
+            if other not in CONFLICT_STATES:
+                self.clear_since = t_ns
+
+    def receive(self, side, t_ns):
+        last = self.last_rx[side]
+        timeout_ns = self.verifier.peer_timeout_ns
+        if last is not None and t_ns - last > timeout_ns:
+            self.verifier.report(FALLBACK_PEER_TIMEOUT, last + timeout_ns, self.nodes[side],
+                                 f"{(t_ns - last) / 1e6:.0f} ms sin RX de {self.nodes[1 - side]}")
+        self.last_rx[side] = t_ns
+
+    def check_green(self, side, t_ns, previous):
+        verifier = self.verifier
+        node = self.nodes[side]
+        if previous != STATE_ALL_RED:
+            verifier.report(VIOLATION_CLEARANCE, t_ns, node,
+                            f"{node} pasó a VERDE desde {STATE_NAMES.get(previous, previous)}")
+        elif self.clear_since is not None:
+            clearance = t_ns - self.clear_since
+            if clearance < verifier.min_clearance_ns:
+                verifier.report(VIOLATION_CLEARANCE, t_ns, node,
+                                f"{node} pasó a VERDE {clearance / 1e6:.0f} ms después del último "
+                                f"verde/amarillo")
+        last = self.last_rx[side]
+        if last is not None and t_ns - last > verifier.peer_timeout_ns:
+            verifier.report(VIOLATION_NO_PEER, t_ns, node,
+                            f"{node} pasó a VERDE {(t_ns - last) / 1e6:.0f} ms después del "
+                            f"último RX de {self.nodes[1 - side]}")
+
+    def stats(self, t_ns):
+        conflict_ns = self.conflict_ns
+        if self.conflict_start is not None:
+            conflict_ns += max(t_ns - self.conflict_start, 0)
+        timeout_ns = self.verifier.peer_timeout_ns
+        return {
+            'state': {node: STATE_NAMES.get(state, '---') for node, state in zip(self.nodes, self.state)},
+            'conflict': self.conflict_start is not None,
+            'conflict_ms': conflict_ns / 1e6,
+            'peer_down': [node for node, last in zip(self.nodes, self.last_rx)
+                          if last is not None and t_ns - last > timeout_ns],
+            'pending': len(self.queues[0]) + len(self.queues[1]),
+            'late': self.late,
+        }
+
+
+class InterlockVerifier:
+    """Verificación en línea del enclavamiento para los pares registrados"""
+    def __init__(self, min_clearance_ms=MIN_CLEARANCE_MS, peer_timeout_ms=PEER_TIMEOUT_MS,
+                 tolerance_ms=DEFAULT_TOLERANCE_MS, max_lag_ms=DEFAULT_MAX_LAG_MS,
+                 max_violations=DEFAULT_MAX_VIOLATIONS, on_violation=None):
+        self.min_clearance_ns = int((min_clearance_ms - tolerance_ms) * 1e6)
+        self.peer_timeout_ns = int((peer_timeout_ms + tolerance_ms) * 1e6)
+        self.max_lag_ns = int(max_lag_ms * 1e6)
+        self.on_violation = on_violation   # on_violation(Violation)
+        self.violations = deque(maxlen=max_violations)  # Las más recientes
+        self.counts = dict.fromkeys(KINDS, 0)
+        self.intersections = {}   # (node_a, node_b) -> _Intersection
+        self._route = {}          # nodo -> (_Intersection, lado)
+
+    def pair(self, node_a, node_b):
+        """Registrar los dos nodos de un cruce"""
+        intersection = _Intersection(self, (node_a, node_b))
+        self.intersections[(node_a, node_b)] = intersection
+        self._route[node_a] = (intersection, 0)
+        self._route[node_b] = (intersection, 1)
+
+    def push(self, node, t_ns, code, value=0):
+        """Encolar un evento interno (EV_STATE con el código de estado, EV_RX, EV_SYNC_LOST)"""
+        route = self._route.get(node)
+        if route is not None:
+            route[0].push(route[1], t_ns, code, value)
+
+    def feed(self, node, event, t_ns):
+        """Procesar un evento de monitor_parser; ignora los que no afectan al enclavamiento"""
+        route = self._route.get(node)
+        if route is None:
+            return
+        event_type = type(event)
+        if event_type is TxFrame or event_type is CsvTelemetry:
+            route[0].push(route[1], t_ns, EV_STATE, event.state)
+        elif event_type is RxFrame:
+            route[0].push(route[1], t_ns, EV_RX, 0)
+        elif event_type is StateTransition:
+            code = _STATE_CODES.get(event.state)
+            if code is not None:
+                route[0].push(route[1], t_ns, EV_STATE, code)
+        elif event_type is SyncEvent and event.status == SYNC_LOST:
+            route[0].push(route[1], t_ns, EV_SYNC_LOST, 0)
+
+    def flush(self):
+        """Procesar todo lo encolado (fin de una sesión o del monitoreo)"""
+        for intersection in self.intersections.values():
+            intersection.drain(flush=True)
+
+    def report(self, kind, t_ns, node, detail):
+        violation = Violation(kind, t_ns, node, detail)
+        self.counts[kind] += 1
+        self.violations.append(violation)
+        if self.on_violation is not None:
+            self.on_violation(violation)
+
+    def stats(self, t_ns=None):
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        return {key: intersection.stats(t_ns) for key, intersection in self.intersections.items()}
+
+
+# ==================== SESIONES GRABADAS ====================
+
+def _session_rows(chunk, prev_state, peer_timeout_ns):
+    """Índices de las filas del bloque que pueden cambiar el resultado.
+
+    Se omiten las observaciones que repiten el estado anterior del nodo y los
+    RX intermedios: de cada intervalo de PEER_TIMEOUT se conservan el primero y
+    el último, y además el último RX antes de cada cambio de estado, lo que
+    basta para detectar los huecos y las entradas a verde sin peer."""
+    c = chunk.columns
+    t = np.frombuffer(c['t_ns'], dtype=np.int64)
+    node = np.frombuffer(c['node'], dtype=np.uint8)
+    kind = np.frombuffer(c['kind'], dtype=np.uint8)
+    state = np.frombuffer(c['state'], dtype=np.int8)
+    is_state = ((kind == KIND_TX) | (kind == KIND_CSV) | (kind == KIND_TRANSITION)) & (state >= 0)
+    is_rx = kind == KIND_RX
+    is_lost = (kind == KIND_SYNC) & (state == _SYNC_LOST_CODE)
+    keep = [np.flatnonzero(is_lost)]
+    for index, name in enumerate(chunk.nodes):
+        mine = node == index
+        rows = np.flatnonzero(mine & is_state)
+        if len(rows):
+            values = state[rows]
+            changed = np.empty(len(rows), dtype=bool)
+            changed[0] = values[0] != prev_state.get(name, -1)
+            np.not_equal(values[1:], values[:-1], out=changed[1:])
+            prev_state[name] = int(values[-1])
+            rows = rows[changed]
+            keep.append(rows)
+        rx_rows = np.flatnonzero(mine & is_rx)
+        if len(rx_rows):
+            bucket = t[rx_rows] // peer_timeout_ns
+            edge = np.empty(len(rx_rows) + 1, dtype=bool)
+            edge[0] = edge[-1] = True
+            np.not_equal(bucket[1:], bucket[:-1], out=edge[1:-1])
+            keep.append(rx_rows[edge[1:] | edge[:-1]])
+            if len(rows):
+                # Último RX de este nodo antes de cada cambio de estado
+                before = np.searchsorted(rx_rows, rows) - 1
+                keep.append(rx_rows[before[before >= 0]])
+    return np.unique(np.concatenate(keep))
+
+
+def verify_session(base_path, verifier=None, pairs=None):
+    """Verificar una sesión grabada; devuelve (verifier, filas leídas, filas procesadas)"""
+    if verifier is None:
+        verifier = InterlockVerifier()
+    registered = {node for key in verifier.intersections for node in key}
+    for a, b in pairs or ():
+        verifier.pair(a, b)
+        registered.update((a, b))
+    prev_state = {}
+    rows_read = rows_used = 0
+    push = verifier.push
+    codes = np.full(256, -1, dtype=np.int8)
+    codes[[KIND_TX, KIND_CSV, KIND_TRANSITION]] = EV_STATE
+    codes[KIND_RX] = EV_RX
+    codes[KIND_SYNC] = EV_SYNC_LOST
+    for chunk in iter_chunks(base_path):
+        if pairs is None:
+            # Sin pares explícitos: A <-> B, A2 <-> B2, ... según los nodos grabados
+            for name in chunk.nodes:
+                peer = peer_of(name)
+                if name not in registered and peer in chunk.nodes and peer not in registered:
+                    verifier.pair(*sorted((name, peer)))
+                    registered.update((name, peer))
+        c = chunk.columns
+        rows = _session_rows(chunk, prev_state, verifier.peer_timeout_ns)
+        rows_read += len(c['kind'])
+        rows_used += len(rows)
+        t = np.frombuffer(c['t_ns'], dtype=np.int64)[rows].tolist()
+        node = np.frombuffer(c['node'], dtype=np.uint8)[rows].tolist()
+        code = codes[np.frombuffer(c['kind'], dtype=np.uint8)[rows]].tolist()
+        state = np.frombuffer(c['state'], dtype=np.int8)[rows].tolist()
+        names = chunk.nodes
+        for t_ns, index, ev, value in zip(t, node, code, state):
+            push(names[index], t_ns, ev, value)
+    verifier.flush()
+    return verifier, rows_read, rows_used
+
+
+def verify_lines(lines, verifier=None, pairs=None):
+    """Verificar líneas de monitor_replay (logs de texto); devuelve el verifier"""
+    if verifier is None:
+        verifier = InterlockVerifier()
+    for a, b in pairs or ():
+        verifier.pair(a, b)
+    registered = {node for key in verifier.intersections for node in key}
+    for line in lines:
+        if pairs is None and line.node not in registered:
+            peer = peer_of(line.node)
+            if peer is not None and peer not in registered:
+                verifier.pair(*sorted((line.node, peer)))
+                registered.update((line.node, peer))
+        event = parse_line(line.text)
+        if event is not None:
+            verifier.feed(line.node, event, int(line.t * 1e9))
+    verifier.flush()
+    return verifier
+
+
+def format_time(t_ns):
+    """HH:MM:SS.mmm de una hora de sesión (epoch) o de log (segundos del día)"""
+    seconds = t_ns / 1e9
+    if seconds >= 2 * _DAY_S:
+        return datetime.fromtimestamp(seconds).strftime("%H:%M:%S.%f")[:-3]
+    seconds %= _DAY_S
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificar el enclavamiento de una sesión o log del monitor")
+    parser.add_argument("path", help="Sesión grabada (base o .evt) o log de texto")
+    parser.add_argument("--pair", action="append", default=None, metavar="A=B",
+                        help="Nodos de un cruce (por defecto A<->B, A2<->B2, ...)")
+    parser.add_argument("--clearance-ms", type=float, default=MIN_CLEARANCE_MS)
+    parser.add_argument("--peer-timeout-ms", type=float, default=PEER_TIMEOUT_MS)
+    parser.add_argument("--tolerance-ms", type=float, default=DEFAULT_TOLERANCE_MS)
+    args = parser.parse_args(argv)
+    pairs = [tuple(p.split("=", 1)) for p in args.pair] if args.pair else None
+
+    verifier = InterlockVerifier(args.clearance_ms, args.peer_timeout_ms, args.tolerance_ms,
+                                 max_violations=None)
+    start = time.perf_counter()
+    path = args.path[:-len(EVT_SUFFIX)] if args.path.endswith(EVT_SUFFIX) else args.path
+    if os.path.exists(path + EVT_SUFFIX):
+        _, rows_read, rows_used = verify_session(path, verifier, pairs)
+    else:
+        from monitor_replay import iter_log_lines  # monitor_replay usa este módulo vía monitor_pipeline
+        verify_lines(iter_log_lines(args.path), verifier, pairs)
+        rows_read = rows_used = None
+    elapsed = time.perf_counter() - start
+
+    for v in verifier.violations:
+        print(f"{format_time(v.t_ns)} {v.kind:<13} [{v.node}] {v.detail}")
+    summary = ", ".join(f"{kind}: {count}" for kind, count in verifier.counts.items())
+    print(summary, file=sys.stderr)
+    if rows_read is not None:
+        print(f"{rows_read} filas ({rows_used} procesadas) en {elapsed:.2f} s "
+              f"({rows_read / max(elapsed, 1e-9):,.0f} filas/s)", file=sys.stderr)
+    violations = sum(verifier.counts[k] for k in KINDS if k != FALLBACK_PEER_TIMEOUT)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
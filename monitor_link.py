@@ -0,0 +1,233 @@
+"""
+Calidad del enlace ESP-NOW a partir de seq y timestamp_ms.
+
+LinkAnalyzer correlaciona las líneas TX de un nodo con las RX de su peer (y
+viceversa) usando el `seq` de TrafficMsg y calcula por dirección:
+
+  - pérdida:      TX sin su RX después de MATCH_TIMEOUT_S
+  - duplicados:   RX con un seq ya recibido hace poco
+  - desorden:     RX con un seq anterior al último recibido
+  - jitter:       estimador de RFC 3550 con timestamp_ms del emisor y la hora
+                  del RX
+  - retardo:      hora del RX menos la del TX
+
+Las horas son las de ClockSync.event_time (monitor_clock), no las de lectura:
+el TX se ubica con el millis() del emisor llevado al reloj del monitor y el RX
+(sin millis() del receptor) con su hora de lectura menos el retardo USB/lote
+estimado para ese nodo. El retardo es por lo tanto del aire más lo que tarda
+el receptor en imprimir el RX (hasta una pasada de loop()), más el error de
+alineación de ambos relojes (residual_ms en ClockSync.stats); no incluye la
+latencia USB de los puertos.
+
+Cada evento cuesta O(1): los contadores van en una ventana deslizante de
+cubetas de tiempo que se reciclan al avanzar el reloj.
+
+Uso:
+    link = LinkAnalyzer()
+    link.pair("A", "B")
+    link.feed("A", evento, clocks.event_time("A", evento, t_read_ns))
+    link.stats()  # {("A", "B"): {...}, ("B", "A"): {...}}
+"""
+
+import re
+import time
+from collections import deque
+
+from monitor_parser import TxFrame, RxFrame
+
+
+SEQ_MOD = 256              # TrafficMsg.seq es uint8
+MATCH_TIMEOUT_S = 1.0      # TX sin RX pasado este tiempo cuenta como perdido
+DUPLICATE_HORIZON_S = 20.0  # Menos que una vuelta de seq (256 x 200 ms = 51 s)
+DEFAULT_WINDOW_S = 10.0
+DEFAULT_BUCKETS = 10
+
+_COUNTERS = ('sent', 'received', 'matched', 'lost', 'duplicates', 'reordered', 'delay_count')
+
+
+class _Bucket:
+    """Contadores de un intervalo de la ventana deslizante"""
+    __slots__ = ('index', 'delay_sum', 'delay_max') + _COUNTERS
+
+    def __init__(self):
+        self.reset(-1)
+
+    def reset(self, index):
+        self.index = index
+        self.sent = self.received = self.matched = self.lost = 0
+        self.duplicates = self.reordered = self.delay_count = 0
+        self.delay_sum = 0
+        self.delay_max = 0
+
+
+class _Direction:
+    """Estado del enlace en un sentido (emisor -> receptor)"""
+    def __init__(self, tx_node, rx_node, window_s, buckets):
+        self.tx_node = tx_node
+        self.rx_node = rx_node
+        self.bucket_ns = int(window_s * 1e9 / buckets)
+        self.buckets = [_Bucket() for _ in range(buckets)]
+        self.timeout_ns = int(MATCH_TIMEOUT_S * 1e9)
+        self.dup_horizon_ns = int(DUPLICATE_HORIZON_S * 1e9)
+        self.pending = [None] * SEQ_MOD     # seq -> t_ns del TX aún sin RX
+        self.fifo = deque()                 # (t_ns, seq) en orden de TX
+        self.last_rx = [None] * SEQ_MOD     # seq -> t_ns del último RX
+        self.early_rx = [None] * SEQ_MOD    # seq -> t_ns de un RX leído antes que su TX
+        self.max_seq = None
+        self.jitter_ms = 0.0
+        self.prev_transit = None
+        self.totals = dict.fromkeys(('sent', 'received', 'lost', 'duplicates', 'reordered'), 0)
+
+    def _bucket(self, t_ns):
+        index = t_ns // self.bucket_ns
+        bucket = self.buckets[index % len(self.buckets)]
+        if bucket.index != index:
+            bucket.reset(index)
+        return bucket
+
+    def expire(self, t_ns):
+        fifo = self.fifo
+        pending = self.pending
+        while fifo and t_ns - fifo[0][0] > self.timeout_ns:
+            sent_ns, seq = fifo.popleft()
+            if pending[seq] == sent_ns:
+                pending[seq] = None
+                self._bucket(t_ns).lost += 1
+                self.totals['lost'] += 1
+
+    def on_tx(self, t_ns, seq):
+        self.expire(t_ns)
+        bucket = self._bucket(t_ns)
+        bucket.sent += 1
+        self.totals['sent'] += 1
+        # Los puertos se leen en paralelo: el RX puede llegar al monitor antes que su TX
+        rx_ns = self.early_rx[seq]
+        if rx_ns is not None and t_ns - rx_ns <= self.timeout_ns:
+            self.early_rx[seq] = None
+            self._matched(bucket, 0)
+            return
+        self.pending[seq] = t_ns
+        self.fifo.append((t_ns, seq))
+
+    def _matched(self, bucket, delay):
+        bucket.matched += 1
+        bucket.delay_count += 1
+        bucket.delay_sum += delay
+        if delay > bucket.delay_max:
+            bucket.delay_max = delay
+
+    def on_rx(self, t_ns, seq, timestamp_ms):
+        self.expire(t_ns)
+        bucket = self._bucket(t_ns)
+        bucket.received += 1
+        self.totals['received'] += 1
+        last = self.last_rx[seq]
+        self.last_rx[seq] = t_ns
+        if last is not None and t_ns - last < self.dup_horizon_ns:
+            bucket.duplicates += 1
+            self.totals['duplicates'] += 1
+            return
+        if self.max_seq is None:
+            self.max_seq = seq
+        else:
+            ahead = (seq - self.max_seq) % SEQ_MOD
+            if ahead < SEQ_MOD // 2:
+                self.max_seq = seq
+            else:
+                bucket.reordered += 1
+                self.totals['reordered'] += 1
+        if timestamp_ms is not None:
+            # RFC 3550: J += (|D| - J) / 16 con D = variación del tránsito
+            transit = t_ns / 1e6 - timestamp_ms
+            if self.prev_transit is not None:
+                self.jitter_ms += (abs(transit - self.prev_transit) - self.jitter_ms) / 16
+            self.prev_transit = transit
+        sent_ns = self.pending[seq]
+        if sent_ns is not None and t_ns - sent_ns <= self.timeout_ns:
+            self.pending[seq] = None
+            self._matched(bucket, t_ns - sent_ns)
+        else:
+            self.early_rx[seq] = t_ns
+
+    def stats(self, t_ns):
+        self.expire(t_ns)
+        oldest = t_ns // self.bucket_ns - len(self.buckets) + 1
+        window = dict.fromkeys(_COUNTERS, 0)
+        delay_sum = delay_max = 0
+        for bucket in self.buckets:
+            if bucket.index < oldest:
+                continue
+            for name in _COUNTERS:
+                window[name] += getattr(bucket, name)
+            delay_sum += bucket.delay_sum
+            delay_max = max(delay_max, bucket.delay_max)
+        resolved = window['matched'] + window['lost']
+        count = window['delay_count']
+        return {
+            'sent': window['sent'],
+            'received': window['received'],
+            'lost': window['lost'],
+            'loss_pct': 100.0 * window['lost'] / resolved if resolved else 0.0,
+            'duplicates': window['duplicates'],
+            'reordered': window['reordered'],
+            'jitter_ms': self.jitter_ms,
+            'delay_mean_ms': delay_sum / count / 1e6 if count else 0.0,
+            'delay_max_ms': delay_max / 1e6,
+            'totals': dict(self.totals),
+        }
+
+
+class LinkAnalyzer:
+    """Estadísticas del enlace por dirección para los pares de nodos registrados"""
+    def __init__(self, window_s=DEFAULT_WINDOW_S, buckets=DEFAULT_BUCKETS):
+        self.window_s = window_s
+        self.buckets = buckets
+        self.directions = {}   # (tx_node, rx_node) -> _Direction
+        self._tx_route = {}    # nodo -> dirección de sus TX
+        self._rx_route = {}    # nodo -> dirección de sus RX
+
+    def pair(self, node_a, node_b):
+        """Registrar dos nodos que son peers ESP-NOW entre sí"""
+        for tx_node, rx_node in ((node_a, node_b), (node_b, node_a)):
+            direction = _Direction(tx_node, rx_node, self.window_s, self.buckets)
+            self.directions[(tx_node, rx_node)] = direction
+            self._tx_route[tx_node] = direction
+            self._rx_route[rx_node] = direction
+
+    def feed(self, node, event, t_ns):
+        """Procesar un evento de `node`; ignora los que no traen seq"""
+        event_type = type(event)
+        if event_type is TxFrame:
+            if event.seq is not None:
+                direction = self._tx_route.get(node)
+                if direction is not None:
+                    direction.on_tx(t_ns, event.seq)
+        elif event_type is RxFrame:
+            if event.seq is not None:
+                direction = self._rx_route.get(node)
+                if direction is not None:
+                    direction.on_rx(t_ns, event.seq, event.timestamp_ms)
+
+    def stats(self, t_ns=None):
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        return {key: direction.stats(t_ns) for key, direction in self.directions.items()}
+
+    def incoming(self, node, t_ns=None):
+        """Estadísticas de la dirección que llega a `node` (None si no tiene peer)"""
+        direction = self._rx_route.get(node)
+        if direction is None:
+            return None
+        return direction.stats(time.monotonic_ns() if t_ns is None else t_ns)
+
+
+_NODE_RE = re.compile(r'([AB])(.*)$')
+
+
+def peer_of(node_id):
+    """Peer por convención de nombres: A <-> B, A2 <-> B2, ... (None si no aplica)"""
+    m = _NODE_RE.match(node_id)
+    if m is None:
+        return None
+    letter, suffix = m.groups()
+    return ('B' if letter == 'A' else 'A') + suffix
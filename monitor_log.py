@@ -0,0 +1,66 @@
+"""
+Buffer de logs de capacidad fija para el Monitor de Semáforos.
+
+Cada línea se guarda una sola vez en un anillo (deque con maxlen) junto con
+un número de secuencia y el nodo de origen. Las vistas (log A, log B, log
+combinado) son filtros sobre este buffer: piden las entradas nuevas desde la
+última secuencia que dibujaron y las insertan en lote.
+"""
+
+from collections import deque
+from itertools import islice
+from typing import NamedTuple, Optional
+
+
+DEFAULT_CAPACITY = 20000  # Líneas conservadas en memoria
+
+
+class LogEntry(NamedTuple):
+    """Línea de log con secuencia global, nodo de origen (None = general) y
+    hora estimada de generación (time.monotonic_ns, 0 = desconocida)"""
+    seq: int
+    node: Optional[str]
+    text: str
+    t_ns: int = 0
+
+
+class LogBuffer:
+    """Anillo de líneas de log compartido por todas las vistas"""
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def last_seq(self):
+        """Secuencia de la última entrada agregada (-1 si no hay ninguna)"""
+        return self._next_seq - 1
+
+    def append(self, node, text, t_ns=0):
+        self._entries.append(LogEntry(self._next_seq, node, text, t_ns))
+        self._next_seq += 1
+
+    def since(self, seq):
+        """Entradas con secuencia mayor que `seq`, en orden de llegada"""
+        entries = self._entries
+        if not entries or entries[-1].seq <= seq:
+            return []
+        count = min(entries[-1].seq - seq, len(entries))
+        if count == len(entries):
+            return list(entries)
+        # Recorrer solo la cola nueva del anillo (desde el final)
+        new = list(islice(reversed(entries), count))
+        new.reverse()
+        return new
+
+    def entries(self, node=None):
+        """Todas las entradas conservadas, opcionalmente filtradas por nodo"""
+        if node is None:
+            return list(self._entries)
+        return [entry for entry in self._entries if entry.node == node]
+
+    def clear(self):
+        self._entries.clear()
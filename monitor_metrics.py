@@ -0,0 +1,244 @@
+"""
+Exportador de métricas del Monitor de Semáforos (formato de texto de Prometheus).
+
+El monitor arma una vez por segundo una instantánea con los contadores de cada
+nodo (TX, RX, errores TX, sincronización, estado, distancia), del enlace y del
+enclavamiento, y las métricas del pipeline (líneas/s, tiempo de parseo, espera
+lectura→UI y lectura→pantalla). publish() solo reemplaza la referencia a esa
+instantánea: el servidor HTTP, en su propio thread, la convierte a texto en
+cada consulta sin tomar locks ni tocar el estado que usa la lectura.
+
+No depende de Qt: lo usan la interfaz y las herramientas sin ella.
+
+Uso:
+    exporter = MetricsExporter(port=9108)
+    exporter.start()
+    exporter.publish(node_samples("A", estado) + pipeline_samples(...))
+    # curl http://127.0.0.1:9108/metrics
+"""
+
+import math
+import threading
+import time
+
+from monitor_parser import STATE_NAMES, SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK
+from monitor_state import SYNC_UNKNOWN, SYNC_OK, SYNC_TX_ERROR, SYNC_MAC
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9108
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Valores posibles de los "enum" (una serie por valor, 1 en el actual)
+ESTADOS = tuple(STATE_NAMES.values()) + ('---',)
+SYNC_STATES = (SYNC_UNKNOWN, SYNC_OK, SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK, SYNC_TX_ERROR, SYNC_MAC)
+
+# Nombre -> (tipo, ayuda), en el orden en que se exportan
+METRICS = {
+    'semaforo_tx_total': ('counter', 'Mensajes TX enviados por el nodo'),
+    'semaforo_rx_total': ('counter', 'Mensajes RX recibidos del peer'),
+    'semaforo_tx_errors_total': ('counter', 'Errores de envío ESP-NOW'),
+    'semaforo_tx_errors_consecutive': ('gauge', 'Errores de envío seguidos desde el último envío correcto'),
+    'semaforo_state': ('gauge', 'Estado del semáforo (1 en el estado actual)'),
+    'semaforo_sync': ('gauge', 'Estado de sincronización ESP-NOW (1 en el actual)'),
+    'semaforo_distance_cm': ('gauge', 'Última distancia medida por el HC-SR04'),
+    'semaforo_vehicle': ('gauge', '1 si hay vehículo detectado'),
+    'semaforo_port_connected': ('gauge', '1 si el puerto serial del nodo está abierto'),
+    'semaforo_reconnects_total': ('counter', 'Reconexiones automáticas del puerto serial'),
+    'semaforo_link_loss_ratio': ('gauge', 'Pérdida de mensajes por dirección (ventana deslizante)'),
+    'semaforo_link_jitter_seconds': ('gauge', 'Jitter RFC 3550 por dirección'),
+    'semaforo_clock_drift_ppm': ('gauge', 'Deriva estimada del reloj millis() del nodo'),
+    'semaforo_interlock_violations_total': ('counter', 'Incumplimientos del enclavamiento por tipo'),
+    'semaforo_lines_total': ('counter', 'Líneas recibidas de todos los puertos'),
+    'semaforo_lines_per_second': ('gauge', 'Líneas recibidas por segundo'),
+    'semaforo_parse_seconds_total': ('counter', 'Tiempo de framing y parseo en los threads lectores'),
+    'semaforo_parsed_lines_total': ('counter', 'Líneas parseadas en los threads lectores'),
+    'semaforo_queue_latency_seconds': ('gauge', 'Espera lectura→UI de los lotes (media y máximo del último segundo)'),
+    'semaforo_ui_latency_seconds': ('gauge', 'Lectura→pantalla (media y máximo del último segundo)'),
+    'semaforo_recorder_dropped_batches_total': ('counter', 'Lotes descartados por el grabador de sesiones'),
+    'semaforo_snapshot_age_seconds': ('gauge', 'Antigüedad de la instantánea publicada'),
+}
+
+
+# ==================== INSTANTÁNEAS ====================
+# Una muestra es (nombre, ((etiqueta, valor), ...), valor)
+
+def node_samples(node_id, state):
+    """Muestras de un nodo a partir de su NodeState"""
+    labels = (('node', node_id),)
+    sync = state.sync[0]
+    samples = [
+        ('semaforo_tx_total', labels, state.tx_count),
+        ('semaforo_rx_total', labels, state.rx_count),
+        ('semaforo_tx_errors_total', labels, state.tx_errors),
+        ('semaforo_tx_errors_consecutive', labels, state.tx_error_count),
+        ('semaforo_distance_cm', labels, state.distancia),
+        ('semaforo_vehicle', labels, state.vehiculo),
+    ]
+    samples.extend(('semaforo_state', labels + (('state', estado),), estado == state.estado)
+                   for estado in ESTADOS)
+    samples.extend(('semaforo_sync', labels + (('state', value),), value == sync)
+                   for value in SYNC_STATES)
+    return samples
+
+
+def reader_samples(node_id, reader):
+    """Muestras del lector serial de un nodo: SerialReaderCore o canal de
+    AsyncSerialLoop (None = el puerto todavía no se abrió; cuenta como 0)"""
+    labels = (('node', node_id),)
+    return [
+        ('semaforo_port_connected', labels, reader is not None and reader.connected),
+        ('semaforo_reconnects_total', labels, reader.reconnects if reader is not None else 0),
+    ]
+
+
+def analytics_samples(link_stats, clock_stats, interlock_counts):
+    """Muestras de LinkAnalyzer.stats(), {nodo: ClockSync.stats(nodo)} e
+    InterlockVerifier.counts"""
+    samples = []
+    for (tx_node, rx_node), stats in link_stats.items():
+        labels = (('from', tx_node), ('to', rx_node))
+        samples.append(('semaforo_link_loss_ratio', labels, stats['loss_pct'] / 100))
+        samples.append(('semaforo_link_jitter_seconds', labels, stats['jitter_ms'] / 1000))
+    for node_id, stats in clock_stats.items():
+        if stats is not None:
+            samples.append(('semaforo_clock_drift_ppm', (('node', node_id),), stats['drift_ppm']))
+    samples.extend(('semaforo_interlock_violations_total', (('kind', kind),), count)
+                   for kind, count in interlock_counts.items())
+    return samples
+
+
+def pipeline_samples(lines_total, lines_per_s, parse_stats, queue_latency, ui_latency=None,
+                     dropped_batches=0):
+    """Muestras del pipeline (latencias como LatencyStats.summary_ms(); sin
+    interfaz no hay ui_latency)"""
+    samples = [
+        ('semaforo_lines_total', (), lines_total),
+        ('semaforo_lines_per_second', (), lines_per_s),
+        ('semaforo_parse_seconds_total', (), parse_stats.ns / 1e9),
+        ('semaforo_parsed_lines_total', (), parse_stats.lines),
+        ('semaforo_recorder_dropped_batches_total', (), dropped_batches),
+    ]
+    for name, summary in (('semaforo_queue_latency_seconds', queue_latency),
+                          ('semaforo_ui_latency_seconds', ui_latency)):
+        if summary is None:
+            continue
+        samples.append((name, (('stat', 'mean'),), summary['mean_ms'] / 1000))
+        samples.append((name, (('stat', 'max'),), summary['max_ms'] / 1000))
+    return samples
+
+
+# ==================== FORMATO ====================
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value is None:
+        return 'NaN'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _sample_line(name, labels, value):
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+    return f"{name}{{{label_text}}} {_format_value(value)}"
+
+
+def render_text(samples):
+    """Texto de exposición de Prometheus (HELP/TYPE una vez por métrica)"""
+    by_name = {}
+    for name, labels, value in samples:
+        by_name.setdefault(name, []).append((labels, value))
+    out = []
+    for name, (kind, help_text) in METRICS.items():
+        rows = by_name.pop(name, None)
+        if rows is None:
+            continue
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(_sample_line(name, labels, value) for labels, value in rows)
+    for name, rows in by_name.items():  # Métricas no declaradas en METRICS
+        out.append(f"# TYPE {name} untyped")
+        out.extend(_sample_line(name, labels, value) for labels, value in rows)
+    return ("\n".join(out) + "\n").encode('utf-8')
+
+
+# ==================== SERVIDOR ====================
+
+def _make_server(host, port, exporter):
+    """Servidor HTTP de /metrics (http.server se importa aquí: pesa ~40 ms al
+    arrancar y solo hace falta con el exportador activo)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = exporter.render()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Sin una línea en stderr por cada consulta
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class MetricsExporter:
+    """Servidor HTTP en un thread aparte que publica la última instantánea"""
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self._samples = ()
+        self._published = time.monotonic()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Abrir el puerto (OSError si está ocupado) y atender en segundo plano"""
+        self._server = _make_server(self.host, self.port, self)
+        self.port = self._server.server_address[1]  # Puerto real si se pidió 0
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="MetricsExporter", daemon=True)
+        self._thread.start()
+
+    def publish(self, samples):
+        """Reemplazar la instantánea (no bloquea: solo cambia una referencia)"""
+        self._samples = tuple(samples)
+        self._published = time.monotonic()
+
+    def render(self):
+        self.scrapes += 1
+        samples = self._samples
+        age = time.monotonic() - self._published
+        return render_text(samples + (('semaforo_snapshot_age_seconds', (), age),))
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def close(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
@@ -0,0 +1,240 @@
+"""
+Parser de líneas seriales del Monitor de Semáforos.
+
+Clasifica cada línea recibida de los ESP32 en un único evento tipado usando
+una tabla de despacho por prefijo y patrones precompilados. Las líneas que no
+empiezan por un prefijo conocido se resuelven con una tabla de palabras clave
+literales, de modo que cada línea se clasifica una sola vez en lugar de pasar
+por la cascada de re.match/re.search e `in` de MainWindow.
+
+Uso:
+    from monitor_parser import parse_line
+    evento = parse_line("TX: estado=1, request=0, dist=45")
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+
+# Códigos de estado del firmware (TrafficState) -> nombre mostrado en la UI
+STATE_NAMES = {
+    0: 'ALL RED',
+    1: 'VERDE',
+    2: 'AMARILLO',
+    3: 'ROJO',
+}
+
+# Estados de sincronización reportados por SyncEvent
+SYNC_LOST = 'SIN_SYNC'
+SYNC_PEER_OK = 'PEER_OK'
+SYNC_INIT_OK = 'INIT_OK'
+
+
+# ==================== EVENTOS ====================
+
+class CsvTelemetry(NamedTuple):
+    """Línea CSV: seq,ts,state,dist,veh,auto"""
+    seq: int
+    ts: int
+    state: int
+    dist: int
+    vehicle: bool
+    auto: bool
+
+
+class TxFrame(NamedTuple):
+    """Mensaje ESP-NOW transmitido por el nodo local (seq/timestamp_ms solo
+    si el firmware los reporta)"""
+    state: int
+    request: int
+    dist: int
+    seq: Optional[int] = None
+    timestamp_ms: Optional[int] = None
+
+
+class RxFrame(NamedTuple):
+    """Mensaje ESP-NOW recibido del nodo remoto"""
+    sender: int
+    state: int
+    request: int
+    dist: int
+    seq: Optional[int] = None
+    timestamp_ms: Optional[int] = None
+
+
+class StateTransition(NamedTuple):
+    """Cambio de estado del semáforo local ('-> VERDE', ...)"""
+    state: str
+
+
+class SyncEvent(NamedTuple):
+    """Cambio en la sincronización ESP-NOW (SIN_SYNC, PEER_OK, INIT_OK)"""
+    status: str
+
+
+class TxError(NamedTuple):
+    """Error de transmisión ESP-NOW"""
+
+
+class PeerMac(NamedTuple):
+    """MAC del peer registrada por el firmware"""
+    mac: str
+
+
+class DistanceReading(NamedTuple):
+    """Distancia reportada fuera de los mensajes TX/RX/CSV"""
+    dist: int
+
+
+class SerialLine(NamedTuple):
+    """Línea recibida: hora de recepción, texto, evento ya clasificado y
+    momento de lectura de sus bytes (time.monotonic_ns, 0 si no aplica)"""
+    stamp: str
+    text: str
+    event: Optional[tuple]
+    t_read_ns: int = 0
+
+
+TX_ERROR = TxError()
+
+# Marca interna: la línea se reconoció pero no produce evento
+_NO_EVENT = object()
+
+
+# ==================== PATRONES PRECOMPILADOS ====================
+
+_CSV_RE = re.compile(r'\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([01])\s*,\s*([01])\s*$')
+# seq/ts son opcionales: el firmware anterior no los imprimía
+_TX_RE = re.compile(r'TX: estado=(\d+), request=(\d+), dist=(\d+)(?:, seq=(\d+), ts=(\d+))?')
+_RX_RE = re.compile(r'RX de ESP (\d+): estado=(\d+), request=(\d+), dist=(\d+)(?:, seq=(\d+), ts=(\d+))?')
+_TRANSITION_RE = re.compile(r'-> (VERDE|AMARILLO|ROJO|ALL_RED)')
+
+_DIST_RE = re.compile(r'dist[ancia]*[=:]\s*(\d+)', re.IGNORECASE)
+_MAC_RE = re.compile(r'Peer MAC:.*?([0-9A-F]{2}(?::[0-9A-F]{2}){5})')
+
+_TRANSITION_NAMES = {
+    'VERDE': 'VERDE',
+    'AMARILLO': 'AMARILLO',
+    'ROJO': 'ROJO',
+    'ALL_RED': 'ALL RED',
+}
+
+
+# ==================== MANEJADORES POR PREFIJO ====================
+
+def _parse_csv(line):
+    m = _CSV_RE.match(line)
+    if m is None:
+        return None
+    seq, ts, state, dist, veh, auto = m.groups()
+    return CsvTelemetry(int(seq), int(ts), int(state), int(dist), veh == '1', auto == '1')
+
+
+def _parse_tx(line):
+    m = _TX_RE.match(line)
+    if m is None:
+        return None
+    estado, request, dist, seq, ts = m.groups()
+    if seq is None:
+        return TxFrame(int(estado), int(request), int(dist))
+    return TxFrame(int(estado), int(request), int(dist), int(seq), int(ts))
+
+
+def _parse_rx(line):
+    m = _RX_RE.match(line)
+    if m is None:
+        return None
+    sender, estado, request, dist, seq, ts = m.groups()
+    if seq is None:
+        return RxFrame(int(sender), int(estado), int(request), int(dist))
+    return RxFrame(int(sender), int(estado), int(request), int(dist), int(seq), int(ts))
+
+
+def _parse_transition(line):
+    m = _TRANSITION_RE.match(line)
+    if m is None:
+        return None
+    return StateTransition(_TRANSITION_NAMES[m.group(1)])
+
+
+def _search_tx(line):
+    m = _TX_RE.search(line)
+    return _parse_tx(m.group(0)) if m else None
+
+
+def _search_rx(line):
+    m = _RX_RE.search(line)
+    return _parse_rx(m.group(0)) if m else None
+
+
+def _search_transition(line):
+    m = _TRANSITION_RE.search(line)
+    return StateTransition(_TRANSITION_NAMES[m.group(1)]) if m else None
+
+
+def _search_mac(line):
+    m = _MAC_RE.search(line)
+    return PeerMac(m.group(1)) if m else None
+
+
+def _parse_idf_log(line):
+    # Líneas de log del ESP-IDF ("E (7813) i2c.master: ..."): nunca traen
+    # eventos del semáforo y son la mayoría durante una tormenta de errores I2C.
+    if len(line) > 2 and line[1] == ' ' and line[2] == '(':
+        return _NO_EVENT
+    return None
+
+
+# Despacho por primer carácter: las líneas frecuentes del firmware
+# (TX, RX, transiciones y CSV) se resuelven con un único match anclado.
+_DISPATCH = {
+    'T': _parse_tx,
+    'R': _parse_rx,
+    '-': _parse_transition,
+    'E': _parse_idf_log,
+    'W': _parse_idf_log,
+    'I': _parse_idf_log,
+}
+_DISPATCH.update({digit: _parse_csv for digit in '0123456789'})
+
+# Resto de líneas: palabras clave literales (búsqueda en C) en orden de
+# prioridad; la expresión regular solo se ejecuta cuando la palabra aparece.
+_KEYWORDS = (
+    ('TX: ', _search_tx),
+    ('RX de ESP ', _search_rx),
+    ('-> ', _search_transition),
+    ('SIN SYNC', SyncEvent(SYNC_LOST)),
+    ('Sin comunicación', SyncEvent(SYNC_LOST)),
+    ('Peer añadido correctamente', SyncEvent(SYNC_PEER_OK)),
+    ('ESP-NOW inicializado OK', SyncEvent(SYNC_INIT_OK)),
+    ('Error TX ESP-NOW', TX_ERROR),
+    ('Callback: Error', TX_ERROR),
+    ('status=1', TX_ERROR),
+    ('Peer MAC:', _search_mac),
+)
+
+def _parse_general(line):
+    for keyword, action in _KEYWORDS:
+        if keyword in line:
+            event = action(line) if callable(action) else action
+            if event is not None:
+                return event
+    if 'dist' in line.lower():
+        m = _DIST_RE.search(line)
+        if m:
+            return DistanceReading(int(m.group(1)))
+    return None
+
+
+def parse_line(line) -> Optional[tuple]:
+    """Clasificar una línea (ya sin espacios extremos) en un evento o None"""
+    if not line:
+        return None
+    handler = _DISPATCH.get(line[0])
+    if handler is not None:
+        event = handler(line)
+        if event is _NO_EVENT:
+            return None
+        if event is not None:
+            return event
+    return _parse_general(line)
@@ -0,0 +1,57 @@
+"""
+Flujo de análisis de eventos del Monitor de Semáforos, sin Qt.
+
+Cada SerialLine pasa por ClockSync.event_time -> NodeState.apply ->
+LinkAnalyzer.feed -> InterlockVerifier.feed. Lo usan MainWindow,
+HeadlessMonitor y ReplayEngine, así la reproducción de una sesión analiza las
+líneas igual que el monitor en vivo.
+"""
+
+from monitor_state import NodeState
+from monitor_link import LinkAnalyzer, peer_of
+from monitor_interlock import InterlockVerifier
+from monitor_clock import ClockSync
+
+
+class EventPipeline:
+    """Estado, reloj, enlace y enclavamiento de todos los nodos"""
+    def __init__(self, on_violation=None):
+        self.states = {}  # node_id -> NodeState
+        self.clocks = ClockSync()
+        # Pérdida/jitter por dirección a partir del seq de los TX y RX de cada par
+        self.link = LinkAnalyzer()
+        # Enclavamiento A/B (nunca ambos en verde/amarillo)
+        self.interlock = InterlockVerifier(on_violation=on_violation)
+
+    def add_node(self, node_id, state=None):
+        """Registrar un nodo y emparejarlo con su peer (A <-> B, A2 <-> B2) si ya está"""
+        if state is None:
+            state = NodeState(node_id)
+        self.states[node_id] = state
+        peer = peer_of(node_id)
+        if peer in self.states and peer != node_id:
+            pair = sorted((node_id, peer))
+            self.link.pair(*pair)
+            self.interlock.pair(*pair)
+        return state
+
+    def process(self, node_id, items, now_ns, on_line=None):
+        """Aplicar un lote de SerialLine de `node_id`; `on_line(item, t_ns)` se
+        llama con cada línea (también las que no traen evento)"""
+        state = self.states.get(node_id)
+        if state is None:
+            return
+        apply = state.apply
+        event_time = self.clocks.event_time
+        link_feed = self.link.feed
+        interlock_feed = self.interlock.feed
+        for item in items:
+            # Hora de generación estimada con el millis() del nodo (ordena A y B entre sí)
+            event = item.event
+            t_ns = event_time(node_id, event, item.t_read_ns or now_ns)
+            if on_line is not None:
+                on_line(item, t_ns)
+            if event is not None:
+                apply(event)
+                link_feed(node_id, event, t_ns)
+                interlock_feed(node_id, event, t_ns)
@@ -0,0 +1,234 @@
+"""
+Inventario de puertos seriales con aviso de conexión y desconexión, sin Qt.
+
+PortWatcher mantiene en memoria los puertos presentes (ListPortInfo de pyserial,
+con VID/PID, número de serie y descripción) y llama a on_change(agregados,
+quitados) desde su propio thread cuando cambian. ports() solo lee ese
+inventario: las interfaces llenan la lista de puertos al instante, sin llamar
+a comports() en el thread de la interfaz.
+
+En Linux vigila /dev con inotify: al aparecer o desaparecer un ttyUSB*, ttyACM*,
+etc. solo se consulta sysfs para ese dispositivo (no se reescanea todo). Si la
+cola de inotify se desborda o se pide rescan(), se hace un escaneo completo. En
+otros sistemas (o si inotify no está disponible) el thread compara comports()
+cada POLL_INTERVAL_S.
+
+Uso:
+    watcher = PortWatcher(on_change=lambda added, removed: print(added, removed))
+    watcher.start()
+    watcher.ports()   # [ListPortInfo, ...] ordenados por nombre
+    watcher.stop()
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+
+from serial.tools import list_ports
+
+
+DEV_DIR = '/dev'
+# Los mismos nombres que busca list_ports_linux.comports()
+PORT_PREFIXES = ('ttyS', 'ttyUSB', 'ttyXRUSB', 'ttyACM', 'ttyAMA', 'rfcomm', 'ttyAP')
+POLL_INTERVAL_S = 2.0  # Sondeo de comports() sin inotify
+
+# Backends
+WATCH_INOTIFY = "inotify"
+WATCH_POLL = "poll"
+
+# inotify(7)
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (+ nombre de len bytes)
+
+
+def describe_port(info):
+    """Texto para la lista de puertos: descripción, VID:PID y número de serie"""
+    parts = [info.description] if info.description and info.description != 'n/a' else []
+    if info.vid is not None:
+        parts.append(f"{info.vid:04x}:{info.pid:04x}")
+    if info.serial_number:
+        parts.append(f"SN {info.serial_number}")
+    return f"{info.device} - {' '.join(parts)}" if parts else info.device
+
+
+def _inotify_open(path):
+    """Descriptor inotify que vigila altas/bajas en `path` (None si no se puede)"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+    if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _port_info(device):
+    """ListPortInfo de un dispositivo de /dev (None si no es un puerto presente)"""
+    from serial.tools.list_ports_linux import SysFS
+    if not os.path.exists(device):
+        return None
+    info = SysFS(device)
+    if info.subsystem == "platform":  # Puerto interno no presente (igual que comports)
+        return None
+    return info
+
+
+class PortWatcher:
+    """Inventario de puertos actualizado en segundo plano"""
+    def __init__(self, on_change=None, poll_interval_s=POLL_INTERVAL_S, dev_dir=DEV_DIR):
+        self.on_change = on_change    # on_change([ListPortInfo agregados], [ListPortInfo quitados])
+        self.poll_interval_s = poll_interval_s
+        self.dev_dir = dev_dir
+        self.backend = None
+        self.scans = 0                # Escaneos completos (comports)
+        self.lookups = 0              # Consultas de un solo dispositivo (inotify)
+        self._ports = {}              # device -> ListPortInfo (se reemplaza entero, se lee sin lock)
+        self._running = False
+        self._rescan = False
+        self._reported = False        # Ya se avisó el escaneo inicial
+        self._thread = None
+        self._inotify_fd = None
+        self._wake_fds = None         # Pipe para despertar el select() (inotify)
+        self._wake = threading.Event()  # Despertar el sondeo
+
+    def start(self):
+        """Escanear en segundo plano y empezar a vigilar.
+
+        El primer on_change trae todos los puertos y llega siempre, aunque no
+        haya ninguno: las interfaces lo usan para saber que terminó el escaneo
+        inicial."""
+        self._reported = False
+        self._inotify_fd = _inotify_open(self.dev_dir)
+        if self._inotify_fd is not None:
+            self.backend = WATCH_INOTIFY
+            self._wake_fds = os.pipe()
+            target = self._run_inotify
+        else:
+            self.backend = WATCH_POLL
+            target = self._run_poll
+        self._running = True
+        self._thread = threading.Thread(target=target, name="PortWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s=2.0):
+        if self._thread is None:
+            return
+        self._running = False
+        self._notify()
+        self._thread.join(timeout_s)
+        self._thread = None
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            for fd in self._wake_fds:
+                os.close(fd)
+            self._inotify_fd = self._wake_fds = None
+
+    def ports(self):
+        """Puertos presentes según el último cambio visto (no consulta al sistema)"""
+        return sorted(self._ports.values())
+
+    def rescan(self):
+        """Pedir un escaneo completo en el thread del vigilante (no bloquea)"""
+        self._rescan = True
+        self._notify()
+
+    def _notify(self):
+        if self._wake_fds is not None:
+            os.write(self._wake_fds[1], b'\0')
+        self._wake.set()
+
+    # ---------- thread del vigilante ----------
+
+    def _run_poll(self):
+        while self._running:
+            self._scan()
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+
+    def _run_inotify(self):
+        fd, wake_fd = self._inotify_fd, self._wake_fds[0]
+        self._scan()
+        while self._running:
+            readable, _, _ = select.select([fd, wake_fd], [], [])
+            if wake_fd in readable:
+                os.read(wake_fd, 4096)
+            if not self._running:
+                break
+            names = set()
+            overflow = False
+            if fd in readable:
+                overflow = self._read_events(fd, names)
+            if overflow or self._rescan:
+                self._scan()
+            elif names:
+                self.lookups += len(names)
+                devices = [os.path.join(self.dev_dir, name) for name in names]
+                found = {}
+                for device in devices:
+                    info = _port_info(device)
+                    if info is not None:
+                        found[device] = info
+                self._update(found, devices)
+
+    def _read_events(self, fd, names):
+        """Agregar a `names` los puertos con altas/bajas pendientes (True si hubo desborde)"""
+        overflow = False
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return overflow
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif name.decode('utf-8', 'replace').startswith(PORT_PREFIXES):
+                    names.add(name.decode('utf-8', 'replace'))
+
+    def _scan(self):
+        self._rescan = False
+        self.scans += 1
+        try:
+            found = {info.device: info for info in list_ports.comports()}
+        except OSError:
+            return
+        self._update(found)
+
+    def _update(self, found, devices=None):
+        """Aplicar un escaneo de todos los puertos (devices=None) o solo de `devices`"""
+        old = self._ports
+        checked = old.keys() if devices is None else devices
+        removed = [old[device] for device in checked
+                   if device in old and (device not in found or found[device].hwid != old[device].hwid)]
+        added = [info for device, info in found.items()
+                 if device not in old or info.hwid != old[device].hwid]
+        if not added and not removed and self._reported:
+            return
+        ports = dict(old)
+        for info in removed:
+            del ports[info.device]
+        for info in added:
+            ports[info.device] = info
+        self._ports = ports
+        self._reported = True
+        if self.on_change is not None:
+            self.on_change(added, removed)
@@ -0,0 +1,338 @@
+"""
+Lectura serial por thread del Monitor de Semáforos, sin Qt.
+
+SerialReaderCore abre un puerto con pyserial, separa líneas y tramas binarias
+con LineFramer, sella y parsea en el thread que ejecuta run() y entrega los
+lotes por callback, con la misma ventana de agrupación que AsyncSerialLoop.
+La interfaz lo envuelve en SerialReader (un QThread que emite señales) y el
+modo sin interfaz (monitor_headless) lo corre en un threading.Thread.
+
+Si el puerto se cae (el ESP32 se reinicia, un corte en el USB), el lector no
+termina: cierra la conexión, entrega lo ya leído y reintenta con espera
+exponencial (RECONNECT_INITIAL_S a RECONNECT_MAX_S). Mientras espera, vigila
+cada RECONNECT_POLL_S si el dispositivo reapareció para reabrirlo enseguida,
+sin escanear comports(): consulta el inventario en memoria de un PortWatcher
+(monitor_ports) si se le pasa uno, o si no solo la ruta del puerto (POSIX); sin
+ninguno de los dos (COM sin PortWatcher) espera el intervalo completo.
+Si el dispositivo USB tiene número de serie, se busca por él, así que se
+reencuentra aunque el sistema le asigne otro puerto (/dev/ttyUSB0 -> ttyUSB1,
+COM3 -> COM7). Cada puerto tiene su propio lector: los demás no se enteran.
+
+Uso:
+    reader = SerialReaderCore("/dev/ttyUSB0", 115200, "A", on_lines=print, on_status=print)
+    threading.Thread(target=reader.run).start()
+    ...
+    reader.stop()
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+import serial
+from serial.tools import list_ports
+
+from monitor_parser import parse_line, SerialLine
+from monitor_framing import LineFramer, frame_text
+from monitor_stats import ParseStats
+
+
+# Transportes seriales disponibles
+TRANSPORT_THREADS = "threads"  # Un lector (thread) por puerto
+TRANSPORT_ASYNCIO = "asyncio"  # Un event loop asyncio para todos (Linux/macOS)
+
+# Estados del lector
+READER_CONNECTING = "conectando"
+READER_CONNECTED = "conectado"
+READER_RECONNECTING = "reconectando"
+READER_STOPPED = "detenido"
+
+RECONNECT_INITIAL_S = 0.05   # Primera espera tras perder el puerto
+RECONNECT_MAX_S = 1.0        # Tope de la espera exponencial
+RECONNECT_POLL_S = 0.05      # Vigilancia de reaparición del dispositivo durante la espera
+
+
+def usb_serial_number(port):
+    """Número de serie USB del dispositivo en `port` (None si no es USB o no lo informa)"""
+    for info in list_ports.comports():
+        if info.device == port:
+            return info.serial_number
+    return None
+
+
+def find_port_by_serial(serial_number, port_watcher=None):
+    """Puerto actual del dispositivo USB con ese número de serie (None si no está).
+    Con port_watcher (monitor_ports.PortWatcher) busca en su inventario en memoria."""
+    ports = list_ports.comports() if port_watcher is None else port_watcher.ports()
+    for info in ports:
+        if info.serial_number == serial_number:
+            return info.device
+    return None
+
+
+def device_present(port, usb_serial=None, port_watcher=None):
+    """¿Está el dispositivo? Sin escanear comports(): el inventario de
+    port_watcher o la ruta del puerto (POSIX); None si no se puede saber barato"""
+    if port_watcher is not None:
+        for info in port_watcher.ports():
+            if info.device == port or (usb_serial and info.serial_number == usb_serial):
+                return True
+        return False
+    if port.startswith('/'):
+        return os.path.exists(port)
+    return None
+
+
+class SerialReaderCore:
+    """Leer, sellar y parsear un puerto serial desde el thread que llama a run()"""
+    def __init__(self, port, baudrate=115200, port_id="A", batch_interval_ms=20,
+                 serial_factory=serial.Serial, read_mode="blocking", on_lines=None, on_status=None,
+                 reconnect=True, port_watcher=None):
+        self.on_lines = on_lines      # on_lines(port_id, [SerialLine, ...])
+        self.on_status = on_status    # on_status(port_id, mensaje)
+        self.port = port
+        self.baudrate = baudrate
+        self.port_id = port_id
+        # Agrupación de líneas por entrega a on_lines:
+        #   None -> una entrega por línea
+        #   0    -> una entrega por bloque leído
+        #   > 0  -> como máximo una entrega cada batch_interval_ms mientras llegan datos
+        self.batch_interval_ms = batch_interval_ms
+        self.serial_factory = serial_factory
+        # Modo de lectura:
+        #   "blocking" -> read() bloqueante con timeout: entrega al llegar el primer byte
+        #   "poll"     -> sondeo de in_waiting con pausa de 10 ms (modo anterior)
+        self.read_mode = read_mode
+        # Reintentar al perder el puerto (False = terminar como antes)
+        self.reconnect = reconnect
+        # Inventario de puertos compartido (monitor_ports.PortWatcher) para
+        # buscar el dispositivo tras un corte sin escanear comports()
+        self.port_watcher = port_watcher
+        self.state = READER_STOPPED
+        self.running = False
+        self.serial_conn = None
+        self.usb_serial = None       # Número de serie USB visto al conectar
+        self.reconnects = 0
+        self.last_outage_s = None    # Duración del último corte recuperado
+        self._lost_ns = None         # Inicio del corte en curso
+        self._attempts = 0
+        self._delay = RECONNECT_INITIAL_S
+        self._wake = threading.Event()
+        self._pending = []
+        self._last_emit = 0.0
+        self.parse_stats = ParseStats()
+
+    @property
+    def connected(self):
+        return self.serial_conn is not None
+
+    def run(self):
+        if self._wake.is_set():
+            return  # stop() antes de empezar
+        self.running = True
+        self.state = READER_CONNECTING
+        self._status(self.port_id, f"Conectando a {self.port}...")
+        # El framer sobrevive a los cortes: una línea partida por un corte breve se completa
+        framer = LineFramer()
+        while self.running:
+            if not self._open():
+                if not self.reconnect:
+                    break
+                self._wait_reconnect()
+                continue
+            error = self._read_loop(framer)
+            self._close_conn()
+            if not self.running:
+                break
+            self._emit_line(f"ERROR serial: {error}")
+            self._flush()
+            if not self.reconnect:
+                break
+            self._lost_ns = time.monotonic_ns()
+            self.state = READER_RECONNECTING
+            self._status(self.port_id, f"🔌 Puerto perdido ({error}); reconectando...")
+        self.running = False
+        self.state = READER_STOPPED
+        self._flush()
+
+    def _open(self):
+        """Abrir el puerto (buscándolo por número de serie USB tras un corte)"""
+        port = self.port
+        if self.usb_serial and self._lost_ns is not None:
+            port = find_port_by_serial(self.usb_serial, self.port_watcher) or port
+        try:
+            conn = self.serial_factory(
+                port=port,
+                baudrate=self.baudrate,
+                timeout=1,
+                write_timeout=1
+            )
+            # Limpiar buffer
+            conn.reset_input_buffer()
+            conn.reset_output_buffer()
+        except (serial.SerialException, OSError) as e:
+            self._attempts += 1
+            if self._attempts == 1 and self.state == READER_CONNECTING:
+                self._status(self.port_id, f"❌ Error: {e}")
+                self._emit_line(f"ERROR: No se pudo abrir {port} - {e}")
+                self._flush()
+            return False
+        except Exception as e:
+            self._status(self.port_id, f"❌ Error inesperado: {e}")
+            self._emit_line(f"ERROR FATAL: {e}")
+            self.running = False
+            return False
+        if not self.running:  # stop() durante la apertura
+            conn.close()
+            return False
+        self.serial_conn = conn
+        if port != self.port:
+            self._status(self.port_id, f"🔁 Dispositivo {self.usb_serial} reapareció en {port} (antes {self.port})")
+            self.port = port
+        self.usb_serial = usb_serial_number(port) or self.usb_serial
+        if self.state == READER_CONNECTING:
+            self._status(self.port_id, f"✅ Conectado a {self.port} @ {self.baudrate} baud")
+            self._emit_line(f"=== CONECTADO a {self.port} ({self.baudrate} baud) ===")
+        else:
+            self.last_outage_s = (time.monotonic_ns() - self._lost_ns) / 1e9
+            self.reconnects += 1
+            self._status(self.port_id, f"✅ Reconectado a {self.port} tras {self.last_outage_s * 1000:.0f} ms "
+                                       f"({self._attempts + 1} intentos)")
+            self._emit_line(f"=== RECONECTADO a {self.port} tras {self.last_outage_s * 1000:.0f} ms ===")
+        self._flush()
+        self.state = READER_CONNECTED
+        self._lost_ns = None
+        self._attempts = 0
+        self._delay = RECONNECT_INITIAL_S
+        return True
+
+    def _read_loop(self, framer):
+        """Leer hasta stop() o un error del puerto (devuelve el error)"""
+        while self.running:
+            try:
+                chunk = self._read_chunk()
+                if not chunk:
+                    self._flush()
+                    continue
+                # Sello al llegar los bytes: todas las líneas del bloque lo comparten
+                t_read_ns = time.monotonic_ns()
+                stamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+
+                # Procesar líneas completas (se decodifican solo líneas enteras)
+                # y tramas binarias de telemetría (ya son eventos)
+                t0 = time.perf_counter_ns()
+                lines = 0
+                for item in framer.feed(chunk):
+                    lines += 1
+                    if type(item) is str:
+                        self._emit_line(item, t_read_ns, stamp)
+                    else:
+                        self._emit_event(item, t_read_ns, stamp)
+                self.parse_stats.add(lines, time.perf_counter_ns() - t0)
+
+                # Enviar el lote si venció la ventana o ya no quedan datos
+                self._flush(self.serial_conn.in_waiting == 0)
+
+            except (serial.SerialException, OSError) as e:
+                return e
+            except Exception as e:
+                if not self.running:
+                    return e  # Puerto cerrado por stop() en medio de una lectura
+                self._emit_line(f"ERROR inesperado: {e}")
+        return None
+
+    def _wait_reconnect(self):
+        """Esperar el próximo intento; volver antes si el dispositivo reaparece"""
+        if self.state == READER_CONNECTING and self._attempts == 1:
+            # Falló la primera apertura: se sigue intentando hasta stop()
+            self._status(self.port_id, f"⏳ Reintentando {self.port}...")
+        deadline = time.monotonic() + self._delay
+        self._delay = min(self._delay * 2, RECONNECT_MAX_S)
+        present = self._device_present()
+        if present is None:
+            # Sin forma barata de saberlo: esperar el intervalo completo
+            self._wake.wait(max(0.0, deadline - time.monotonic()))
+            return
+        while self.running and time.monotonic() < deadline:
+            if self._wake.wait(RECONNECT_POLL_S):
+                return
+            now_present = self._device_present()
+            if now_present and not present:
+                return  # Reapareció: intentar ya, sin esperar el resto
+            present = now_present
+
+    def _device_present(self):
+        return device_present(self.port, self.usb_serial, self.port_watcher)
+
+    def _close_conn(self):
+        conn, self.serial_conn = self.serial_conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _status(self, port_id, message):
+        if self.on_status is not None:
+            self.on_status(port_id, message)
+
+    def _read_chunk(self):
+        """Leer los bytes disponibles según read_mode (b'' si no llegó nada)"""
+        conn = self.serial_conn
+        if self.read_mode == "poll":
+            waiting = conn.in_waiting
+            if waiting == 0:
+                # Pequeña pausa si no hay datos
+                time.sleep(0.01)
+                return b''
+            return conn.read(waiting)
+        # Bloquea (sin consumir CPU) hasta el primer byte o el timeout del puerto
+        chunk = conn.read(1)
+        if chunk:
+            waiting = conn.in_waiting
+            if waiting:
+                chunk += conn.read(waiting)
+        return chunk
+
+    def _emit_line(self, line, t_read_ns=0, stamp=None):
+        """Clasificar la línea en este thread y encolarla para el próximo lote
+        (sin t_read_ns, p. ej. mensajes de conexión, se sella en este momento)"""
+        if not t_read_ns:
+            t_read_ns = time.monotonic_ns()
+        if stamp is None:
+            stamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        self._pending.append(SerialLine(stamp, line, parse_line(line), t_read_ns))
+        if self.batch_interval_ms is None:
+            self._flush()
+
+    def _emit_event(self, event, t_read_ns, stamp):
+        """Encolar un evento decodificado de una trama binaria (sin parseo de texto)"""
+        self._pending.append(SerialLine(stamp, frame_text(event), event, t_read_ns))
+        if self.batch_interval_ms is None:
+            self._flush()
+
+    def _flush(self, force=True):
+        """Entregar las líneas pendientes en una sola llamada a on_lines"""
+        if not self._pending:
+            return
+        if not force and self.batch_interval_ms:
+            if (time.monotonic() - self._last_emit) * 1000 < self.batch_interval_ms:
+                return
+        batch, self._pending = self._pending, []
+        self._last_emit = time.monotonic()
+        self.on_lines(self.port_id, batch)
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        conn = self.serial_conn
+        if conn and conn.is_open:
+            try:
+                # Despertar un read() bloqueado (pyserial POSIX)
+                if hasattr(conn, 'cancel_read'):
+                    conn.cancel_read()
+                conn.close()
+                self._status(self.port_id, f"Desconectado de {self.port}")
+            except Exception as e:
+                print(f"Error cerrando puerto: {e}")
@@ -0,0 +1,428 @@
+"""
+Grabación de sesiones del Monitor de Semáforos.
+
+SessionRecorder guarda cada línea recibida (con su evento ya parseado) en dos
+archivos de solo anexado:
+
+  <base>.evt     Bloques columnares: tiempo, nodo, tipo de evento, estado,
+                 distancia, request, seq y contadores TX/RX por nodo.
+  <base>.raw.gz  Texto de las líneas, un miembro gzip por bloque.
+
+La fila i de un bloque .evt corresponde a la línea i del miembro gzip del
+mismo bloque. La escritura ocurre en un thread propio: el thread de la UI solo
+encola lotes. Cada bloque se escribe entero y se sincroniza a disco, de modo
+que una caída pierde como máximo el bloque en curso; al leer, un bloque
+truncado o con CRC inválido marca el final de la sesión.
+
+Uso:
+    recorder = SessionRecorder("sesiones/sesion_20250101_120000")
+    recorder.start()
+    recorder.record_batch("A", items)   # items: [SerialLine, ...]
+    recorder.close()
+
+    for record in iter_records("sesiones/sesion_20250101_120000"):
+        print(record.t_ns, record.node, record.kind, record.text)
+"""
+
+import gzip
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import traceback
+import zlib
+from array import array
+from typing import NamedTuple
+
+from monitor_parser import (
+    STATE_NAMES, SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK,
+    CsvTelemetry, TxFrame, RxFrame, StateTransition, SyncEvent, TxError,
+    PeerMac, DistanceReading
+)
+
+
+FILE_MAGIC = b'SEMREC1\n'
+CHUNK_MAGIC = b'CHNK'
+# magic, filas, largo del payload, crc32 del payload
+CHUNK_HEADER = struct.Struct('<4sIII')
+
+EVT_SUFFIX = '.evt'
+RAW_SUFFIX = '.raw.gz'
+
+# Tipos de evento (columna "kind")
+KIND_NONE = 0
+KIND_CSV = 1
+KIND_TX = 2
+KIND_RX = 3
+KIND_TRANSITION = 4
+KIND_SYNC = 5
+KIND_TX_ERROR = 6
+KIND_PEER_MAC = 7
+KIND_DISTANCE = 8
+
+KIND_NAMES = {
+    KIND_NONE: 'NONE',
+    KIND_CSV: 'CSV',
+    KIND_TX: 'TX',
+    KIND_RX: 'RX',
+    KIND_TRANSITION: 'TRANSITION',
+    KIND_SYNC: 'SYNC',
+    KIND_TX_ERROR: 'TX_ERROR',
+    KIND_PEER_MAC: 'PEER_MAC',
+    KIND_DISTANCE: 'DISTANCE',
+}
+
+# En filas SYNC la columna "state" guarda el índice del estado de sincronización
+SYNC_CODES = (SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK)
+
+_STATE_CODES = {name: code for code, name in STATE_NAMES.items()}
+
+# Columnas en orden de escritura: (nombre, typecode de array)
+COLUMNS = (
+    ('t_ns', 'q'),       # Hora de lectura (ns desde epoch)
+    ('node', 'B'),       # Índice en la tabla de nodos del bloque
+    ('kind', 'B'),
+    ('state', 'b'),      # -1 = no aplica
+    ('dist', 'i'),       # -1 = no aplica
+    ('request', 'b'),    # -1 = no aplica
+    ('seq', 'i'),        # -1 = no aplica
+    ('tx_count', 'I'),   # Contadores acumulados del nodo
+    ('rx_count', 'I'),
+)
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_FLUSH_INTERVAL = 1.0  # s: un bloque parcial se escribe como máximo cada este tiempo
+DEFAULT_QUEUE_SIZE = 10000    # Lotes pendientes antes de descartar
+CLOSE_TIMEOUT_S = 5.0         # Espera máxima al cerrar (encolar el fin y vaciar la cola)
+
+INT32_MAX = 2 ** 31 - 1
+
+
+class Record(NamedTuple):
+    """Fila de una sesión grabada"""
+    t_ns: int
+    node: str
+    kind: int
+    state: int
+    dist: int
+    request: int
+    seq: int
+    tx_count: int
+    rx_count: int
+    text: str
+
+
+def _event_columns(event):
+    """(kind, state, dist, request, seq) de un evento de monitor_parser"""
+    event_type = type(event)
+    if event_type is TxFrame:
+        seq = -1 if event.seq is None else event.seq
+        return KIND_TX, event.state, event.dist, event.request, seq
+    if event_type is RxFrame:
+        seq = -1 if event.seq is None else event.seq
+        return KIND_RX, event.state, event.dist, event.request, seq
+    if event_type is CsvTelemetry:
+        return KIND_CSV, event.state, event.dist, int(event.auto), event.seq
+    if event_type is StateTransition:
+        return KIND_TRANSITION, _STATE_CODES.get(event.state, -1), -1, -1, -1
+    if event_type is DistanceReading:
+        return KIND_DISTANCE, -1, event.dist, -1, -1
+    if event_type is SyncEvent:
+        code = SYNC_CODES.index(event.status) if event.status in SYNC_CODES else -1
+        return KIND_SYNC, code, -1, -1, -1
+    if event_type is TxError:
+        return KIND_TX_ERROR, -1, -1, -1, -1
+    if event_type is PeerMac:
+        return KIND_PEER_MAC, -1, -1, -1, -1
+    return KIND_NONE, -1, -1, -1, -1
+
+
+class SessionRecorder:
+    """Graba líneas y eventos en disco desde un thread de escritura"""
+    def __init__(self, base_path, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, queue_size=DEFAULT_QUEUE_SIZE,
+                 fsync=True, index=None):
+        self.base_path = base_path
+        # Índice que se actualiza con cada bloque escrito (p. ej. monitor_index.IndexWriter):
+        # index.add_chunk(chunk, lines) desde el thread de escritura e index.close() al cerrar
+        self.index = index
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows_written = 0
+        self.chunks_written = 0
+        self.dropped_batches = 0  # Lotes descartados por cola llena
+        self.write_errors = 0     # Bloques perdidos por un error en el thread de escritura
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        # Conversión monotonic_ns -> hora de pared (ns), fijada al iniciar
+        self._wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        self._reset_chunk()
+        self._counters = {}  # node -> [tx_count, rx_count]
+
+    @property
+    def evt_path(self):
+        return self.base_path + EVT_SUFFIX
+
+    @property
+    def raw_path(self):
+        return self.base_path + RAW_SUFFIX
+
+    def start(self):
+        directory = os.path.dirname(self.base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._evt_file = open(self.evt_path, 'ab')
+        if self._evt_file.tell() == 0:
+            self._evt_file.write(FILE_MAGIC)
+        else:
+            # Sesión existente: seguir la numeración de bloques y descartar un
+            # bloque final truncado (los siguientes no serían legibles)
+            self.chunks_written, end = _valid_chunks(self.evt_path)
+            self._evt_file.truncate(end)
+            self._evt_file.seek(end)
+        self._raw_file = open(self.raw_path, 'ab')
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    def record_batch(self, node, items):
+        """Encolar un lote de SerialLine (no bloquea; descarta si la cola está llena)"""
+        try:
+            self._queue.put_nowait((node, items))
+        except queue.Full:
+            self.dropped_batches += 1
+
+    def record(self, node, item):
+        self.record_batch(node, [item])
+
+    def close(self):
+        """Escribir lo pendiente y cerrar los archivos"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put((None, None), timeout=CLOSE_TIMEOUT_S)
+        except queue.Full:
+            pass
+        self._thread.join(CLOSE_TIMEOUT_S)
+        if self._thread.is_alive():
+            print(f"⚠ Grabación {self.base_path}: el thread de escritura no terminó; "
+                  "se pierde lo pendiente", file=sys.stderr)
+        self._thread = None
+        self._evt_file.close()
+        self._raw_file.close()
+        if self.index is not None:
+            self.index.close()
+
+    # ---------- thread de escritura ----------
+
+    def _reset_chunk(self):
+        self._columns = {name: array(code) for name, code in COLUMNS}
+        self._lines = []
+        self._nodes = {}
+        self._chunk_started = time.monotonic()
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, self._chunk_started + self.flush_interval - time.monotonic())
+            try:
+                node, items = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._guarded(self._write_chunk)
+                continue
+            if items is None:
+                self._guarded(self._write_chunk)
+                return
+            self._guarded(self._add_batch, node, items)
+
+    def _guarded(self, function, *args):
+        """Ejecutar en el thread de escritura sin dejarlo morir en silencio (close() lo espera)"""
+        try:
+            function(*args)
+        except Exception:
+            self.write_errors += 1
+            print(f"⚠ Grabación {self.base_path}: error al escribir, se descarta el bloque en curso",
+                  file=sys.stderr)
+            traceback.print_exc()
+            self._reset_chunk()
+
+    def _add_batch(self, node, items):
+        self._add_rows(node, items)
+        if len(self._lines) >= self.chunk_rows:
+            self._write_chunk()
+
+    def _add_rows(self, node, items):
+        columns = self._columns
+        node_index = self._nodes.setdefault(node, len(self._nodes))
+        counters = self._counters.setdefault(node, [0, 0])
+        offset = self._wall_offset_ns
+        t_col = columns['t_ns']
+        for item in items:
+            kind, state, dist, request, seq = _event_columns(item.event)
+            if kind == KIND_TX:
+                counters[0] += 1
+            elif kind == KIND_RX:
+                counters[1] += 1
+            t_col.append(item.t_read_ns + offset if item.t_read_ns else time.time_ns())
+            columns['node'].append(node_index)
+            columns['kind'].append(kind)
+            columns['state'].append(max(-1, min(state, 127)))
+            columns['dist'].append(max(-1, min(dist, INT32_MAX)))
+            columns['request'].append(max(-1, min(request, 127)))
+            columns['seq'].append(max(-1, min(seq, INT32_MAX)))
+            columns['tx_count'].append(counters[0])
+            columns['rx_count'].append(counters[1])
+            self._lines.append(item.text)
+
+    def _write_chunk(self):
+        rows = len(self._lines)
+        if rows == 0:
+            self._chunk_started = time.monotonic()
+            return
+        raw = gzip.compress(("\n".join(self._lines) + "\n").encode('utf-8'), compresslevel=6)
+        raw_offset = self._raw_file.tell()
+        evt_offset = self._evt_file.tell()
+        try:
+            self._write_files(rows, raw, raw_offset, evt_offset)
+        except Exception:
+            # Sin esto los bloques siguientes quedarían detrás de uno a medias
+            # y iter_chunks se detendría ahí
+            self._raw_file = reopen_truncated(self._raw_file, raw_offset)
+            self._evt_file = reopen_truncated(self._evt_file, evt_offset)
+            raise
+        self.rows_written += rows
+        self.chunks_written += 1
+        self._reset_chunk()
+
+    def _write_files(self, rows, raw, raw_offset, evt_offset):
+        # 1) Texto crudo: un miembro gzip por bloque
+        self._raw_file.write(raw)
+        self._raw_file.flush()
+        # 2) Bloque columnar: es el registro que confirma el bloque
+        nodes = sorted(self._nodes, key=self._nodes.get)
+        meta = json.dumps({
+            'nodes': nodes,
+            'raw_offset': raw_offset,
+            'raw_length': len(raw),
+        }).encode('utf-8')
+        parts = [struct.pack('<I', len(meta)), meta]
+        parts.extend(self._columns[name].tobytes() for name, _ in COLUMNS)
+        payload = b''.join(parts)
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, rows, len(payload), zlib.crc32(payload))
+        self._evt_file.write(header + payload)
+        self._evt_file.flush()
+        if self.fsync:
+            os.fsync(self._raw_file.fileno())
+            os.fsync(self._evt_file.fileno())
+        if self.index is not None:
+            self.index.add_chunk(
+                Chunk(self.chunks_written, nodes, self._columns, raw_offset, len(raw), evt_offset),
+                self._lines
+            )
+
+
+def reopen_truncated(f, offset):
+    """Descartar lo que `f` (abierto para anexar) escribió después de `offset`:
+    cierra sin su buffer pendiente, corta el archivo y lo reabre"""
+    try:
+        f.close()
+    except OSError:
+        pass  # El flush del buffer volvió a fallar: esos bytes se descartan
+    f = open(f.name, 'ab')
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+# ==================== LECTURA ====================
+
+class Chunk(NamedTuple):
+    """Bloque leído de un archivo .evt"""
+    index: int
+    nodes: list
+    columns: dict
+    raw_offset: int
+    raw_length: int
+    offset: int  # Posición del bloque en el archivo .evt
+
+
+def _read_chunk(f, index):
+    """Leer el bloque en la posición actual de `f` (None si está truncado o dañado)"""
+    offset = f.tell()
+    header = f.read(CHUNK_HEADER.size)
+    if len(header) < CHUNK_HEADER.size:
+        return None
+    magic, rows, length, crc = CHUNK_HEADER.unpack(header)
+    payload = f.read(length)
+    if magic != CHUNK_MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+        return None  # Bloque truncado por una caída
+    (meta_length,) = struct.unpack_from('<I', payload)
+    meta = json.loads(payload[4:4 + meta_length])
+    pos = 4 + meta_length
+    columns = {}
+    for name, code in COLUMNS:
+        column = array(code)
+        size = rows * column.itemsize
+        column.frombytes(payload[pos:pos + size])
+        columns[name] = column
+        pos += size
+    return Chunk(index, meta['nodes'], columns, meta['raw_offset'], meta['raw_length'], offset)
+
+
+def _valid_chunks(evt_path):
+    """Cantidad de bloques válidos de un .evt y posición donde termina el último"""
+    with open(evt_path, 'rb') as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{evt_path} no es una sesión grabada")
+        count, end = 0, f.tell()
+        while _read_chunk(f, count) is not None:
+            count += 1
+            end = f.tell()
+    return count, end
+
+
+def iter_chunks(base_path):
+    """Recorrer los bloques válidos de <base>.evt (se detiene en el primero dañado)"""
+    with open(base_path + EVT_SUFFIX, 'rb') as f:
+        if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{base_path}{EVT_SUFFIX} no es una sesión grabada")
+        index = 0
+        while True:
+            chunk = _read_chunk(f, index)
+            if chunk is None:
+                return
+            yield chunk
+            index += 1
+
+
+def read_chunk_at(evt_file, offset, index=-1):
+    """Leer un bloque por su posición en un archivo .evt ya abierto"""
+    evt_file.seek(offset)
+    return _read_chunk(evt_file, index)
+
+
+def read_raw_lines(base_path, chunk, raw_file=None):
+    """Líneas de texto del bloque (leídas del miembro gzip correspondiente)"""
+    if raw_file is None:
+        with open(base_path + RAW_SUFFIX, 'rb') as f:
+            return read_raw_lines(base_path, chunk, f)
+    raw_file.seek(chunk.raw_offset)
+    data = gzip.decompress(raw_file.read(chunk.raw_length)).decode('utf-8')
+    return data.split('\n')[:-1]
+
+
+def iter_records(base_path):
+    """Recorrer todas las filas de una sesión como Record"""
+    with open(base_path + RAW_SUFFIX, 'rb') as raw_file:
+        for chunk in iter_chunks(base_path):
+            lines = read_raw_lines(base_path, chunk, raw_file)
+            c = chunk.columns
+            nodes = chunk.nodes
+            for i, text in enumerate(lines):
+                yield Record(
+                    c['t_ns'][i], nodes[c['node'][i]], c['kind'][i], c['state'][i],
+                    c['dist'][i], c['request'][i], c['seq'][i],
+                    c['tx_count'][i], c['rx_count'][i], text
+                )
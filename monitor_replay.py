@@ -0,0 +1,177 @@
+"""
+Reproducción sin interfaz de sesiones del Monitor de Semáforos.
+
+Pasa las líneas de una sesión grabada (monitor_recorder) o de un log de texto
+con el formato de las pestañas del monitor ("[HH:MM:SS.mmm] [A] texto") por el
+mismo EventPipeline que MainWindow y HeadlessMonitor (ClockSync, NodeState,
+LinkAnalyzer, InterlockVerifier), con la hora de cada línea como hora de
+lectura. No abre puertos seriales ni importa Qt.
+
+La velocidad se elige con `speed`: 1.0 = tiempo real, N = N veces más rápido,
+0 = tan rápido como sea posible.
+
+Uso:
+    python monitor_replay.py sesiones/sesion_20250101_120000 --speed 10
+    python monitor_replay.py log_campo.txt --dump
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+from monitor_parser import SerialLine, parse_line
+from monitor_pipeline import EventPipeline
+from monitor_log import LogBuffer, DEFAULT_CAPACITY
+from monitor_recorder import EVT_SUFFIX, iter_records
+
+
+# Línea de log del monitor: "[21:22:10.535] [A] TX: estado=1, ..."
+_LOG_LINE_RE = re.compile(r'\[(\d{2}):(\d{2}):(\d{2})\.(\d{3})\] \[(\w+)\] (.*)$')
+
+_DAY_S = 24 * 3600
+
+
+class ReplayLine(NamedTuple):
+    """Línea a reproducir: segundos (relativos a cualquier origen), nodo y texto"""
+    t: float
+    stamp: str
+    node: str
+    text: str
+
+
+def iter_log_lines(path, encoding='utf-8'):
+    """Líneas de un log de texto del monitor (las que no tienen hora se omiten)"""
+    day_offset = 0.0
+    last = None
+    with open(path, encoding=encoding, errors='replace') as f:
+        for raw in f:
+            m = _LOG_LINE_RE.search(raw.rstrip('\r\n'))
+            if m is None:
+                continue
+            hh, mm, ss, ms, node, text = m.groups()
+            t = int(hh) * 3600 + int(mm) * 60 + int(ss) + int(ms) / 1000
+            # Cruce de medianoche
+            if last is not None and t + day_offset < last - _DAY_S / 2:
+                day_offset += _DAY_S
+            t += day_offset
+            last = t
+            yield ReplayLine(t, f"{hh}:{mm}:{ss}.{ms}", node, text.strip())
+
+
+def iter_session_lines(base_path):
+    """Líneas de una sesión grabada con monitor_recorder"""
+    for record in iter_records(base_path):
+        t = record.t_ns / 1e9
+        stamp = datetime.fromtimestamp(t).strftime("%H:%M:%S.%f")[:-3]
+        yield ReplayLine(t, stamp, record.node, record.text)
+
+
+def open_source(path):
+    """Elegir el lector según la ruta: sesión (.evt / base) o log de texto"""
+    if path.endswith(EVT_SUFFIX):
+        return iter_session_lines(path[:-len(EVT_SUFFIX)])
+    if os.path.exists(path + EVT_SUFFIX):
+        return iter_session_lines(path)
+    return iter_log_lines(path)
+
+
+class ReplayEngine:
+    """Estado de los semáforos, enlace y enclavamiento reconstruidos a partir de líneas reproducidas"""
+    def __init__(self, log_capacity=DEFAULT_CAPACITY, on_violation=None):
+        self.pipeline = EventPipeline(on_violation=on_violation)
+        self.nodes = self.pipeline.states  # node -> NodeState
+        self.log_buffer = LogBuffer(log_capacity)
+        self.event_counts = Counter()
+        self.lines = 0
+        self.events = 0
+
+    def node(self, node_id):
+        state = self.nodes.get(node_id)
+        if state is None:
+            state = self.pipeline.add_node(node_id)
+        return state
+
+    def feed(self, line):
+        """Procesar una línea igual que MainWindow.on_lines_parsed"""
+        self.lines += 1
+        self.node(line.node)
+        self.log_buffer.append(line.node, f"[{line.stamp}] [{line.node}] {line.text}")
+        event = parse_line(line.text)
+        if event is not None:
+            self.events += 1
+            self.event_counts[type(event).__name__] += 1
+        # La hora de la línea hace de hora de lectura (ClockSync la corrige con el millis() del nodo)
+        t_ns = int(line.t * 1e9)
+        self.pipeline.process(line.node, (SerialLine(line.stamp, line.text, event, t_ns),), t_ns)
+        return event
+
+    def run(self, lines, speed=0.0, on_line=None):
+        """Reproducir `lines` respetando su ritmo original dividido por `speed`
+        (0 = sin pausas); devuelve estadísticas de la corrida"""
+        start = time.perf_counter()
+        t0 = None
+        feed = self.feed
+        for line in lines:
+            if speed > 0:
+                if t0 is None:
+                    t0 = line.t
+                delay = (line.t - t0) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            event = feed(line)
+            if on_line is not None:
+                on_line(line, event)
+        # Procesar lo que el verificador retiene por la tolerancia entre puertos
+        self.pipeline.interlock.flush()
+        elapsed = time.perf_counter() - start
+        return {
+            'lines': self.lines,
+            'events': self.events,
+            'violations': sum(self.pipeline.interlock.counts.values()),
+            'elapsed_s': elapsed,
+            'lines_per_s': self.lines / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def snapshot(self):
+        """Campos finales de cada semáforo"""
+        return {node_id: state.snapshot() for node_id, state in sorted(self.nodes.items())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducir una sesión o log del monitor sin interfaz")
+    parser.add_argument("path", help="Sesión grabada (base o .evt) o log de texto")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="1 = tiempo real, N = N veces más rápido, 0 = sin pausas (por defecto)")
+    parser.add_argument("--echo", action="store_true", help="Imprimir cada línea reproducida")
+    parser.add_argument("--dump", action="store_true",
+                        help="Imprimir el estado final de cada semáforo en JSON")
+    args = parser.parse_args(argv)
+
+    def on_violation(violation):
+        print(f"[{violation.node}] [ENCLAVAMIENTO] {violation.kind}: {violation.detail}", file=sys.stderr)
+    engine = ReplayEngine(on_violation=on_violation)
+    def echo(line, event):
+        print(f"[{line.stamp}] [{line.node}] {line.text}")
+    stats = engine.run(open_source(args.path), speed=args.speed,
+                       on_line=echo if args.echo else None)
+
+    if args.dump:
+        print(json.dumps(engine.snapshot(), ensure_ascii=False, indent=2, default=list))
+    print(f"{stats['lines']} líneas, {stats['events']} eventos en {stats['elapsed_s']:.2f} s "
+          f"({stats['lines_per_s']:,.0f} líneas/s)", file=sys.stderr)
+    for name, count in engine.event_counts.most_common():
+        print(f"  {name}: {count}", file=sys.stderr)
+    if engine.pipeline.interlock.intersections:
+        summary = ", ".join(f"{kind}: {count}" for kind, count in engine.pipeline.interlock.counts.items())
+        print(f"Enclavamiento: {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Series de tiempo por nodo para las gráficas del Monitor de Semáforos.
+
+SeriesBuffer guarda muestras (tiempo, distancia, estado, request) en arreglos
+NumPy preasignados que funcionan como anillo: la memoria es fija (8 bytes por
+muestra) y la capacidad por defecto cubre 24 h de mensajes TX a 5 Hz.
+
+decimate() reduce una ventana de tiempo a una columna por píxel con mínimo y
+máximo de distancia, último estado y máximo request de cada columna, de modo
+que el costo de dibujar depende del ancho del widget y no del historial.
+
+No depende de Qt: la gráfica (SeriesChart en monitor_gui.py) solo pinta
+lo que devuelve decimate().
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from monitor_parser import CsvTelemetry, TxFrame
+
+
+SAMPLE_HZ = 5                                   # BROADCAST_INTERVAL = 200 ms
+DEFAULT_SERIES_CAPACITY = 24 * 3600 * SAMPLE_HZ  # 24 h por nodo (~3.5 MB)
+NO_SAMPLE = -1  # Estado/request de una columna sin muestras
+
+
+class Decimated(NamedTuple):
+    """Una ventana reducida a `columns` columnas (NaN / -1 = sin muestras)"""
+    dist_min: np.ndarray
+    dist_max: np.ndarray
+    state: np.ndarray
+    request: np.ndarray
+
+
+class SeriesBuffer:
+    """Anillo de muestras de un nodo en arreglos NumPy de tamaño fijo"""
+    def __init__(self, capacity=DEFAULT_SERIES_CAPACITY):
+        self.capacity = capacity
+        # Tiempo en ms desde origin_ns (int32: hasta ~24 días de sesión)
+        self.t_ms = np.zeros(capacity, dtype=np.int32)
+        self.dist = np.zeros(capacity, dtype=np.uint16)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.request = np.zeros(capacity, dtype=np.int8)
+        self.origin_ns = None
+        self.count = 0     # Muestras agregadas en total
+        self.version = 0   # Cambia con cada muestra nueva
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self.t_ms.nbytes + self.dist.nbytes + self.state.nbytes + self.request.nbytes
+
+    def to_ms(self, t_ns):
+        """Convertir time.monotonic_ns al eje de tiempo del buffer"""
+        if self.origin_ns is None:
+            self.origin_ns = t_ns
+        return (t_ns - self.origin_ns) // 1_000_000
+
+    def append(self, t_ns, dist, state, request):
+        i = self.count % self.capacity
+        self.t_ms[i] = self.to_ms(t_ns)
+        self.dist[i] = min(max(dist, 0), 0xFFFF)
+        self.state[i] = state
+        self.request[i] = request
+        self.count += 1
+        self.version += 1
+
+    def append_event(self, t_ns, event):
+        """Agregar una muestra si el evento trae distancia/estado local (TX o CSV)"""
+        event_type = type(event)
+        if event_type is TxFrame:
+            self.append(t_ns, event.dist, event.state, event.request)
+        elif event_type is CsvTelemetry:
+            self.append(t_ns, event.dist, event.state, int(event.auto))
+        else:
+            return False
+        return True
+
+    def _segments(self):
+        """Tramos del anillo en orden cronológico (vistas, sin copiar)"""
+        n = len(self)
+        if self.count <= self.capacity:
+            yield slice(0, n)
+            return
+        start = self.count % self.capacity
+        yield slice(start, self.capacity)
+        if start:
+            yield slice(0, start)
+
+    def decimate(self, t_start_ms, t_end_ms, columns):
+        """Reducir [t_start_ms, t_end_ms) a `columns` columnas"""
+        dist_min = np.full(columns, np.nan)
+        dist_max = np.full(columns, np.nan)
+        state = np.full(columns, NO_SAMPLE, dtype=np.int8)
+        request = np.full(columns, NO_SAMPLE, dtype=np.int8)
+        if columns <= 0 or t_end_ms <= t_start_ms:
+            return Decimated(dist_min, dist_max, state, request)
+        edges = np.linspace(t_start_ms, t_end_ms, columns + 1)
+        for segment in self._segments():
+            t = self.t_ms[segment]
+            bounds = np.searchsorted(t, edges, side='left')
+            lo, hi = bounds[0], bounds[-1]
+            if lo == hi:
+                continue
+            counts = np.diff(bounds)
+            filled = counts > 0
+            starts = bounds[:-1][filled] - lo
+            ends = bounds[1:][filled] - lo
+            dist = self.dist[segment][lo:hi]
+            seg_min = np.minimum.reduceat(dist, starts).astype(np.float64)
+            seg_max = np.maximum.reduceat(dist, starts).astype(np.float64)
+            dist_min[filled] = np.fmin(dist_min[filled], seg_min)
+            dist_max[filled] = np.fmax(dist_max[filled], seg_max)
+            # Estado: el último de la columna (los tramos van en orden)
+            state[filled] = self.state[segment][lo:hi][ends - 1]
+            seg_request = np.maximum.reduceat(self.request[segment][lo:hi], starts)
+            request[filled] = np.maximum(request[filled], seg_request)
+        return Decimated(dist_min, dist_max, state, request)
+
+    def clear(self):
+        self.count = 0
+        self.origin_ns = None
+        self.version += 1
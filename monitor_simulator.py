@@ -0,0 +1,442 @@
+"""
+Simulador de semáforos para pruebas de carga del Monitor de Semáforos.
+
+Reimplementa en Python la máquina de estados de traffic_A.ino/traffic_B.ino
+(ALL_RED/VERDE/AMARILLO/ROJO, BROADCAST_INTERVAL, DETECTION_PERSIST_MS,
+intercambio de TrafficMsg por ESP-NOW) y expone cada nodo simulado en una
+pseudo-terminal de Linux, de modo que SerialReader se conecta sin cambios.
+
+Cada intersección son dos nodos (DEVICE_ID 1 y 2) unidos por un enlace
+ESP-NOW simulado con pérdida configurable. También se pueden inyectar
+tormentas de errores I2C NACK como las de ANALISIS_LOGS.md. El reloj es
+virtual: `speed` = 1 es tiempo real, N es N veces más rápido y 0 avanza sin
+pausas.
+
+Uso:
+    python monitor_simulator.py --intersections 1              # nodos A y B
+    python monitor_simulator.py --intersections 16 --speed 20 --loss 0.05 --i2c-rate 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tty
+import zlib
+
+from monitor_framing import encode_frame, FRAME_TX, FRAME_RX
+
+
+# ==================== CONSTANTES DEL FIRMWARE ====================
+
+STATE_ALL_RED = 0
+STATE_GREEN = 1
+STATE_YELLOW = 2
+STATE_RED = 3
+STATE_WAIT = 4
+
+GREEN_NORMAL = 10000
+GREEN_NO_CAR = 30000
+YELLOW_DURATION = 3000
+ALL_RED_DURATION = 1000
+
+DETECTION_THRESHOLD_CM = 5
+DETECTION_PERSIST_MS = 500
+BROADCAST_INTERVAL = 200
+PEER_TIMEOUT = 2000
+
+NO_ECHO_CM = 9999   # measureDistance() sin eco
+LOOP_DELAY_MS = 50  # delay(50) al final de loop()
+
+# Ráfaga de errores I2C tal como aparece en ANALISIS_LOGS.md
+I2C_NACK_BURST = (
+    "E ({t}) i2c.master: I2C hardware NACK detected",
+    "E ({t}) i2c.master: I2C transaction unexpected nack detected",
+    "E ({t}) i2c.master: s_i2c_synchronous_transaction(945): I2C transaction failed",
+    "E ({t}) i2c.master: i2c_master_multi_buffer_transmit(1214): I2C transaction failed",
+)
+
+MAX_PENDING_BYTES = 64 * 1024  # Salida sin lector: como una UART, se pierde lo que no cabe
+
+
+class VehicleModel:
+    """Lecturas del HC-SR04: llegadas de vehículos tipo Poisson y ruido de fondo"""
+    def __init__(self, rng, cars_per_min=4.0):
+        self.rng = rng
+        self.rate_per_ms = cars_per_min / 60000.0
+        self.car_until = -1
+
+    def measure(self, now):
+        rng = self.rng
+        if now < self.car_until:
+            return rng.randint(2, DETECTION_THRESHOLD_CM)
+        if self.rate_per_ms and rng.random() < self.rate_per_ms * LOOP_DELAY_MS:
+            self.car_until = now + rng.randint(3000, 10000)
+            return rng.randint(2, DETECTION_THRESHOLD_CM)
+        return NO_ECHO_CM if rng.random() < 0.5 else rng.randint(20, 400)
+
+
+class SimNode:
+    """Un ESP32 con traffic_A.ino (device_id=1) o traffic_B.ino (device_id=2)"""
+    def __init__(self, name, device_id, rng, binary=False, cars_per_min=4.0,
+                 boot_ms=0, drift_ppm=0.0, i2c_rate=0.0):
+        self.name = name
+        self.device_id = device_id
+        self.letter = 'A' if device_id == 1 else 'B'
+        self.other = 'B' if device_id == 1 else 'A'
+        self.rng = rng
+        self.binary = binary  # BINARY_TELEMETRY
+        self.vehicles = VehicleModel(rng, cars_per_min)
+        self.boot_ms = boot_ms          # Momento (reloj de la simulación) del arranque
+        self.drift = drift_ppm * 1e-6   # Deriva del cristal del ESP32
+        self.i2c_rate = i2c_rate        # Ráfagas de NACK por segundo (0 = sin tormenta)
+        crc = zlib.crc32(name.encode())
+        self.mac = f"10:51:DB:{crc & 0xFF:02X}:{device_id:02X}:{(crc >> 8) & 0xFF:02X}"
+        self.peer = None
+        self.output = bytearray()
+        self.lines_out = 0
+        # Variables globales del firmware
+        self.current_state = STATE_ALL_RED
+        self.remote_state = STATE_ALL_RED
+        self.state_start = 0
+        self.last_broadcast = 0
+        self.last_remote_msg = 0
+        self.last_detection = 0
+        self.current_distance = NO_ECHO_CM
+        self.vehicle_detected = False
+        self.request_priority = False
+        self.remote_request_priority = False
+        self.remote_distance = NO_ECHO_CM
+        self.message_seq = 0
+        self.remote_seq = 0
+        self.green_duration = GREEN_NORMAL
+        self.cycle_count = 0
+        self.green_was_no_car = False
+
+    def millis(self, now):
+        return int((now - self.boot_ms) * (1.0 + self.drift)) & 0xFFFFFFFF
+
+    def println(self, text=""):
+        self.output += text.encode('utf-8') + b'\n'
+        self.lines_out += 1
+
+    # ---------- setup() ----------
+
+    def setup(self, now, peer_mac):
+        self.println()
+        self.println()
+        self.println("====================================")
+        self.println(f"    SEMAFORO {self.letter} - MAC MANUAL")
+        self.println("====================================")
+        self.println(f"MAC propia: {self.mac}")
+        self.println(f"MAC del peer ({self.other}): {peer_mac}")
+        self.println("OLED OK")
+        self.println(f"MAC Address: {self.mac}")
+        self.println("ESP-NOW inicializado OK")
+        self.println("Peer añadido correctamente")
+        self.println(f"Peer MAC: {peer_mac}")
+        self.current_state = STATE_ALL_RED
+        self.state_start = self.millis(now)
+        self.println("=== Sistema listo ===")
+
+    # ---------- loop() ----------
+
+    def loop(self, now, link):
+        ms = self.millis(now)
+        self.update_vehicle_detection(now, ms)
+        self.update_state_machine(ms)
+        self.broadcast_state(ms, link)
+        if self.i2c_rate and self.rng.random() < self.i2c_rate * LOOP_DELAY_MS / 1000:
+            for template in I2C_NACK_BURST:
+                self.println(template.format(t=ms))
+
+    def update_vehicle_detection(self, now, ms):
+        self.current_distance = self.vehicles.measure(now)
+        if self.current_distance <= DETECTION_THRESHOLD_CM:
+            self.last_detection = ms
+        if ms - self.last_detection <= DETECTION_PERSIST_MS:
+            if not self.vehicle_detected:
+                self.vehicle_detected = True
+                self.request_priority = True
+        else:
+            self.vehicle_detected = False
+            if self.current_state != STATE_GREEN:
+                self.request_priority = False
+
+    def broadcast_state(self, ms, link):
+        if ms - self.last_broadcast < BROADCAST_INTERVAL:
+            return
+        msg = (self.device_id, self.message_seq, self.current_state,
+               1 if self.request_priority else 0, self.current_distance, ms)
+        self.message_seq = (self.message_seq + 1) & 0xFF
+        self.last_broadcast = ms
+        # esp_now_send() encola el envío: la pérdida se informa en onDataSent
+        if self.binary:
+            self.output += encode_frame(FRAME_TX, *msg)
+            self.lines_out += 1
+        else:
+            self.println(f"TX: estado={msg[2]}, request={msg[3]}, dist={msg[4]}, "
+                         f"seq={msg[1]}, ts={msg[5]}")
+        if not link.deliver(self, msg):
+            self.println("Callback: Error en envío, status=1")
+
+    def on_data_recv(self, now, msg):
+        sender, seq, state, request, dist, timestamp_ms = msg
+        self.remote_state = state
+        self.remote_request_priority = request == 1
+        self.remote_distance = dist
+        self.remote_seq = seq
+        self.last_remote_msg = self.millis(now)
+        if self.binary:
+            self.output += encode_frame(FRAME_RX, *msg)
+            self.lines_out += 1
+        else:
+            self.println(f"RX de ESP {sender}: estado={state}, request={request}, dist={dist}, "
+                         f"seq={seq}, ts={timestamp_ms}")
+
+    def update_state_machine(self, ms):
+        elapsed = ms - self.state_start
+        state = self.current_state
+        a, b = self.letter, self.other
+
+        if state == STATE_ALL_RED:
+            if elapsed < ALL_RED_DURATION:
+                return
+            if self.remote_state in (STATE_GREEN, STATE_YELLOW):
+                self.println("[SEGURIDAD] Otro semáforo en verde/amarillo - manteniendo ALL_RED")
+                return
+            take_green = cede = False
+            if self.request_priority and not self.remote_request_priority:
+                self.green_duration = GREEN_NORMAL
+                self.green_was_no_car = False
+                take_green = True
+                self.println(f"[DECISION] {a} detecta carro, {b} no -> {a} pasa a verde")
+            elif not self.request_priority and self.remote_request_priority:
+                cede = True
+                self.println(f"[DECISION] {b} detecta carro, {a} no -> {a} cede")
+            elif self.request_priority and self.remote_request_priority:
+                self.green_duration = GREEN_NORMAL
+                self.green_was_no_car = False
+                if self.current_distance < self.remote_distance - 10:
+                    take_green = True
+                    self.println(f"[DECISION] Ambos detectan, {a} más cerca -> {a} pasa a verde")
+                elif abs(self.current_distance - self.remote_distance) < 10:
+                    # A gana con DEVICE_ID < 2 y B con DEVICE_ID > 1: ambos
+                    # firmwares se dan el empate, se reproduce tal cual.
+                    take_green = True
+                    self.println(f"[DECISION] Ambos detectan, distancia similar -> {a} pasa a verde")
+                else:
+                    cede = True
+                    self.println(f"[DECISION] Ambos detectan, {b} gana desempate -> {a} cede")
+            else:
+                self.green_duration = GREEN_NO_CAR
+                self.green_was_no_car = True
+                # A toma los ciclos pares y B los impares
+                if self.cycle_count % 2 == self.device_id - 1:
+                    take_green = True
+                    self.println(f"[DECISION] Ninguno detecta, ciclo {self.cycle_count} -> {a} pasa a verde")
+                else:
+                    cede = True
+                    self.println(f"[DECISION] Ninguno detecta, ciclo {self.cycle_count} -> {a} cede")
+            if take_green:
+                if self.remote_state in (STATE_RED, STATE_ALL_RED):
+                    self.current_state = STATE_GREEN
+                    self.state_start = ms
+                    self.println("-> VERDE [CONFIRMADO SEGURO]")
+                else:
+                    self.println("[BLOQUEO SEGURIDAD] Otro NO está en rojo - NO pasar a verde")
+                    self.state_start = ms
+            elif cede:
+                self.current_state = STATE_RED
+                self.state_start = ms
+                self.println(f"-> ROJO (turno de {b})")
+
+        elif state == STATE_GREEN:
+            if self.green_was_no_car and (self.remote_request_priority or self.vehicle_detected):
+                if elapsed < GREEN_NORMAL:
+                    self.green_duration = GREEN_NORMAL
+                    self.println("[PRIORIDAD] Apareció carro, acortando verde a 10s desde aparición")
+                self.green_was_no_car = False
+            if elapsed >= self.green_duration:
+                self.current_state = STATE_YELLOW
+                self.state_start = ms
+                self.println("-> AMARILLO")
+
+        elif state == STATE_YELLOW:
+            if elapsed >= YELLOW_DURATION:
+                self.current_state = STATE_RED
+                self.state_start = ms
+                self.request_priority = False
+                self.cycle_count += 1
+                self.println("-> ROJO")
+
+        elif state == STATE_RED:
+            if self.remote_state in (STATE_RED, STATE_ALL_RED):
+                self.current_state = STATE_ALL_RED
+                self.state_start = ms
+                self.println("-> ALL_RED (preparar cambio)")
+
+
+class EspNowLink:
+    """Enlace ESP-NOW simulado entre los nodos de una intersección"""
+    def __init__(self, rng, loss=0.0):
+        self.rng = rng
+        self.loss = loss
+        self.now = 0
+        self.sent = 0
+        self.lost = 0
+
+    def deliver(self, sender, msg):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.lost += 1
+            return False
+        sender.peer.on_data_recv(self.now, msg)
+        return True
+
+
+class PtyPort:
+    """Pseudo-terminal por nodo: el simulador escribe en el maestro y el
+    monitor abre el esclavo (`path`) como un puerto serial normal"""
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)  # Sin eco ni conversión de saltos de línea
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        self.pending = bytearray()
+        self.dropped_bytes = 0
+
+    def write(self, data):
+        pending = self.pending
+        pending += data
+        if pending:
+            try:
+                written = os.write(self.master, pending)
+                del pending[:written]
+            except BlockingIOError:
+                pass
+        if len(pending) > MAX_PENDING_BYTES:
+            excess = len(pending) - MAX_PENDING_BYTES
+            del pending[:excess]
+            self.dropped_bytes += excess
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class Simulation:
+    """Conjunto de intersecciones simuladas con reloj virtual"""
+    def __init__(self, intersections=1, loss=0.0, i2c_rate=0.0, binary=False,
+                 cars_per_min=4.0, drift_ppm=50.0, seed=None, use_pty=True, sink=None):
+        self.rng = random.Random(seed)
+        self.now = 0  # ms de la simulación
+        self.nodes = []
+        self.links = []
+        self.ports = {}
+        self.sink = sink  # sink(node, bytes) cuando no se usan pty
+        for i in range(intersections):
+            suffix = "" if intersections == 1 else str(i + 1)
+            link = EspNowLink(self.rng, loss)
+            pair = []
+            for device_id in (1, 2):
+                node = SimNode(
+                    ('A' if device_id == 1 else 'B') + suffix, device_id, self.rng,
+                    binary=binary, cars_per_min=cars_per_min,
+                    boot_ms=-self.rng.randint(0, 5000),
+                    drift_ppm=self.rng.uniform(-drift_ppm, drift_ppm),
+                    i2c_rate=i2c_rate,
+                )
+                pair.append(node)
+            pair[0].peer, pair[1].peer = pair[1], pair[0]
+            for node in pair:
+                node.setup(self.now, node.peer.mac)
+                if use_pty:
+                    self.ports[node.name] = PtyPort()
+            self.nodes.extend(pair)
+            self.links.append((link, pair))
+
+    def step(self):
+        """Avanzar una iteración de loop() (LOOP_DELAY_MS) en todos los nodos"""
+        self.now += LOOP_DELAY_MS
+        for link, pair in self.links:
+            link.now = self.now
+            for node in pair:
+                node.loop(self.now, link)
+        self.flush()
+
+    def flush(self):
+        ports = self.ports
+        for node in self.nodes:
+            if node.output:
+                if ports:
+                    ports[node.name].write(node.output)
+                elif self.sink is not None:
+                    self.sink(node.name, bytes(node.output))
+                node.output.clear()
+
+    def run(self, duration_s=None, speed=1.0):
+        """Simular `duration_s` segundos (None = indefinidamente) a `speed`×"""
+        start = time.perf_counter()
+        t0 = self.now
+        end = None if duration_s is None else self.now + duration_s * 1000
+        while end is None or self.now < end:
+            self.step()
+            if speed > 0:
+                delay = (self.now - t0) / 1000 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        return time.perf_counter() - start
+
+    def stats(self):
+        return {
+            'sim_s': self.now / 1000,
+            'lines': sum(node.lines_out for node in self.nodes),
+            'sent': sum(link.sent for link, _ in self.links),
+            'lost': sum(link.lost for link, _ in self.links),
+            'dropped_bytes': sum(port.dropped_bytes for port in self.ports.values()),
+        }
+
+    def close(self):
+        for port in self.ports.values():
+            port.close()
+        self.ports.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simular semáforos ESP32 en pseudo-terminales")
+    parser.add_argument("--intersections", type=int, default=1, help="Pares de nodos A/B")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = tiempo real, N = N veces más rápido, 0 = sin pausas")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="Tiempo simulado (por defecto hasta Ctrl+C)")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probabilidad de pérdida ESP-NOW")
+    parser.add_argument("--i2c-rate", type=float, default=0.0,
+                        help="Ráfagas de errores I2C NACK por segundo y nodo")
+    parser.add_argument("--cars", type=float, default=4.0, help="Vehículos por minuto y nodo")
+    parser.add_argument("--binary", action="store_true", help="Telemetría binaria (BINARY_TELEMETRY 1)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    sim = Simulation(args.intersections, loss=args.loss, i2c_rate=args.i2c_rate,
+                     binary=args.binary, cars_per_min=args.cars, seed=args.seed)
+    for name, port in sim.ports.items():
+        print(f"{name}: {port.path}")
+    sys.stdout.flush()
+    try:
+        elapsed = sim.run(args.seconds, speed=args.speed)
+    except KeyboardInterrupt:
+        elapsed = None
+    stats = sim.stats()
+    if elapsed:
+        print(f"{stats['sim_s']:.0f} s simulados en {elapsed:.2f} s "
+              f"({stats['sim_s'] / elapsed:.0f}x), {stats['lines']} líneas, "
+              f"{stats['lost']}/{stats['sent']} mensajes perdidos, "
+              f"{stats['dropped_bytes']} bytes sin lector", file=sys.stderr)
+    sim.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
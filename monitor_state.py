@@ -0,0 +1,150 @@
+"""
+Modelo de estado por semáforo para el Monitor de Semáforos.
+
+NodeState acumula el último valor de cada campo mostrado en SemaforoPanel a
+partir de los eventos de monitor_parser. No depende de Qt: la UI lo dibuja a
+ritmo fijo (ver SemaforoPanel.render) y las herramientas sin interfaz pueden
+usarlo directamente.
+"""
+
+from monitor_parser import (
+    STATE_NAMES, SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK,
+    CsvTelemetry, TxFrame, RxFrame, StateTransition, SyncEvent, TxError,
+    PeerMac, DistanceReading
+)
+
+
+# Valores de prioridad
+PRIORITY_NONE = 'ninguna'
+PRIORITY_LOCAL = 'local'
+PRIORITY_REMOTE = 'remota'
+PRIORITY_BOTH = 'conflicto'
+
+# Estados de sincronización adicionales a los de SyncEvent
+SYNC_UNKNOWN = '---'
+SYNC_OK = 'OK'
+SYNC_TX_ERROR = 'TX_ERROR'
+SYNC_MAC = 'MAC'
+
+# Campos que dibuja SemaforoPanel
+FIELDS = (
+    'estado', 'distancia', 'vehiculo', 'prioridad', 'remoto',
+    'sync', 'tx_count', 'rx_count', 'last_tx',
+)
+
+
+class NodeState:
+    """Último valor conocido de cada campo de un semáforo"""
+    def __init__(self, node_id="A", tx_error_threshold=3):
+        self.node_id = node_id
+        self.tx_error_threshold = tx_error_threshold  # Errores consecutivos antes de mostrar alerta
+        self.tx_error_count = 0
+        self.tx_errors = 0  # Total de errores TX (tx_error_count son los consecutivos)
+        self.estado = '---'
+        self.distancia = None
+        self.vehiculo = False
+        self.prioridad = PRIORITY_NONE
+        self.remoto = '---'
+        self.sync = (SYNC_UNKNOWN, '')
+        self.tx_count = 0
+        self.rx_count = 0
+        self.last_tx = '---'
+        # Versión: cambia cada vez que algún campo cambia de valor
+        self.version = 0
+        # Escrituras de campos solicitadas por los eventos (cambien o no el valor)
+        self.writes = 0
+        self._handlers = {
+            CsvTelemetry: self._apply_csv,
+            StateTransition: self._apply_transition,
+            TxFrame: self._apply_tx,
+            RxFrame: self._apply_rx,
+            DistanceReading: self._apply_distance,
+            SyncEvent: self._apply_sync,
+            TxError: self._apply_tx_error,
+            PeerMac: self._apply_peer_mac,
+        }
+
+    def apply(self, event):
+        """Aplicar un evento de monitor_parser; devuelve False si se ignora"""
+        handler = self._handlers.get(type(event))
+        if handler is None:
+            return False
+        handler(event)
+        return True
+
+    def snapshot(self):
+        """Copia de los campos como diccionario"""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def _set(self, name, value):
+        self.writes += 1
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self.version += 1
+
+    def _set_prioridad(self, local_request, remote_request):
+        if local_request and remote_request:
+            self._set('prioridad', PRIORITY_BOTH)
+        elif local_request:
+            self._set('prioridad', PRIORITY_LOCAL)
+        elif remote_request:
+            self._set('prioridad', PRIORITY_REMOTE)
+        else:
+            self._set('prioridad', PRIORITY_NONE)
+
+    def reset_tx_error(self):
+        self.tx_error_count = 0
+        # Solo limpiar si actualmente se muestra el error
+        if self.sync[0] == SYNC_TX_ERROR:
+            self._set('sync', (SYNC_OK, ''))
+
+    def register_tx_error(self):
+        self.tx_errors += 1
+        self.tx_error_count += 1
+        if self.tx_error_count >= self.tx_error_threshold:
+            self._set('sync', (SYNC_TX_ERROR, ''))
+
+    def _apply_csv(self, event):
+        # Formato CSV: seq,ts,state,dist,veh,auto
+        if event.state in STATE_NAMES:
+            self._set('estado', STATE_NAMES[event.state])
+        self._set('distancia', event.dist)
+        self._set('vehiculo', event.vehicle)
+        self._set_prioridad(event.auto, False)
+        self._set('remoto', '---')
+        self.reset_tx_error()
+
+    def _apply_transition(self, event):
+        self._set('estado', event.state)
+        self.reset_tx_error()
+
+    def _apply_tx(self, event):
+        # TX siempre es del propio ESP: actualiza distancia local
+        self._set('tx_count', self.tx_count + 1)
+        self._set('last_tx', f"estado={event.state}, req={event.request}")
+        self._set('distancia', event.dist)
+        self._set_prioridad(event.request == 1, False)
+        self._set('estado', STATE_NAMES.get(event.state, '---'))
+        self.reset_tx_error()
+
+    def _apply_rx(self, event):
+        # RX trae la distancia remota: no se toca la distancia local
+        self._set('rx_count', self.rx_count + 1)
+        self._set_prioridad(False, event.request == 1)
+        self._set('remoto', STATE_NAMES.get(event.state, '---'))
+        self.reset_tx_error()
+
+    def _apply_distance(self, event):
+        # Inferir vehículo de la distancia si no vino en CSV ni TX ni RX
+        self._set('distancia', event.dist)
+        self._set('vehiculo', event.dist < 100)
+
+    def _apply_sync(self, event):
+        if event.status in (SYNC_LOST, SYNC_PEER_OK, SYNC_INIT_OK):
+            self._set('sync', (event.status, ''))
+
+    def _apply_tx_error(self, event):
+        self.register_tx_error()
+
+    def _apply_peer_mac(self, event):
+        self._set('sync', (SYNC_MAC, event.mac))
@@ -0,0 +1,55 @@
+"""
+Estadísticas ligeras para medir el pipeline del Monitor de Semáforos.
+
+Sin dependencias de Qt; las usan tanto la ventana principal como los
+benchmarks.
+"""
+
+
+class LatencyStats:
+    """Latencias en ns: último valor, promedio móvil exponencial y máximo"""
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.count = 0
+        self.last_ns = 0
+        self.mean_ns = 0.0
+        self.max_ns = 0
+
+    def add(self, latency_ns):
+        self.count += 1
+        self.last_ns = latency_ns
+        if self.count == 1:
+            self.mean_ns = float(latency_ns)
+        else:
+            self.mean_ns += self.alpha * (latency_ns - self.mean_ns)
+        if latency_ns > self.max_ns:
+            self.max_ns = latency_ns
+
+    def reset_max(self):
+        """Reiniciar el máximo (p. ej. al inicio de cada ventana de reporte)"""
+        self.max_ns = 0
+
+    def summary_ms(self):
+        return {
+            'count': self.count,
+            'last_ms': self.last_ns / 1e6,
+            'mean_ms': self.mean_ns / 1e6,
+            'max_ms': self.max_ns / 1e6,
+        }
+
+
+class ParseStats:
+    """Líneas y tiempo (ns) de framing y parseo acumulados en un thread lector.
+
+    Solo lo escribe ese thread; los demás leen los totales sin bloquearlo."""
+    def __init__(self):
+        self.lines = 0
+        self.ns = 0
+
+    def add(self, lines, ns):
+        self.lines += lines
+        self.ns += ns
+
+    def merge(self, other):
+        """Sumar los totales de otro ParseStats (p. ej. de un lector ya detenido)"""
+        self.add(other.lines, other.ns)
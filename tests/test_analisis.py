@@ -0,0 +1,86 @@
+"""
+Pruebas del parser de líneas, del análisis del enlace (LinkAnalyzer) y del
+ajuste de reloj de los nodos (ClockEstimator).
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_clock import ClockEstimator, WRAP_MS  # noqa: E402
+from monitor_link import LinkAnalyzer, peer_of  # noqa: E402
+from monitor_parser import (  # noqa: E402
+    CsvTelemetry, RxFrame, StateTransition, TxFrame, parse_line
+)
+
+MS = 1_000_000
+
+
+# ==================== PARSER ====================
+
+def test_parse_line_tx_rx_con_y_sin_seq():
+    assert parse_line("TX: estado=1, request=0, dist=120, seq=7, ts=5000") == TxFrame(1, 0, 120, 7, 5000)
+    assert parse_line("TX: estado=1, request=0, dist=120") == TxFrame(1, 0, 120, None, None)
+    assert parse_line("RX de ESP 2: estado=3, request=1, dist=80, seq=9, ts=5100") == \
+        RxFrame(2, 3, 1, 80, 9, 5100)
+
+
+def test_parse_line_transicion_csv_y_desconocidas():
+    assert parse_line("-> VERDE") == StateTransition("VERDE")
+    assert type(parse_line("12,34567,1,150,1,0")) is CsvTelemetry
+    assert parse_line("") is None
+    assert parse_line("texto cualquiera del firmware") is None
+
+
+# ==================== ENLACE ====================
+
+def test_enlace_cuenta_perdidas_por_direccion():
+    """A envía seq 0..9 cada 200 ms y B no recibe el 3: 1 perdido en A -> B"""
+    link = LinkAnalyzer()
+    link.pair("A", "B")
+    for seq in range(10):
+        t_ns = seq * 200 * MS
+        link.feed("A", TxFrame(1, 0, 100, seq, seq * 200), t_ns)
+        if seq != 3:
+            link.feed("B", RxFrame(1, 1, 0, 100, seq, seq * 200), t_ns + 5 * MS)
+    stats = link.stats(5000 * MS)
+    assert stats[("A", "B")]['sent'] == 10
+    assert stats[("A", "B")]['received'] == 9
+    assert stats[("A", "B")]['lost'] == 1
+    assert stats[("B", "A")]['sent'] == 0
+    assert link.incoming("B", 5000 * MS)['lost'] == 1
+
+
+def test_peer_of():
+    assert peer_of("A") == "B" and peer_of("B2") == "A2"
+    assert peer_of("X") is None
+
+
+# ==================== RELOJ ====================
+
+def test_reloj_estima_deriva_y_hora_de_generacion():
+    """Nodo 50 ppm adelantado con retardos USB de 1 a 20 ms durante 5 minutos"""
+    rng = random.Random(1)
+    estimator = ClockEstimator()
+    errores = []
+    for i in range(3000):
+        host_ms = 1_000_000 + i * 100           # Hora real de generación
+        device_ms = int(host_ms * (1 + 50e-6)) - 900_000
+        read_ns = int((host_ms + rng.uniform(1, 20)) * MS)
+        estimator.observe(device_ms, read_ns)
+        if i > 1500:
+            errores.append(abs(estimator.to_host_ns(device_ms) / MS - host_ms))
+    assert abs(estimator.drift_ppm - 50) < 5
+    assert max(errores) < 3
+
+
+def test_reloj_vuelta_de_millis_no_reinicia():
+    """millis() da la vuelta (uint32): se desenrolla en lugar de reiniciar el ajuste"""
+    estimator = ClockEstimator()
+    for i in range(100):
+        device_ms = (WRAP_MS - 5000 + i * 100) % WRAP_MS
+        estimator.observe(device_ms, (1000 + i * 100) * MS)
+    assert estimator.resets == 0
+    assert estimator.to_host_ns(4900) == 10900 * MS
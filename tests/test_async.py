@@ -0,0 +1,78 @@
+"""
+Pruebas de la reconexión de AsyncSerialLoop con un puerto falso sobre un pipe.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_async import AsyncSerialLoop  # noqa: E402
+from monitor_metrics import reader_samples  # noqa: E402
+
+
+class PuertoPipe:
+    """Puerto falso: lee de un pipe; cerrar el extremo de escritura simula el corte"""
+    abiertos = []
+    fallas = 0  # Aperturas que fallan antes de la próxima que funciona
+
+    def __init__(self, port=None, **kwargs):
+        if PuertoPipe.fallas:
+            PuertoPipe.fallas -= 1
+            raise serial.SerialException(f"could not open port {port}")
+        self.lectura, self.escritura = os.pipe()
+        PuertoPipe.abiertos.append(self)
+
+    def fileno(self):
+        return self.lectura
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        os.close(self.lectura)
+
+
+def esperar(condicion, timeout_s=3.0):
+    limite = time.monotonic() + timeout_s
+    while not condicion():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reconecta_tras_perder_el_puerto():
+    """Tras un corte el canal se reabre solo y sigue entregando líneas"""
+    lineas = []
+    hub = AsyncSerialLoop(lambda port_id, items: lineas.extend(item.text for item in items),
+                          batch_interval_ms=0, serial_factory=PuertoPipe)
+    thread = threading.Thread(target=hub.run)
+    thread.start()
+    try:
+        hub.add_port("A", "falso")
+        assert esperar(lambda: len(PuertoPipe.abiertos) == 1)
+        os.write(PuertoPipe.abiertos[0].escritura, b"antes\n")
+        assert esperar(lambda: "antes" in lineas)
+        PuertoPipe.fallas = 2
+        os.close(PuertoPipe.abiertos[0].escritura)  # Corte: lectura vacía
+        assert esperar(lambda: len(PuertoPipe.abiertos) == 2)
+        os.write(PuertoPipe.abiertos[1].escritura, b"despues\n")
+        assert esperar(lambda: "despues" in lineas)
+        canal = hub.channels["A"]
+        assert canal.connected and canal.reconnects == 1
+        assert any(texto.startswith("=== RECONECTADO") for texto in lineas)
+        assert [valor for _, _, valor in reader_samples("A", canal)] == [True, 1]
+        assert [valor for _, _, valor in reader_samples("B", hub.channels.get("B"))] == [False, 0]
+    finally:
+        hub.stop()
+        thread.join(2.0)
+        for puerto in PuertoPipe.abiertos[1:]:
+            os.close(puerto.escritura)
@@ -0,0 +1,97 @@
+"""
+Pruebas de ColaComandos con un maestro simulado que responde dentro de write()
+(antes de que termine el flush), como un ESP32 rápido por USB.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'espnow_class_challenge'))
+
+from cola_comandos import ColaComandos, CONFIRMADO, FALLIDO  # noqa: E402
+from conexion_serial import ConexionSerial  # noqa: E402
+
+
+class MaestroInstantaneo:
+    """Puerto falso: responde "Enviado: CODIGO N" en write(); flush() tarda 5 ms"""
+    perder = set()       # Comandos cuya respuesta se pierde (siempre)
+    recibidos = []
+
+    def __init__(self):
+        self.port = None
+        self.is_open = False
+        self._rx = bytearray()
+        self._cond = threading.Condition()
+
+    def open(self):
+        self.is_open = True
+
+    def write(self, data):
+        for linea in data.decode().splitlines():
+            MaestroInstantaneo.recibidos.append(linea)
+            if linea not in self.perder:
+                with self._cond:
+                    self._rx += f"Enviado: {linea[:5]} {int(linea[5:])}\r\n".encode()
+                    self._cond.notify()
+        return len(data)
+
+    def flush(self):
+        time.sleep(0.005)
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def read(self, size=1):
+        with self._cond:
+            if not self._rx:
+                self._cond.wait(self.timeout)
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+            return data
+
+    def close(self):
+        self.is_open = False
+
+
+def correr_pedido(productos, perder=(), timeout_s=0.3):
+    MaestroInstantaneo.perder = set(perder)
+    MaestroInstantaneo.recibidos = []
+    resultados = []
+    listo = threading.Event()
+
+    def on_result(comando):
+        resultados.append(comando)
+        if len(resultados) == len(productos):
+            listo.set()
+
+    cola = ColaComandos(ConexionSerial(serial_factory=MaestroInstantaneo), timeout_s=timeout_s,
+                        on_result=on_result)
+    cola.pedir_pedido("/dev/falso", productos)
+    assert listo.wait(5)
+    time.sleep(0.05)  # Dar lugar a reenvíos indebidos
+    cola.stop()
+    return {c.codigo: c for c in resultados}, MaestroInstantaneo.recibidos
+
+
+def test_respuesta_antes_del_flush_confirma_sin_reenviar():
+    resultados, recibidos = correr_pedido([("HBRGR", 50), ("SWBRD", 50)])
+    assert [c.estado for c in resultados.values()] == [CONFIRMADO, CONFIRMADO]
+    assert recibidos == ["HBRGR50", "SWBRD50"]
+
+
+def test_respuesta_perdida_antes_de_una_posterior_no_se_reenvia():
+    resultados, recibidos = correr_pedido([("HBRGR", 50), ("SWBRD", 50)], perder={"HBRGR50"})
+    assert resultados["HBRGR"].estado == FALLIDO
+    assert resultados["HBRGR"].intentos == 1
+    assert resultados["SWBRD"].estado == CONFIRMADO
+    assert recibidos == ["HBRGR50", "SWBRD50"]
+
+
+def test_sin_respuesta_se_reenvia_una_sola_vez():
+    resultados, recibidos = correr_pedido([("TMATO", 20)], perder={"TMATO20"}, timeout_s=0.1)
+    assert resultados["TMATO"].estado == FALLIDO
+    assert recibidos == ["TMATO20", "TMATO20"]
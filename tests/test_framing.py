@@ -0,0 +1,53 @@
+"""
+Pruebas de LineFramer con telemetría binaria: una trama con CRC inválido se
+descarta sin arrastrar la línea de texto que la sigue.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_framing import FRAME_RX, FRAME_TX, LineFramer, encode_frame  # noqa: E402
+from monitor_parser import RxFrame, TxFrame, parse_line  # noqa: E402
+
+LINEA = "TX: estado=0, request=0, dist=100"
+
+
+def corrupta(frame):
+    frame = bytearray(frame)
+    frame[-1] ^= 0xFF  # CRC
+    return bytes(frame)
+
+
+def flujo():
+    return (b"boot ok\n"
+            + corrupta(encode_frame(FRAME_TX, 1, 7, 1, 0, 120, 5000))
+            + LINEA.encode() + b"\n"
+            + encode_frame(FRAME_RX, 2, 8, 3, 1, 80, 5100))
+
+
+def test_trama_con_crc_invalido_se_descarta():
+    """La trama corrupta no llega como evento y la línea siguiente sale intacta"""
+    framer = LineFramer()
+    items = framer.feed(flujo())
+    assert items == ["boot ok", LINEA, RxFrame(2, 3, 1, 80, 8, 5100)]
+    assert framer.bad_frames == 1
+    assert type(parse_line(items[1])) is TxFrame
+
+
+def test_trama_con_crc_invalido_byte_a_byte():
+    """El mismo resultado si los bytes llegan de a uno (trama partida entre lecturas)"""
+    framer = LineFramer()
+    items = []
+    for byte in flujo():
+        items.extend(framer.feed(bytes((byte,))))
+    assert items == ["boot ok", LINEA, RxFrame(2, 3, 1, 80, 8, 5100)]
+    assert framer.bad_frames == 1
+
+
+def test_trama_valida_entre_lineas():
+    framer = LineFramer()
+    items = framer.feed(b"a\n" + encode_frame(FRAME_TX, 1, 9, 2, 0, 50, 42) + b"b\n")
+    assert items == ["a", TxFrame(2, 0, 50, 9, 42), "b"]
+    assert framer.bad_frames == 0
@@ -0,0 +1,46 @@
+"""
+Pruebas de la búsqueda de texto del índice de sesiones: el filtro de Bloom no
+debe descartar bloques que contienen la subcadena buscada.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_index import IndexWriter, SessionIndex, query_tokens  # noqa: E402
+from monitor_parser import parse_line, SerialLine  # noqa: E402
+from monitor_recorder import SessionRecorder  # noqa: E402
+
+LINEAS = [
+    "TX -> estado=0 request=0 dist=120",
+    "retrying ESP-NOW send",
+    "Peer lost before send",
+    "RX <- estado=2 request=1",
+]
+
+
+def grabar(base):
+    recorder = SessionRecorder(base, chunk_rows=2, fsync=False, index=IndexWriter(base))
+    recorder.start()
+    for i, texto in enumerate(LINEAS):
+        recorder.record("A", SerialLine("", texto, parse_line(texto), 1_000_000 * (i + 1)))
+    recorder.close()
+
+
+def test_query_tokens_solo_palabras_interiores():
+    """Los extremos pueden ser parte de una palabra más larga"""
+    assert query_tokens("retry") == set()
+    assert query_tokens("Peer lost before sen") == {"lost", "before"}
+    assert query_tokens(" serial ") == {"serial"}
+
+
+def test_busqueda_por_subcadena(tmp_path):
+    """"retry" encuentra "retrying" y una frase cortada encuentra la línea"""
+    base = str(tmp_path / "sesion")
+    grabar(base)
+    index = SessionIndex(base)
+    assert [r.text for r in index.search(text="retry")] == ["retrying ESP-NOW send"]
+    assert [r.text for r in index.search(text="Peer lost before sen")] == ["Peer lost before send"]
+    assert [r.text for r in index.search(text="eer LOST")] == ["Peer lost before send"]
+    assert index.search(text="lost after") == []
@@ -0,0 +1,77 @@
+"""
+Pruebas de InterlockVerifier: verde/verde entre los nodos de un cruce se
+reporta y un relevo normal con ALL RED intermedio no genera falsos positivos.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_interlock import (  # noqa: E402
+    InterlockVerifier, VIOLATION_CONFLICT, VIOLATION_CLEARANCE
+)
+from monitor_parser import parse_line  # noqa: E402
+
+MS = 1_000_000
+
+
+def cruce(eventos, duracion_ms):
+    """Alimentar A/B con RX cada 500 ms y los cambios de estado dados
+    como {t_ms: (nodo, línea)}; devuelve el verifier ya vaciado"""
+    verifier = InterlockVerifier(max_violations=None)
+    verifier.pair("A", "B")
+    rx = {"A": parse_line("RX de ESP 2: estado=0, request=0, dist=100"),
+          "B": parse_line("RX de ESP 1: estado=0, request=0, dist=100")}
+    for t_ms in range(0, duracion_ms + 1, 100):
+        if t_ms % 500 == 0:
+            for node in ("A", "B"):
+                verifier.feed(node, rx[node], t_ms * MS)
+        if t_ms in eventos:
+            node, line = eventos[t_ms]
+            verifier.feed(node, parse_line(line), t_ms * MS)
+    verifier.flush()
+    return verifier
+
+
+def test_verde_verde_entre_nodos_es_conflicto():
+    """B pasa a VERDE mientras A sigue en VERDE"""
+    verifier = cruce({
+        0: ("A", "-> ALL_RED"),
+        100: ("B", "-> ALL_RED"),
+        1500: ("A", "-> VERDE"),
+        3000: ("B", "-> VERDE"),
+    }, 4000)
+    assert verifier.counts[VIOLATION_CONFLICT] == 1
+    (violation,) = [v for v in verifier.violations if v.kind == VIOLATION_CONFLICT]
+    assert violation.node == "B" and violation.t_ns == 3000 * MS
+
+
+def test_relevo_con_despeje_no_reporta():
+    """A: VERDE -> AMARILLO -> ALL RED y B pasa a VERDE tras el despeje de 1 s"""
+    verifier = cruce({
+        0: ("A", "-> ALL_RED"),
+        100: ("B", "-> ALL_RED"),
+        1500: ("A", "-> VERDE"),
+        8000: ("A", "-> AMARILLO"),
+        10000: ("A", "-> ALL_RED"),
+        11200: ("B", "-> VERDE"),
+        18000: ("B", "-> AMARILLO"),
+        20000: ("B", "-> ALL_RED"),
+        21200: ("A", "-> VERDE"),
+    }, 22000)
+    assert sum(verifier.counts.values()) == 0, list(verifier.violations)
+
+
+def test_relevo_sin_despeje_reporta():
+    """B pasa a VERDE 300 ms después de que A deja el amarillo"""
+    verifier = cruce({
+        0: ("A", "-> ALL_RED"),
+        100: ("B", "-> ALL_RED"),
+        1500: ("A", "-> VERDE"),
+        8000: ("A", "-> AMARILLO"),
+        10000: ("A", "-> ALL_RED"),
+        10300: ("B", "-> VERDE"),
+    }, 11000)
+    assert verifier.counts[VIOLATION_CLEARANCE] == 1
+    assert verifier.counts[VIOLATION_CONFLICT] == 0
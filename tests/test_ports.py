@@ -0,0 +1,33 @@
+"""
+Pruebas de PortWatcher: el escaneo inicial se avisa aunque no haya puertos.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import monitor_ports  # noqa: E402
+from monitor_ports import PortWatcher  # noqa: E402
+
+
+def test_primer_aviso_sin_puertos(tmp_path, monkeypatch):
+    """Sin dispositivos conectados el primer on_change llega igual, vacío"""
+    monkeypatch.setattr(monitor_ports.list_ports, "comports", lambda: [])
+    avisos = []
+    llegó = threading.Event()
+
+    def on_change(added, removed):
+        avisos.append((added, removed))
+        llegó.set()
+
+    watcher = PortWatcher(on_change=on_change, poll_interval_s=0.05, dev_dir=str(tmp_path))
+    watcher.start()
+    try:
+        assert llegó.wait(2.0)
+        watcher.rescan()
+        threading.Event().wait(0.2)
+    finally:
+        watcher.stop()
+    assert avisos == [([], [])]
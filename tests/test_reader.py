@@ -0,0 +1,65 @@
+"""
+Pruebas de la reconexión de SerialReaderCore: esperar al dispositivo no debe
+escanear comports() en cada vigilancia.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import serial
+from serial.tools.list_ports_common import ListPortInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import monitor_reader  # noqa: E402
+from monitor_reader import SerialReaderCore  # noqa: E402
+
+
+def puerto_ausente(**kwargs):
+    raise serial.SerialException("could not open port")
+
+
+def correr(reader, segundos):
+    thread = threading.Thread(target=reader.run)
+    thread.start()
+    time.sleep(segundos)
+    reader.stop()
+    thread.join(2.0)
+
+
+def test_reintentos_sin_escanear_en_cada_vigilancia(monkeypatch):
+    """Con número de serie conocido, comports() se llama una vez por reintento"""
+    escaneos = []
+    monkeypatch.setattr(monitor_reader.list_ports, "comports", lambda: escaneos.append(1) or [])
+    reader = SerialReaderCore("/dev/ttyNOEXISTE", serial_factory=puerto_ausente,
+                              on_lines=lambda port_id, items: None)
+    reader.usb_serial = "ABC123"
+    reader._lost_ns = time.monotonic_ns()
+    correr(reader, 1.0)
+    assert len(escaneos) == reader._attempts
+
+
+class Inventario:
+    """PortWatcher mínimo: ports() devuelve la lista actual"""
+    def __init__(self):
+        self.lista = []
+
+    def ports(self):
+        return self.lista
+
+
+def test_inventario_detecta_reaparicion(monkeypatch):
+    """Con PortWatcher se busca por número de serie en su inventario, sin comports()"""
+    monkeypatch.setattr(monitor_reader.list_ports, "comports", lambda: 1 / 0)
+    inventario = Inventario()
+    reader = SerialReaderCore("COM3", serial_factory=puerto_ausente,
+                              on_lines=lambda port_id, items: None, port_watcher=inventario)
+    reader.usb_serial = "ABC123"
+    reader._lost_ns = time.monotonic_ns()
+    assert reader._device_present() is False
+    inventario.lista = [ListPortInfo("COM7", skip_link_detection=True)]
+    inventario.lista[0].serial_number = "ABC123"
+    assert reader._device_present() is True
+    assert monitor_reader.find_port_by_serial("ABC123", inventario) == "COM7"
@@ -0,0 +1,72 @@
+"""
+Pruebas de SessionRecorder: valores fuera de rango y sesiones que se continúan.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_parser import DistanceReading, SerialLine  # noqa: E402
+from monitor_recorder import INT32_MAX, SessionRecorder, iter_chunks, iter_records  # noqa: E402
+
+
+def grabar(base, lineas, chunk_rows=2):
+    recorder = SessionRecorder(base, chunk_rows=chunk_rows, fsync=False)
+    recorder.start()
+    for texto, evento in lineas:
+        recorder.record("A", SerialLine("", texto, evento, 1))
+    recorder.close()
+    return recorder
+
+
+def test_distancia_fuera_de_rango_no_detiene_la_grabacion(tmp_path):
+    """Una distancia que no entra en int32 se recorta y las filas siguientes se graban"""
+    base = str(tmp_path / "sesion")
+    recorder = grabar(base, [("Distancia: enorme", DistanceReading(10 ** 12)), ("siguiente", None)])
+    assert recorder.write_errors == 0
+    assert [r.dist for r in iter_records(base)] == [INT32_MAX, -1]
+
+
+def test_continuar_sesion_sigue_la_numeracion(tmp_path):
+    """Al anexar, los bloques nuevos siguen la numeración y se descarta un bloque truncado"""
+    base = str(tmp_path / "sesion")
+    primera = grabar(base, [(f"linea {i}", None) for i in range(4)])
+    assert primera.chunks_written == 2
+    with open(base + ".evt", "ab") as f:
+        f.write(b"CHNK\x01")  # Bloque cortado por una caída
+    segunda = grabar(base, [(f"otra {i}", None) for i in range(2)])
+    assert segunda.chunks_written == 3
+    assert [c.index for c in iter_chunks(base)] == [0, 1, 2]
+    assert len(list(iter_records(base))) == 6
+
+
+class DiscoLleno:
+    """Envuelve el archivo .evt: la primera escritura deja la mitad y falla (ENOSPC)"""
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.name = archivo.name
+        self.fallar = True
+
+    def write(self, data):
+        if self.fallar:
+            self.fallar = False
+            self.archivo.write(data[:len(data) // 2])
+            raise OSError(28, "No space left on device")
+        return self.archivo.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.archivo, name)
+
+
+def test_bloque_fallido_no_oculta_los_siguientes(tmp_path):
+    """Tras un error a mitad de un bloque, los bloques siguientes siguen siendo legibles"""
+    base = str(tmp_path / "sesion")
+    recorder = SessionRecorder(base, chunk_rows=2, fsync=False)
+    recorder.start()
+    recorder._evt_file = DiscoLleno(recorder._evt_file)
+    recorder.record_batch("A", [SerialLine("", "se pierde", None, 1), SerialLine("", "tambien", None, 1)])
+    recorder.record_batch("A", [SerialLine("", "despues", None, 1), SerialLine("", "fin", None, 1)])
+    recorder.close()
+    assert recorder.write_errors == 1
+    assert [r.text for r in iter_records(base)] == ["despues", "fin"]
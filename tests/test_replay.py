@@ -0,0 +1,35 @@
+"""
+Pruebas de monitor_replay: la reproducción analiza las líneas con el mismo
+flujo que el monitor en vivo (estado, enlace y enclavamiento).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_replay import ReplayEngine, iter_log_lines  # noqa: E402
+
+LOG = """\
+[12:00:00.000] [A] -> ALL_RED
+[12:00:00.000] [B] -> ALL_RED
+[12:00:00.100] [A] RX de ESP 2: estado=0, request=0, dist=100
+[12:00:00.100] [B] RX de ESP 1: estado=0, request=0, dist=100
+[12:00:01.500] [A] -> VERDE
+[12:00:01.600] [B] RX de ESP 1: estado=1, request=0, dist=100
+[12:00:01.700] [B] -> VERDE
+"""
+
+
+def test_reproduccion_detecta_conflicto(tmp_path):
+    """A y B en verde a la vez en un log de texto se reporta como CONFLICTO"""
+    path = tmp_path / "log.txt"
+    path.write_text(LOG, encoding="utf-8")
+    violaciones = []
+    engine = ReplayEngine(on_violation=violaciones.append)
+    stats = engine.run(iter_log_lines(str(path)))
+    assert stats['lines'] == 7
+    assert engine.nodes["A"].estado == engine.nodes["B"].estado == "VERDE"
+    assert engine.pipeline.interlock.counts["CONFLICTO"] >= 1
+    assert stats['violations'] == len(violaciones)
+    assert any(v.kind == "CONFLICTO" for v in violaciones)
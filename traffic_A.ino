@@ -62,6 +62,15 @@ uint8_t peerMAC[6] = {0x50, 0x78, 0x7D, 0x15, 0xB3, 0x84}  ; // MAC de ESP32-B
 #define BROADCAST_INTERVAL      200   // Intervalo de envío ESP-NOW (ms)
 #define PEER_TIMEOUT            2000  // Tiempo sin mensajes para modo seguro
 
+// ==================== TELEMETRÍA SERIAL ====================
+// 1 = enviar TX/RX al monitor como tramas binarias (menos ancho de banda),
+// 0 = líneas de texto "TX: ..." / "RX de ESP ...". Los demás mensajes de
+// depuración siguen siendo texto en ambos modos.
+#define BINARY_TELEMETRY        0
+#define TELEMETRY_SYNC          0xA5  // Nunca inicia un carácter UTF-8
+#define FRAME_TX                0x01
+#define FRAME_RX                0x02
+
 // ==================== ESTADOS DEL SEMÁFORO ====================
 enum TrafficState {
   STATE_ALL_RED = 0,
@@ -101,6 +110,18 @@ uint16_t remoteDistance = 9999;
 uint8_t messageSeq = 0;
 uint8_t remoteSeq = 0;
 
+// Mensajes recibidos pendientes de imprimir. onDataRecv corre en la tarea de
+// WiFi: si escribiera al Serial ahí, la trama o la línea "RX de ESP" podría
+// caer en medio de una línea que loop() está imprimiendo y el monitor perdería
+// ambas. El callback solo encola; loop() imprime (ver printReceived()).
+#define RX_QUEUE_SIZE 8
+TrafficMsg rxQueue[RX_QUEUE_SIZE];
+volatile uint8_t rxHead = 0;        // Lo avanza onDataRecv
+volatile uint8_t rxTail = 0;        // Lo avanza loop()
+volatile bool rxBadSize = false;    // Llegó un mensaje de tamaño incorrecto
+volatile int sendFailStatus = -1;   // Último error de envío (-1 = ninguno pendiente)
+portMUX_TYPE rxMux = portMUX_INITIALIZER_UNLOCKED;
+
 int greenDuration = GREEN_NORMAL;
 int cycleCount = 0;
 int priorityCount = 0;
@@ -244,6 +265,32 @@ void updateDisplay() {
   display.display();
 }
 
+// ==================== TELEMETRÍA BINARIA ====================
+// Trama: SYNC | LEN | TYPE | TrafficMsg (LEN bytes) | CRC-16 little-endian
+// CRC-16/XMODEM (poly 0x1021, inicial 0) sobre LEN, TYPE y el payload
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0x0000;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (uint16_t)((crc << 1) ^ 0x1021) : (uint16_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendTelemetryFrame(uint8_t type, const TrafficMsg &msg) {
+  uint8_t frame[3 + sizeof(TrafficMsg) + 2];
+  frame[0] = TELEMETRY_SYNC;
+  frame[1] = sizeof(TrafficMsg);
+  frame[2] = type;
+  memcpy(frame + 3, &msg, sizeof(TrafficMsg));
+  uint16_t crc = crc16(frame + 1, 2 + sizeof(TrafficMsg));
+  frame[sizeof(frame) - 2] = crc & 0xFF;
+  frame[sizeof(frame) - 1] = crc >> 8;
+  Serial.write(frame, sizeof(frame));
+}
+
 // ==================== CALLBACKS ESP-NOW ====================
 // Nueva firma de callback de envío (core ESP32 reciente)
 void onDataSent(const wifi_tx_info_t *info, esp_now_send_status_t status) {
@@ -251,15 +298,14 @@ void onDataSent(const wifi_tx_info_t *info, esp_now_send_status_t status) {
   if (status == ESP_NOW_SEND_SUCCESS) {
     // TX exitoso - silencioso para no saturar logs
   } else {
-    Serial.print("Callback: Error en envío, status=");
-    Serial.println(status);
+    sendFailStatus = status;  // Se imprime desde loop()
   }
 }
 
 // Nueva firma de callback de recepción (core ESP32 reciente)
 void onDataRecv(const esp_now_recv_info_t *recv_info, const uint8_t *incomingData, int len) {
   if (len != sizeof(TrafficMsg)) {
-    Serial.println("Mensaje de tamaño incorrecto");
+    rxBadSize = true;
     return;
   }
 
@@ -273,14 +319,57 @@ void onDataRecv(const esp_now_recv_info_t *recv_info, const uint8_t *incomingDat
   remoteSeq = msg.seq;
   lastRemoteMsg = millis();
 
-  Serial.print("RX de ESP ");
-  Serial.print(msg.sender_id);
-  Serial.print(": estado=");
-  Serial.print(msg.state);
-  Serial.print(", request=");
-  Serial.print(msg.request);
-  Serial.print(", dist=");
-  Serial.println(msg.distance_cm);
+  // Encolar para imprimir desde loop(); con la cola llena se descarta
+  portENTER_CRITICAL(&rxMux);
+  uint8_t next = (rxHead + 1) % RX_QUEUE_SIZE;
+  if (next != rxTail) {
+    rxQueue[rxHead] = msg;
+    rxHead = next;
+  }
+  portEXIT_CRITICAL(&rxMux);
+}
+
+// Imprimir lo que dejaron los callbacks ESP-NOW (solo desde loop())
+void printReceived() {
+  if (rxBadSize) {
+    rxBadSize = false;
+    Serial.println("Mensaje de tamaño incorrecto");
+  }
+  if (sendFailStatus >= 0) {
+    Serial.print("Callback: Error en envío, status=");
+    Serial.println(sendFailStatus);
+    sendFailStatus = -1;
+  }
+  while (true) {
+    TrafficMsg msg;
+    bool pending = false;
+    portENTER_CRITICAL(&rxMux);
+    if (rxTail != rxHead) {
+      msg = rxQueue[rxTail];
+      rxTail = (rxTail + 1) % RX_QUEUE_SIZE;
+      pending = true;
+    }
+    portEXIT_CRITICAL(&rxMux);
+    if (!pending) {
+      return;
+    }
+#if BINARY_TELEMETRY
+    sendTelemetryFrame(FRAME_RX, msg);
+#else
+    Serial.print("RX de ESP ");
+    Serial.print(msg.sender_id);
+    Serial.print(": estado=");
+    Serial.print(msg.state);
+    Serial.print(", request=");
+    Serial.print(msg.request);
+    Serial.print(", dist=");
+    Serial.print(msg.distance_cm);
+    Serial.print(", seq=");
+    Serial.print(msg.seq);
+    Serial.print(", ts=");
+    Serial.println(msg.timestamp_ms);
+#endif
+  }
 }
 
 // ==================== FUNCIONES ESP-NOW ====================
@@ -401,12 +490,20 @@ void broadcastState() {
   lastBroadcast = millis();
 
   if (result == ESP_OK) {
+#if BINARY_TELEMETRY
+    sendTelemetryFrame(FRAME_TX, msg);
+#else
     Serial.print("TX: estado=");
     Serial.print(msg.state);
     Serial.print(", request=");
     Serial.print(msg.request);
     Serial.print(", dist=");
-    Serial.println(msg.distance_cm);
+    Serial.print(msg.distance_cm);
+    Serial.print(", seq=");
+    Serial.print(msg.seq);
+    Serial.print(", ts=");
+    Serial.println(msg.timestamp_ms);
+#endif
   } else {
     Serial.print("Error TX ESP-NOW: 0x");
     Serial.println(result, HEX);
@@ -644,6 +741,9 @@ void loop() {
   // Transmitir estado por ESP-NOW
   broadcastState();
   
+  // Imprimir mensajes recibidos (encolados por onDataRecv)
+  printReceived();
+  
   // Actualizar pantalla
   updateDisplay();
   